@@ -0,0 +1,194 @@
+"""Throughput benchmark for the poster repository against a local fake Plex server.
+
+Run from a development install (``pip install -e ".[dev]"``), e.g.::
+
+    python benchmarks/posters_benchmark.py --kind show --items 2000 --seasons 5 --episodes 10
+
+Each phase reports items/s, MB/s, requests per endpoint and peak memory; ``--json-out`` writes
+the same numbers so runs can be compared across commits.
+"""
+
+from __future__ import annotations
+
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import requests
+import typer
+from plexapi.server import PlexServer
+
+from posters.domain import PosterJob
+from posters.repositories.plex_posters import PlexPostersRepository
+from posters.repositories.poster_manifest import STATE_DIR
+from posters.repositories.retry import RetryPolicy
+from tests.fake_plex import (
+    RESET_PATH,
+    STATS_PATH,
+    FakePlexConfig,
+    SyntheticLibrary,
+    fake_plex_process,
+)
+
+LIBRARY = "Benchmark"
+PHASES = ("enumerate", "targets", "download")
+
+app = typer.Typer(add_completion=False)
+
+
+@dataclass(frozen=True)
+class PhaseResult:
+    phase: str
+    items: int
+    seconds: float
+    items_per_second: float
+    megabytes_per_second: float
+    requests: dict[str, int]
+    peak_rss_mb: float
+    peak_traced_mb: float | None
+
+
+@app.command()
+def main(
+    kind: str = typer.Option("movie", help="Library type: movie or show."),
+    items: int = typer.Option(1000, help="Movies or shows in the library."),
+    seasons: int = typer.Option(3, help="Seasons per show."),
+    episodes: int = typer.Option(10, help="Episodes per season."),
+    latency: float = typer.Option(0.0, help="Seconds added to every server response."),
+    error_rate: float = typer.Option(0.0, help="Share of artwork requests answered with 503."),
+    payload_size: int = typer.Option(64 * 1024, help="Bytes per original poster."),
+    workers: int = typer.Option(8, help="Download workers."),
+    bulk_enumeration: bool = typer.Option(False, help="Use section-level show listings."),
+    retries: int = typer.Option(3, help="Retry attempts for transient errors."),
+    limit: int | None = typer.Option(None, help="Stop after this many assets."),
+    phases: list[str] = typer.Option(list(PHASES), "--phase", help="Phases to run."),
+    trace_memory: bool = typer.Option(
+        False, help="Also report tracemalloc peaks (slows the run down)."
+    ),
+    json_out: Path | None = typer.Option(None, help="Write results as JSON to this file."),
+) -> None:
+    library = SyntheticLibrary(
+        title=LIBRARY,
+        type=kind,
+        items=items,
+        seasons=seasons if kind == "show" else 0,
+        episodes=episodes if kind == "show" else 0,
+    )
+    config = FakePlexConfig(
+        libraries=(library,),
+        latency=latency,
+        error_rate=error_rate,
+        payload_size=payload_size,
+    )
+    typer.echo(f"Library: {library.asset_count} assets ({kind}, {items} items)", err=True)
+    results = []
+    with fake_plex_process(config) as base_url, tempfile.TemporaryDirectory() as output_dir:
+        plex = PlexServer(base_url, "benchmark")
+        repository = PlexPostersRepository(
+            plex=plex, retry=RetryPolicy(attempts=retries, base_delay=0.05)
+        )
+        job = PosterJob(
+            output_dir=output_dir,
+            library=LIBRARY,
+            base_url=base_url,
+            workers=workers,
+            bulk_enumeration=bulk_enumeration,
+        )
+        runs: dict[str, Callable[[], int]] = {
+            "enumerate": lambda: _count(
+                repository.iter_posters(LIBRARY, bulk=bulk_enumeration), limit
+            ),
+            "targets": lambda: _count(repository.iter_targets(job, limit=limit), None),
+            "download": lambda: repository.download_posters(job, limit=limit).downloaded,
+        }
+        for phase in phases:
+            if phase not in runs:
+                raise typer.BadParameter(f"Unknown phase {phase!r}; choose from {PHASES}.")
+            results.append(_measure(phase, runs[phase], base_url, Path(output_dir), trace_memory))
+
+    for result in results:
+        requests_total = sum(result.requests.values())
+        typer.echo(
+            f"{result.phase:<10} {result.items:>9} items  {result.seconds:8.2f}s  "
+            f"{result.items_per_second:10.1f} items/s  {result.megabytes_per_second:8.2f} MB/s  "
+            f"{requests_total:>8} requests  {result.peak_rss_mb:8.1f} MB peak RSS"
+        )
+        typer.echo(f"{'':<10} requests: {result.requests}")
+    if json_out is not None:
+        payload = {
+            "commit": _commit(),
+            "config": asdict(config),
+            "workers": workers,
+            "bulk_enumeration": bulk_enumeration,
+            "limit": limit,
+            "phases": [asdict(result) for result in results],
+        }
+        json_out.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+def _measure(
+    phase: str, run: Callable[[], int], base_url: str, output_dir: Path, trace_memory: bool
+) -> PhaseResult:
+    requests.get(f"{base_url}{RESET_PATH}", timeout=10)
+    bytes_before = _written_bytes(output_dir)
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    items = run()
+    seconds = time.perf_counter() - started
+    peak_traced = None
+    if trace_memory:
+        peak_traced = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    written = _written_bytes(output_dir) - bytes_before
+    stats = requests.get(f"{base_url}{STATS_PATH}", timeout=10).json()
+    return PhaseResult(
+        phase=phase,
+        items=items,
+        seconds=seconds,
+        items_per_second=items / seconds if seconds else 0.0,
+        megabytes_per_second=written / 2**20 / seconds if seconds else 0.0,
+        requests=stats,
+        # ru_maxrss is in KiB on Linux and bytes on macOS.
+        peak_rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        / (2**20 if sys.platform == "darwin" else 2**10),
+        peak_traced_mb=peak_traced,
+    )
+
+
+def _count(iterable, limit: int | None) -> int:
+    count = 0
+    for _ in iterable:
+        count += 1
+        if limit is not None and count >= limit:
+            break
+    return count
+
+
+def _written_bytes(output_dir: Path) -> int:
+    return sum(
+        path.stat().st_size
+        for path in output_dir.rglob("*")
+        if path.is_file() and STATE_DIR not in path.parts
+    )
+
+
+def _commit() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+if __name__ == "__main__":
+    app()
@@ -1,10 +1,6 @@
 from __future__ import annotations
 
 import typer
-from plexapi.server import PlexServer
-
-from libraries.repositories.plex_libraries import PlexLibrariesRepository
-from libraries.repositories.schemas import LibrariesListRequest
 
 app = typer.Typer(help="List Plex libraries")
 
@@ -15,6 +11,12 @@ def list(
     token: str = typer.Option(..., envvar="PLEX_TOKEN"),
 ) -> None:
     """List Plex libraries."""
+    # Imported here so `--help` and shell completion stay fast.
+    from plexapi.server import PlexServer
+
+    from libraries.repositories.plex_libraries import PlexLibrariesRepository
+    from libraries.repositories.schemas import LibrariesListRequest
+
     request = LibrariesListRequest(base_url=base_url, token=token)
     plex = PlexServer(request.base_url, request.token)
     repository = PlexLibrariesRepository(plex=plex)
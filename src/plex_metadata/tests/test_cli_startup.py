@@ -0,0 +1,44 @@
+import json
+import subprocess
+import sys
+
+# Generous enough for a cold CI runner; eager imports of plexapi and friends took ~5x longer.
+IMPORT_BUDGET_SECONDS = 0.5
+HEAVY_MODULES = ("plexapi", "requests", "tqdm", "pydantic", "sqlite3", "PIL")
+
+_HELP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from plex_metadata.cli import app
+elapsed = time.perf_counter() - started
+sys.argv = ["plex-metadata", *sys.argv[1:]]
+try:
+    app()
+except SystemExit:
+    pass
+print(json.dumps({"seconds": elapsed, "modules": sorted(sys.modules)}), file=sys.stderr)
+"""
+
+
+def _run_help(*args: str) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", _HELP_SCRIPT, *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stderr.strip().splitlines()[-1])
+
+
+def test_help_does_not_import_heavy_dependencies() -> None:
+    for args in (["--help"], ["posters", "download", "--help"], ["libraries", "list", "--help"]):
+        modules = _run_help(*args)["modules"]
+
+        assert [name for name in modules if name.split(".")[0] in HEAVY_MODULES] == []
+
+
+def test_cli_import_stays_within_budget() -> None:
+    # Best of three, so a single slow start on a busy machine doesn't fail the suite.
+    seconds = min(_run_help("--help")["seconds"] for _ in range(3))
+
+    assert seconds < IMPORT_BUDGET_SECONDS
@@ -1,93 +1,923 @@
+from __future__ import annotations
+
+import contextlib
+import functools
+import inspect
+import os
+import re
+import sys
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TextIO
+
 import typer
-from plexapi.server import PlexServer
-from requests import RequestException
 
-from posters.domain import PosterJob
-from posters.repositories.plex_posters import DownloadReport, PlexPostersRepository
-from posters.repositories.schemas import PostersDownloadRequest
+from posters.domain import (
+    ArtworkSize,
+    FsyncPolicy,
+    ImageFormat,
+    ImageProcessing,
+    PosterAsset,
+    PosterJob,
+    ProgressMode,
+    Shard,
+)
+
+# plexapi, requests, tqdm and pydantic are imported inside the commands, so `--help` and
+# shell completion don't pay for them.
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from plexapi.server import PlexServer
+
+    from posters.repositories.limits import AdaptiveLimit, ConcurrencyLimit
+    from posters.repositories.metrics import PosterMetrics
+    from posters.repositories.plex_posters import (
+        DownloadReport,
+        PlexPostersRepository,
+        PosterEstimate,
+    )
+    from posters.repositories.poster_cache import PosterCache
+    from posters.repositories.poster_storage import PosterStorage
+    from posters.repositories.progress import ProgressSink
+    from posters.repositories.run_journal import JournalState, RunJournal
+    from posters.repositories.schemas import (
+        ArtworkSizeRequest,
+        ImageProcessingRequest,
+        PostersDownloadRequest,
+        PostersWatchRequest,
+    )
 
 app = typer.Typer(help="Download poster artwork")
 
+_RELATIVE_SINCE = re.compile(r"^(?P<amount>\d+)(?P<unit>[mhdw])$")
+_SINCE_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+_BANDWIDTH = re.compile(r"^(?P<amount>\d+(\.\d+)?)(?P<unit>[kmg]?)(i?b)?(/s)?$", re.IGNORECASE)
+_BANDWIDTH_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3}
 
-@app.command()
-def download(
+
+def _shared_options(
     base_url: str = typer.Option(..., envvar="PLEX_BASE_URL"),
     token: str = typer.Option(..., envvar="PLEX_TOKEN"),
     library: str | None = typer.Option(None, envvar="PLEX_LIBRARY"),
     all_libraries: bool = typer.Option(False, "--all-libraries"),
     output_dir: str = typer.Option("posters"),
-    limit: int | None = typer.Option(None),
-    dry_run: bool = typer.Option(False),
-) -> None:
-    """Download posters for a library section."""
+    workers: int = typer.Option(1),
+    max_in_flight: int | None = typer.Option(None),
+    adaptive: bool = typer.Option(
+        False, "--adaptive", help="Adjust requests in flight to the server's latency and errors."
+    ),
+    min_in_flight: int = typer.Option(1, help="Fewest requests in flight with --adaptive."),
+    latency_target: float | None = typer.Option(
+        None, help="Latency (ms) --adaptive backs off above; default twice the best seen."
+    ),
+    max_rps: float | None = typer.Option(None, help="Requests per second to Plex, at most."),
+    max_bandwidth: str | None = typer.Option(None, help="Artwork bytes per second, e.g. 20M."),
+    bulk_enumeration: bool = typer.Option(False, "--bulk-enumeration"),
+    page_size: int = typer.Option(200, help="Items per listing request."),
+    prefetch_pages: int = typer.Option(2, help="Listing pages requested ahead."),
+    dedup: bool = typer.Option(False, "--dedup"),
+    cache: bool = typer.Option(True, "--cache/--no-cache"),
+    refresh_cache: bool = typer.Option(False, "--refresh-cache"),
+    cache_dir: str | None = typer.Option(None, envvar="PLEX_METADATA_CACHE_DIR"),
+    retries: int = typer.Option(3),
+    retry_delay: float = typer.Option(0.5),
+    breaker_cooldown: float = typer.Option(30.0),
+    max_width: int | None = typer.Option(None),
+    max_height: int | None = typer.Option(None),
+    quality: int | None = typer.Option(None),
+    thumb_max_width: int | None = typer.Option(None),
+    thumb_max_height: int | None = typer.Option(None),
+    thumb_quality: int | None = typer.Option(None),
+    fsync: FsyncPolicy = typer.Option(FsyncPolicy.NONE),
+    metrics_out: str | None = typer.Option(None),
+    verify_images: bool = typer.Option(False, "--verify-images"),
+    image_max_width: int | None = typer.Option(None),
+    image_max_height: int | None = typer.Option(None),
+    image_format: ImageFormat | None = typer.Option(None),
+    image_quality: int | None = typer.Option(None),
+    strip_metadata: bool = typer.Option(False, "--strip-metadata"),
+    image_workers: int | None = typer.Option(None),
+    storage: str = typer.Option(
+        "local", help="local, tar:PATH, zip:PATH or s3://bucket/prefix (needs boto3)."
+    ),
+    s3_endpoint_url: str | None = typer.Option(None, envvar="PLEX_METADATA_S3_ENDPOINT_URL"),
+    progress: ProgressMode = typer.Option(ProgressMode.BAR, help="Aggregate bar, or events."),
+    progress_out: str | None = typer.Option(None, help="File for jsonl events; default stdout."),
+) -> dict[str, Any]:
+    """Options ``download`` and ``watch`` share, checked and turned into request fields."""
+    from posters.repositories.schemas import ArtworkSizeRequest, ImageProcessingRequest
+
     if not library and not all_libraries:
         raise typer.BadParameter("Provide --library or --all-libraries.")
     if library and all_libraries:
         raise typer.BadParameter("Use --library or --all-libraries, not both.")
+    return {
+        "base_url": base_url,
+        "token": token,
+        "library": library,
+        "all_libraries": all_libraries,
+        "output_dir": output_dir,
+        "workers": workers,
+        "max_in_flight": max_in_flight,
+        "adaptive": adaptive,
+        "min_in_flight": min_in_flight,
+        "latency_target_ms": latency_target,
+        "max_rps": max_rps,
+        "max_bandwidth": _parse_bandwidth(max_bandwidth) if max_bandwidth is not None else None,
+        "bulk_enumeration": bulk_enumeration,
+        "page_size": page_size,
+        "prefetch_pages": prefetch_pages,
+        "dedup": dedup,
+        "cache": cache,
+        "refresh_cache": refresh_cache,
+        "cache_dir": cache_dir,
+        "retries": retries,
+        "retry_delay": retry_delay,
+        "breaker_cooldown": breaker_cooldown,
+        "poster_size": ArtworkSizeRequest(
+            max_width=max_width, max_height=max_height, quality=quality
+        ),
+        "thumb_size": ArtworkSizeRequest(
+            max_width=thumb_max_width, max_height=thumb_max_height, quality=thumb_quality
+        ),
+        "fsync": fsync,
+        "metrics_out": metrics_out,
+        "image_processing": ImageProcessingRequest(
+            verify=verify_images,
+            max_width=image_max_width,
+            max_height=image_max_height,
+            format=image_format,
+            quality=image_quality,
+            strip_metadata=strip_metadata,
+        ),
+        "image_workers": image_workers,
+        "storage": storage,
+        "s3_endpoint_url": s3_endpoint_url,
+        "progress": progress,
+        "progress_out": progress_out,
+    }
+
+
+def _with_shared_options(command: Callable[..., None]) -> Callable[..., None]:
+    """Give ``command`` the options of ``_shared_options``, passed to it as ``shared``."""
+    shared = inspect.signature(_shared_options, eval_str=True).parameters
+    own = inspect.signature(command, eval_str=True).parameters
+    parameters = [
+        parameter.replace(kind=inspect.Parameter.KEYWORD_ONLY)
+        for parameter in (*shared.values(), *own.values())
+        if parameter.name != "shared"
+    ]
+
+    @functools.wraps(command)
+    def wrapper(**options: Any) -> None:
+        shared_options = {name: options.pop(name) for name in shared}
+        command(shared=_shared_options(**shared_options), **options)
+
+    # Typer reads the options from the signature and its annotations.
+    wrapper.__signature__ = inspect.Signature(parameters)  # type: ignore[attr-defined]
+    wrapper.__annotations__ = {parameter.name: parameter.annotation for parameter in parameters}
+    return wrapper
+
+
+@app.command()
+@_with_shared_options
+def download(
+    shared: dict[str, Any],
+    limit: int | None = typer.Option(None),
+    dry_run: bool = typer.Option(False),
+    estimate: bool = typer.Option(False, "--estimate"),
+    estimate_bytes: bool = typer.Option(False, "--estimate-bytes"),
+    estimate_samples: int = typer.Option(50),
+    parallel_libraries: int = typer.Option(1),
+    incremental: bool = typer.Option(False, "--incremental"),
+    since: str | None = typer.Option(None, help="ISO date/time, or an age such as 36h or 7d."),
+    changed_only: bool = typer.Option(False, "--changed-only"),
+    shard: str | None = typer.Option(None, help="Download only slice i of N, e.g. 2/4."),
+    report_out: str | None = typer.Option(None, help="Write the report as JSON Lines."),
+    resume: bool = typer.Option(False, "--resume", help="Skip what the last run recorded."),
+    retry_failed: bool = typer.Option(
+        False, "--retry-failed", help="Download only what the last run missed or failed."
+    ),
+) -> None:
+    """Download posters for a library section."""
+    from posters.repositories.schemas import PostersDownloadRequest
+
+    if resume and retry_failed:
+        raise typer.BadParameter("Use --resume or --retry-failed, not both.")
+    if shard is not None:
+        _parse_shard(shard)
     request = PostersDownloadRequest(
-        base_url=base_url,
-        token=token,
-        library=library,
-        all_libraries=all_libraries,
-        output_dir=output_dir,
+        **shared,
         limit=limit,
         dry_run=dry_run,
+        estimate=estimate or estimate_bytes,
+        estimate_bytes=estimate_bytes,
+        estimate_samples=estimate_samples,
+        parallel_libraries=parallel_libraries,
+        incremental=incremental,
+        since=_parse_since(since) if since is not None else None,
+        changed_only=changed_only,
+        shard=shard,
+        report_out=report_out,
+        resume=resume,
+        retry_failed=retry_failed,
     )
+    _run_with_events(_run_download, request)
+
+
+def _run_with_events[R: PostersDownloadRequest](
+    run: Callable[[R, TextIO], None], request: R
+) -> None:
+    """Call ``run`` with the stream for progress events, keeping stdout for them if asked."""
+    if request.progress is ProgressMode.JSONL and request.progress_out is None:
+        # stdout carries the events, so everything written for people goes to stderr.
+        events = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            run(request, events)
+    else:
+        run(request, sys.stdout)
+
+
+def _run_download(request: PostersDownloadRequest, events: TextIO) -> None:
+    from plexapi.server import PlexServer
+    from requests import RequestException
+
+    from posters.repositories.metrics import PosterMetrics
+    from posters.repositories.plex_posters import DownloadReport
+    from posters.repositories.run_journal import RunJournal
+
     plex = PlexServer(request.base_url, request.token)
-    repository = PlexPostersRepository(plex=plex)
+    metrics = PosterMetrics() if request.metrics_out else None
+    if not (request.estimate or request.dry_run):
+        _check_pack_run(request)
+    poster_storage = _open_storage(request)
+    completed = False
+    # Estimates and dry runs download nothing, so they report no progress.
+    sink = _progress_sink(request, events) if not (request.estimate or request.dry_run) else None
+    journal = (
+        RunJournal.for_output_dir(
+            Path(request.output_dir), _parse_shard(request.shard) if request.shard else None
+        )
+        if not (request.estimate or request.dry_run)
+        else None
+    )
+    repository = _poster_repository(
+        request,
+        plex,
+        libraries_at_once=request.parallel_libraries,
+        sink=sink,
+        metrics=metrics,
+        storage=poster_storage,
+        journal=journal,
+    )
     try:
+        if request.estimate:
+            library_names = _resolve_libraries(plex, request.library, request.all_libraries)
+            _print_estimates(repository, request, library_names)
+            return
         if request.dry_run:
-            targets = []
+            count = 0
+            preview: list[Path] = []
             for library_name in _resolve_libraries(plex, request.library, request.all_libraries):
                 typer.echo(f"Library: {library_name}")
-                job = PosterJob(
-                    output_dir=request.output_dir,
-                    library=library_name,
-                    base_url=request.base_url,
-                )
-                targets.extend(repository.iter_targets(job=job, limit=request.limit))
-            typer.echo(f"Dry run: {len(targets)} posters would be downloaded.")
-            for target in targets[:5]:
-                typer.echo(f"  - {target}")
-            if len(targets) > 5:
+                job = _poster_job(request, library_name)
+                for target in repository.iter_targets(job=job, limit=request.limit):
+                    count += 1
+                    if len(preview) < 5:
+                        preview.append(target)
+            typer.echo(f"Dry run: {count} posters would be downloaded.")
+            for target in preview:
+                if request.storage == "local":
+                    typer.echo(f"  - {target}")
+                else:
+                    relative = target.relative_to(request.output_dir).as_posix()
+                    typer.echo(f"  - {poster_storage.location(relative)}")
+            if count > 5:
                 typer.echo("  - ...")
             return
         report = DownloadReport(downloaded=0, skipped_404=0, missing=[])
-        for library_name in _resolve_libraries(plex, request.library, request.all_libraries):
-            typer.echo(f"Library: {library_name}")
-            job = PosterJob(
-                output_dir=request.output_dir,
-                library=library_name,
-                base_url=request.base_url,
-            )
-            library_report = repository.download_posters(job=job, limit=request.limit)
+        library_names = _resolve_libraries(plex, request.library, request.all_libraries)
+        pending = library_names
+        rating_keys: dict[str, tuple[str, ...]] = {}
+        if journal is not None and (request.resume or request.retry_failed):
+            state = _reopen_journal(journal, request.retry_failed)
+            if request.resume:
+                # Outcomes recorded before the interruption count towards this run's report.
+                report = state.report(library_names)
+                pending = [name for name in library_names if name not in state.finished]
+            else:
+                rating_keys = _retry_rating_keys(state, library_names)
+                pending = [name for name in library_names if name in rating_keys]
+            typer.echo(f"Continuing {journal.path}: {len(pending)} libraries to download.")
+        elif journal is not None:
+            journal.start(library_names)
+        for library_report in _download_libraries(repository, request, pending, rating_keys):
             report = _merge_reports(report, library_report)
+        completed = True
     except RequestException as exc:
         typer.secho(f"Request failed: {exc}", fg=typer.colors.RED)
         raise typer.Exit(code=1) from exc
+    except typer.Exit:
+        # typer.Exit is a RuntimeError; its message has been printed already.
+        raise
+    except RuntimeError as exc:
+        typer.secho(f"Configuration error: {exc}", fg=typer.colors.RED)
+        raise typer.Exit(code=1) from exc
+    finally:
+        if sink is not None:
+            sink.close()
+        if journal is not None:
+            journal.close()
+        if completed:
+            poster_storage.close()
+        else:
+            # A pack from an interrupted run would replace a complete one with part of it.
+            poster_storage.discard()
+        # Failed runs are written too; they are the ones worth looking at.
+        if metrics is not None and request.metrics_out:
+            metrics.write(Path(request.metrics_out))
+    if request.report_out:
+        _write_report_file(request, report, library_names)
+    _print_report(report, request.output_dir if request.storage == "local" else request.storage)
+    if report.failed or report.invalid:
+        # Posters that still failed after retries fail the run, so cron and CI notice.
+        raise typer.Exit(code=1)
+
+
+@app.command()
+@_with_shared_options
+def watch(
+    shared: dict[str, Any],
+    alerts: bool = typer.Option(True, "--alerts/--no-alerts", help="Listen to Plex's alerts."),
+    webhook_host: str = typer.Option("127.0.0.1"),
+    webhook_port: int | None = typer.Option(None, help="Accept Plex webhooks on this port."),
+    debounce: float = typer.Option(5.0, help="Seconds an item must be quiet before download."),
+    max_pending: int = typer.Option(10_000, help="Changed items held before senders wait."),
+    reconcile_interval: float = typer.Option(60.0, help="Minutes between sweeps; 0 disables."),
+) -> None:
+    """Download posters as Plex reports added or updated items, until interrupted."""
+    from posters.repositories.schemas import PostersWatchRequest
+
+    if not alerts and webhook_port is None:
+        raise typer.BadParameter("Listen to --alerts, or accept webhooks with --webhook-port.")
+    request = PostersWatchRequest(
+        **shared,
+        alerts=alerts,
+        webhook_host=webhook_host,
+        webhook_port=webhook_port,
+        debounce=debounce,
+        max_pending=max_pending,
+        reconcile_interval=reconcile_interval,
+    )
+    if request.storage.startswith(("tar:", "zip:")):
+        raise typer.BadParameter(
+            f"watch would replace {request.storage} with each change; use local or s3 storage."
+        )
+    _run_with_events(_run_watch, request)
+
+
+def _run_watch(request: PostersWatchRequest, events: TextIO) -> None:
+    import threading
+    from contextlib import ExitStack
+
+    from plexapi.server import PlexServer
+    from requests import RequestException
+
+    from posters.repositories.metrics import PosterMetrics
+    from posters.repositories.poster_watch import (
+        ChangeQueue,
+        PosterWatcher,
+        listen_for_alerts,
+        serve_webhooks,
+    )
+
+    try:
+        plex = PlexServer(request.base_url, request.token)
+        libraries = {
+            str(section.key): section.title
+            for section in plex.library.sections()
+            if request.all_libraries or section.title == request.library
+        }
+    except RequestException as exc:
+        typer.secho(f"Request failed: {exc}", fg=typer.colors.RED)
+        raise typer.Exit(code=1) from exc
+    if not libraries:
+        typer.secho(f"Library not found: {request.library}", fg=typer.colors.RED)
+        raise typer.Exit(code=1)
+    metrics = PosterMetrics() if request.metrics_out else None
+    with ExitStack() as stack:
+        poster_storage = _open_storage(request)
+        stack.callback(poster_storage.close)
+        sink = _progress_sink(request, events)
+        stack.callback(sink.close)
+        if metrics is not None and request.metrics_out:
+            stack.callback(metrics.write, Path(request.metrics_out))
+        # A sweep and a batch of changes can download at the same time.
+        repository = _poster_repository(
+            request, plex, libraries_at_once=2, sink=sink, metrics=metrics, storage=poster_storage
+        )
+        changes = ChangeQueue(debounce=request.debounce, max_pending=request.max_pending)
+        watcher = PosterWatcher(
+            repository=repository,
+            job=_poster_job(request, ""),
+            libraries=libraries,
+            changes=changes,
+            reconcile_interval=request.reconcile_interval * 60 or None,
+            on_report=_print_watch_report,
+            on_error=lambda name, exc: typer.secho(f"{name}: {exc}", fg=typer.colors.RED),
+        )
+        try:
+            if request.alerts:
+                stack.enter_context(
+                    listen_for_alerts(
+                        plex,
+                        changes,
+                        on_error=lambda exc: typer.secho(f"Alerts: {exc}", fg=typer.colors.RED),
+                    )
+                )
+            if request.webhook_port is not None:
+                url = stack.enter_context(
+                    serve_webhooks(changes, request.webhook_host, request.webhook_port)
+                )
+                typer.echo(f"Accepting webhooks at {url}")
+        except (RuntimeError, OSError) as exc:
+            typer.secho(f"Configuration error: {exc}", fg=typer.colors.RED)
+            raise typer.Exit(code=1) from exc
+        typer.echo(f"Watching {', '.join(libraries.values())}; press Ctrl+C to stop.")
+        try:
+            watcher.run(threading.Event())
+        except KeyboardInterrupt:
+            typer.echo("Stopped.")
+    if changes.dropped:
+        typer.secho(f"Dropped {changes.dropped} changes while full", fg=typer.colors.YELLOW)
+
+
+def _print_watch_report(library_name: str, report: DownloadReport) -> None:
+    if report.downloaded or report.skipped_404 or report.failed or report.invalid:
+        typer.echo(
+            f"{library_name}: {report.downloaded} downloaded, {report.unchanged} unchanged, "
+            f"{report.skipped_404} missing, {len(report.failed)} failed"
+        )
+
+
+@app.command("merge-reports")
+def merge_reports(
+    reports: list[Path] = typer.Argument(..., exists=True, dir_okay=False),
+    out: Path | None = typer.Option(None, help="Also write the merged report to this file."),
+) -> None:
+    """Combine reports written with --report-out, e.g. by the shards of one sync."""
+    from posters.repositories.plex_posters import DownloadReport
+    from posters.repositories.report_files import ReportFile, read_report, write_report
+
+    merged = DownloadReport(downloaded=0, skipped_404=0, missing=[])
+    libraries: dict[str, None] = {}
+    shards: list[Shard] = []
+    output_dirs: dict[str, None] = {}
+    for path in reports:
+        try:
+            report_file = read_report(path)
+        except ValueError as exc:
+            typer.secho(str(exc), fg=typer.colors.RED)
+            raise typer.Exit(code=1) from exc
+        merged = _merge_reports(merged, report_file.report)
+        libraries.update(dict.fromkeys(report_file.libraries))
+        output_dirs.update(dict.fromkeys([report_file.output_dir]))
+        if report_file.shard is not None:
+            shards.append(report_file.shard)
+    _check_shards(shards)
+    if out is not None:
+        output_dir = next(iter(output_dirs))
+        write_report(
+            out, ReportFile(report=merged, output_dir=output_dir, libraries=tuple(libraries))
+        )
+    _print_report(merged, ", ".join(output_dirs))
+
+
+def _check_shards(shards: list[Shard]) -> None:
+    """Warn when the merged reports are not exactly one of each shard of a single split."""
+    if not shards:
+        return
+    counts = {shard.count for shard in shards}
+    if len(counts) > 1:
+        typer.secho(
+            f"Reports come from different splits: {', '.join(map(str, shards))}",
+            fg=typer.colors.YELLOW,
+        )
+        return
+    (count,) = counts
+    indexes = [shard.index for shard in shards]
+    missing = [f"{index}/{count}" for index in range(1, count + 1) if index not in indexes]
+    repeated = sorted({f"{index}/{count}" for index in indexes if indexes.count(index) > 1})
+    if missing:
+        typer.secho(f"Missing shard reports: {', '.join(missing)}", fg=typer.colors.YELLOW)
+    if repeated:
+        typer.secho(f"Shard reports repeated: {', '.join(repeated)}", fg=typer.colors.YELLOW)
+
+
+def _write_report_file(
+    request: PostersDownloadRequest, report: DownloadReport, library_names: list[str]
+) -> None:
+    from posters.repositories.report_files import ReportFile, write_report
+
+    write_report(
+        Path(request.report_out or ""),
+        ReportFile(
+            report=report,
+            output_dir=request.output_dir,
+            libraries=tuple(library_names),
+            shard=_parse_shard(request.shard) if request.shard else None,
+        ),
+    )
+
+
+def _open_storage(request: PostersDownloadRequest) -> PosterStorage:
+    from posters.repositories.poster_storage import open_storage
+
+    try:
+        return open_storage(request.storage, Path(request.output_dir), request.s3_endpoint_url)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
     except RuntimeError as exc:
         typer.secho(f"Configuration error: {exc}", fg=typer.colors.RED)
         raise typer.Exit(code=1) from exc
-    _print_report(report, request.output_dir)
+
+
+def _check_pack_run(request: PostersDownloadRequest) -> None:
+    """Packs are replaced whole, so runs into them must download every poster."""
+    if not request.storage.startswith(("tar:", "zip:")):
+        return
+    partial = [
+        option
+        for option, used in (
+            ("--limit", request.limit is not None),
+            ("--incremental", request.incremental),
+            ("--since", request.since is not None),
+            ("--changed-only", request.changed_only),
+            ("--shard", request.shard is not None),
+            ("--resume", request.resume),
+            ("--retry-failed", request.retry_failed),
+        )
+        if used
+    ]
+    if partial:
+        raise typer.BadParameter(
+            f"{', '.join(partial)} would replace {request.storage} with part of the library; "
+            "use local or s3 storage."
+        )
+
+
+def _parse_shard(value: str) -> Shard:
+    try:
+        return Shard.parse(value)
+    except ValueError as exc:
+        raise typer.BadParameter(f"Invalid --shard {value!r}: {exc}") from exc
+
+
+def _download_libraries(
+    repository: PlexPostersRepository,
+    request: PostersDownloadRequest,
+    library_names: list[str],
+    rating_keys: Mapping[str, tuple[str, ...]] | None = None,
+) -> Iterator[DownloadReport]:
+    """Download each library, up to ``parallel_libraries`` at once; reports keep their order.
+
+    Libraries in ``rating_keys`` are limited to those items, when any are given.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from posters.repositories.plex_posters import DownloadStopped
+
+    def download_library(library_name: str) -> DownloadReport:
+        typer.echo(f"Library: {library_name}")
+        job = _poster_job(request, library_name)
+        if rating_keys and rating_keys.get(library_name):
+            job = replace(job, rating_keys=rating_keys[library_name])
+        report = repository.download_posters(job=job, limit=request.limit)
+        if request.parallel_libraries > 1:
+            typer.echo(
+                f"Finished {library_name}: {report.downloaded} downloaded, "
+                f"{report.skipped_404} missing, {len(report.failed)} failed"
+            )
+        return report
+
+    if request.parallel_libraries == 1 or len(library_names) == 1:
+        yield from map(download_library, library_names)
+        return
+    executor = ThreadPoolExecutor(
+        max_workers=request.parallel_libraries, thread_name_prefix="library"
+    )
+
+    def stop_on_failure(future: Future[DownloadReport]) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            # Libraries still running stop at their next poster instead of finishing first.
+            repository.stop.set()
+
+    try:
+        futures = [executor.submit(download_library, name) for name in library_names]
+        for future in futures:
+            future.add_done_callback(stop_on_failure)
+        for future in futures:
+            error = future.exception()
+            if isinstance(error, DownloadStopped):
+                error = _first_failure(futures, error)
+            if error is not None:
+                # Libraries not started yet are cancelled below.
+                raise error
+            yield future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _first_failure(futures: list[Future[DownloadReport]], stopped: BaseException) -> BaseException:
+    """The failure that stopped the other libraries, once every started library has ended."""
+    from concurrent.futures import wait
+
+    from posters.repositories.plex_posters import DownloadStopped
+
+    for future in futures:
+        future.cancel()
+    wait(futures)
+    for future in futures:
+        if future.cancelled():
+            continue
+        error = future.exception()
+        if error is not None and not isinstance(error, DownloadStopped):
+            return error
+    return stopped
+
+
+def _reopen_journal(journal: RunJournal, retry_failed: bool) -> JournalState:
+    flag = "--retry-failed" if retry_failed else "--resume"
+    try:
+        return journal.reopen(retry_failed=retry_failed)
+    except FileNotFoundError as exc:
+        typer.secho(f"No journal to continue with {flag}: {journal.path}", fg=typer.colors.RED)
+        raise typer.Exit(code=1) from exc
+    except ValueError as exc:
+        typer.secho(f"Cannot continue with {flag}: {exc}", fg=typer.colors.RED)
+        raise typer.Exit(code=1) from exc
+
+
+def _retry_rating_keys(state: JournalState, library_names: list[str]) -> dict[str, tuple[str, ...]]:
+    """Items to fetch again per library with something to retry.
+
+    Libraries whose assets to retry include one without a rating key are listed in full,
+    with an empty tuple; the journal then picks the assets to download from the listing.
+    """
+    keys: dict[str, tuple[str, ...]] = {}
+    for library_name in library_names:
+        retry = state.retry_keys(library_name)
+        if not retry:
+            continue
+        if any(rating_key is None for rating_key in retry.values()):
+            keys[library_name] = ()
+        else:
+            keys[library_name] = tuple(sorted({key for key in retry.values() if key}))
+    return keys
+
+
+def _print_estimates(
+    repository: PlexPostersRepository, request: PostersDownloadRequest, library_names: list[str]
+) -> None:
+    """Print expected poster counts from section totals, and a transfer projection if asked."""
+    estimates: list[PosterEstimate] = []
+    for library_name in library_names:
+        job = _poster_job(request, library_name)
+        samples = request.estimate_samples if request.estimate_bytes else 0
+        estimate = repository.estimate_posters(job=job, samples=samples)
+        counts = ", ".join(f"{kind}: {count}" for kind, count in estimate.counts.items())
+        typer.echo(f"Library: {library_name} ({counts})")
+        estimates.append(estimate)
+    total = sum(estimate.total for estimate in estimates)
+    typer.echo(f"Estimate: up to {total} posters (section totals; no items were listed).")
+    if request.limit is not None and total > request.limit:
+        typer.echo(f"  --limit stops the run after {request.limit}.")
+    if not request.estimate_bytes:
+        return
+    sampled = [estimate for estimate in estimates if estimate.sampled]
+    if not sampled:
+        typer.secho("No artwork could be sampled; transfer size unknown.", fg=typer.colors.YELLOW)
+        return
+    projected_bytes = sum(estimate.projected_bytes or 0 for estimate in sampled)
+    seconds = sum(estimate.projected_seconds(request.workers) or 0.0 for estimate in sampled)
+    probes = sum(estimate.sampled for estimate in sampled)
+    typer.echo(
+        f"Projected transfer: {projected_bytes / (1024 * 1024):.1f} MiB "
+        f"from {probes} sampled posters, about {seconds:.0f}s of requests "
+        f"at {request.workers} workers"
+    )
+
+
+def _parse_bandwidth(value: str) -> int:
+    """Bytes per second from ``20M``, ``512K``, ``1.5MiB/s`` and the like (binary units)."""
+    match = _BANDWIDTH.match(value.strip())
+    if match is None or float(match.group("amount")) <= 0:
+        raise typer.BadParameter(f"Invalid --max-bandwidth {value!r}; use e.g. 512K or 20M.")
+    return int(float(match.group("amount")) * _BANDWIDTH_UNITS[match.group("unit").lower()])
+
+
+def _poster_repository(
+    request: PostersDownloadRequest,
+    plex: PlexServer,
+    *,
+    libraries_at_once: int,
+    sink: ProgressSink | None,
+    metrics: PosterMetrics | None,
+    storage: PosterStorage,
+    journal: RunJournal | None = None,
+) -> PlexPostersRepository:
+    from posters.repositories.limits import TokenBucket
+    from posters.repositories.plex_posters import PlexPostersRepository
+    from posters.repositories.retry import CircuitBreaker, RetryPolicy
+
+    return PlexPostersRepository(
+        plex=plex,
+        cache=_poster_cache(request),
+        retry=RetryPolicy(attempts=request.retries, base_delay=request.retry_delay)
+        if request.retries
+        else None,
+        breaker=CircuitBreaker(cooldown=request.breaker_cooldown)
+        if request.breaker_cooldown
+        else None,
+        metrics=metrics,
+        # Each library lists a page and its prefetched pages next to its download workers.
+        limit=_concurrency_limit(
+            request,
+            request.max_in_flight
+            or request.workers + libraries_at_once * (1 + request.prefetch_pages),
+            sink,
+        ),
+        page_size=request.page_size,
+        prefetch_pages=request.prefetch_pages,
+        storage=storage,
+        request_rate=TokenBucket(request.max_rps) if request.max_rps else None,
+        bandwidth=TokenBucket(request.max_bandwidth) if request.max_bandwidth else None,
+        progress=sink,
+        journal=journal,
+    )
+
+
+def _concurrency_limit(
+    request: PostersDownloadRequest, maximum: int, sink: ProgressSink | None
+) -> ConcurrencyLimit | AdaptiveLimit:
+    from posters.repositories.limits import AdaptiveLimit, ConcurrencyLimit
+
+    if not request.adaptive:
+        return ConcurrencyLimit(maximum)
+    if request.min_in_flight > maximum:
+        raise typer.BadParameter(
+            f"--min-in-flight {request.min_in_flight} is above --max-in-flight {maximum}."
+        )
+    latency_target = request.latency_target_ms
+    return AdaptiveLimit(
+        minimum=request.min_in_flight,
+        maximum=maximum,
+        latency_target=latency_target / 1000 if latency_target is not None else None,
+        # Reported with the progress, so a change in throughput comes with its cause.
+        on_change=lambda change: sink.message(str(change)) if sink is not None else None,
+    )
+
+
+def _progress_sink(request: PostersDownloadRequest, stdout: TextIO) -> ProgressSink:
+    from posters.repositories.progress import BarProgress, JsonlProgress, SilentProgress
+
+    if request.progress is ProgressMode.BAR:
+        return BarProgress()
+    if request.progress is ProgressMode.JSONL:
+        if request.progress_out is None:
+            return JsonlProgress(stdout, close_stream=False)
+        return JsonlProgress(Path(request.progress_out).open("a", encoding="utf-8"))
+    return SilentProgress()
+
+
+def _parse_since(value: str) -> datetime:
+    """An ISO date or date-time (UTC unless it has an offset), or an age like ``36h``."""
+    match = _RELATIVE_SINCE.match(value.strip())
+    if match is not None:
+        age = timedelta(**{_SINCE_UNITS[match.group("unit")]: int(match.group("amount"))})
+        return datetime.now(UTC) - age
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError as exc:
+        raise typer.BadParameter(
+            f"Invalid --since {value!r}; use an ISO date/time or an age such as 36h or 7d."
+        ) from exc
+    return moment if moment.tzinfo is not None else moment.replace(tzinfo=UTC)
+
+
+def _poster_cache(request: PostersDownloadRequest) -> PosterCache | None:
+    from posters.repositories.poster_cache import PosterCache, default_cache_dir
+
+    if not request.cache:
+        return None
+    cache_dir = Path(request.cache_dir) if request.cache_dir else default_cache_dir()
+    return PosterCache(path=cache_dir / "posters.sqlite3", refresh=request.refresh_cache)
+
+
+def _poster_job(request: PostersDownloadRequest, library_name: str) -> PosterJob:
+    return PosterJob(
+        output_dir=request.output_dir,
+        library=library_name,
+        base_url=request.base_url,
+        workers=request.workers,
+        bulk_enumeration=request.bulk_enumeration,
+        incremental=request.incremental,
+        since=request.since,
+        changed_only=request.changed_only,
+        shard=_parse_shard(request.shard) if request.shard else None,
+        dedup=request.dedup,
+        poster_size=_artwork_size(request.poster_size),
+        thumb_size=_artwork_size(request.thumb_size),
+        fsync=request.fsync,
+        processing=_image_processing(request.image_processing),
+        image_workers=_image_workers(request),
+    )
+
+
+def _image_workers(request: PostersDownloadRequest) -> int | None:
+    """Processes per library; by default the CPUs are shared by libraries run together."""
+    if request.image_workers is not None or request.parallel_libraries == 1:
+        return request.image_workers
+    return max(1, (os.cpu_count() or 1) // request.parallel_libraries)
+
+
+def _image_processing(request: ImageProcessingRequest) -> ImageProcessing | None:
+    processing = ImageProcessing(
+        max_width=request.max_width,
+        max_height=request.max_height,
+        format=request.format,
+        quality=request.quality,
+        strip_metadata=request.strip_metadata,
+    )
+    # Any rewrite implies decoding, so --verify-images only matters on its own.
+    if not request.verify and not processing.rewrites:
+        return None
+    return processing
+
+
+def _artwork_size(request: ArtworkSizeRequest) -> ArtworkSize | None:
+    if request.max_width is None and request.max_height is None and request.quality is None:
+        return None
+    return ArtworkSize(
+        max_width=request.max_width, max_height=request.max_height, quality=request.quality
+    )
 
 
 def _print_report(report: DownloadReport, output_dir: str) -> None:
     typer.echo(f"Downloaded {report.downloaded} posters to {output_dir}")
-    if report.skipped_404 == 0:
-        return
-    typer.secho(f"Skipped {report.skipped_404} posters (404)", fg=typer.colors.YELLOW)
-    typer.echo("Missing posters:")
+    if report.unchanged:
+        typer.echo(f"Unchanged {report.unchanged} posters (already up to date)")
+    if report.asset_name_hits:
+        typer.echo(
+            f"Asset names: {report.asset_name_hits} cache hits, {report.asset_name_misses} misses"
+        )
+    if report.deduplicated:
+        ratio = report.deduplicated / max(report.downloaded, 1)
+        typer.echo(
+            f"Deduplicated {report.deduplicated} posters ({ratio:.1%}), "
+            f"saved {report.bytes_saved / (1024 * 1024):.1f} MiB"
+        )
+    if report.skipped_404:
+        typer.secho(f"Skipped {report.skipped_404} posters (404)", fg=typer.colors.YELLOW)
+        typer.echo("Missing posters:")
+        _print_assets(report.missing)
+    if report.invalid:
+        typer.secho(
+            f"Removed {len(report.invalid)} posters that failed to decode", fg=typer.colors.YELLOW
+        )
+        typer.echo("Invalid posters:")
+        _print_assets(report.invalid)
+    if report.failed:
+        typer.secho(f"Failed {len(report.failed)} posters after retries", fg=typer.colors.RED)
+        typer.echo("Failed posters:")
+        _print_assets(report.failed)
+
+
+def _print_assets(assets: Iterable[PosterAsset]) -> None:
     typer.echo("Title | URL")
     typer.echo("--- | ---")
-    for asset in report.missing:
+    for asset in assets:
         typer.echo(f"{asset.title} | {asset.url}")
 
 
 def _merge_reports(left: DownloadReport, right: DownloadReport) -> DownloadReport:
+    from posters.repositories.asset_log import AssetChain
+    from posters.repositories.plex_posters import DownloadReport
+
     return DownloadReport(
         downloaded=left.downloaded + right.downloaded,
         skipped_404=left.skipped_404 + right.skipped_404,
-        missing=[*left.missing, *right.missing],
+        missing=AssetChain(left.missing, right.missing),
+        unchanged=left.unchanged + right.unchanged,
+        deduplicated=left.deduplicated + right.deduplicated,
+        bytes_saved=left.bytes_saved + right.bytes_saved,
+        failed=AssetChain(left.failed, right.failed),
+        asset_name_hits=left.asset_name_hits + right.asset_name_hits,
+        asset_name_misses=left.asset_name_misses + right.asset_name_misses,
+        invalid=AssetChain(left.invalid, right.invalid),
     )
 
 
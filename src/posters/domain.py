@@ -1,6 +1,100 @@
 """Posters domain objects."""
 
+import sys
+import zlib
 from dataclasses import dataclass
+from datetime import datetime
+from enum import StrEnum
+
+
+class FsyncPolicy(StrEnum):
+    """When downloads are flushed to stable storage before being renamed into place."""
+
+    NONE = "none"
+    FILE = "file"
+    DIRECTORY = "directory"
+
+
+class ProgressMode(StrEnum):
+    """How a download run reports progress."""
+
+    NONE = "none"
+    BAR = "bar"
+    JSONL = "jsonl"
+
+
+@dataclass(frozen=True)
+class ArtworkSize:
+    """Bounding box (and JPEG quality) for artwork resized by the Plex photo transcoder."""
+
+    max_width: int | None = None
+    max_height: int | None = None
+    quality: int | None = None
+
+
+class ImageFormat(StrEnum):
+    JPEG = "jpeg"
+    WEBP = "webp"
+
+
+@dataclass(frozen=True)
+class ImageProcessing:
+    """Local checks and rewrites applied to every downloaded poster (needs Pillow).
+
+    Each file is decoded in full; it is only rewritten when a box, format, quality or
+    metadata stripping is configured.
+    """
+
+    max_width: int | None = None
+    max_height: int | None = None
+    format: ImageFormat | None = None
+    quality: int | None = None
+    strip_metadata: bool = False
+
+    @property
+    def rewrites(self) -> bool:
+        return (
+            self.max_width is not None
+            or self.max_height is not None
+            or self.format is not None
+            or self.quality is not None
+            or self.strip_metadata
+        )
+
+    @property
+    def suffix(self) -> str:
+        return ".webp" if self.format is ImageFormat.WEBP else ".jpg"
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Slice ``index`` (1-based) of ``count`` for splitting a sync across processes or hosts.
+
+    Assets are assigned by asset folder name, so a show's seasons and episodes, and items
+    sharing a folder, always land in the same slice and no two slices write the same folder.
+    """
+
+    index: int
+    count: int
+
+    def __post_init__(self) -> None:
+        if not 1 <= self.index <= self.count:
+            raise ValueError(f"Shard index must be between 1 and {self.count}, not {self.index}.")
+
+    @classmethod
+    def parse(cls, value: str) -> "Shard":
+        """Parse ``"i/N"``."""
+        index, separator, count = value.partition("/")
+        if not separator or not index.strip().isdigit() or not count.strip().isdigit():
+            raise ValueError(f"Expected a shard like 1/4, not {value!r}.")
+        return cls(index=int(index), count=int(count))
+
+    def includes(self, asset_name: str) -> bool:
+        # crc32 rather than hash(), which is salted per process.
+        return zlib.crc32(asset_name.encode()) % self.count == self.index - 1
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
 
 
 @dataclass(frozen=True)
@@ -8,3 +102,58 @@ class PosterJob:
     output_dir: str
     library: str
     base_url: str
+    workers: int = 1
+    bulk_enumeration: bool = False
+    incremental: bool = False
+    dedup: bool = False
+    poster_size: ArtworkSize | None = None
+    thumb_size: ArtworkSize | None = None
+    fsync: FsyncPolicy = FsyncPolicy.NONE
+    processing: ImageProcessing | None = None
+    image_workers: int | None = None
+    # List only items added or updated after ``since``, or after the library's watermark.
+    since: datetime | None = None
+    changed_only: bool = False
+    shard: Shard | None = None
+    # Only these items (seasons and episodes stand for their show); set by `posters watch`.
+    rating_keys: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class LibraryChange:
+    """An item Plex reported as added or updated, keyed by section and rating key."""
+
+    section_id: str
+    rating_key: str
+
+
+@dataclass(frozen=True, slots=True)
+class PosterAsset:
+    """A poster to download.
+
+    ``name`` is the item's title, or the show's for seasons and episodes; the display
+    ``title`` is derived from it on demand instead of being stored per episode.
+    """
+
+    name: str
+    url: str
+    asset_name: str
+    kind: str
+    season: int | None = None
+    episode: int | None = None
+    rating_key: str | None = None
+
+    def __post_init__(self) -> None:
+        # Every season and episode of a show repeats these strings; keep a single copy.
+        object.__setattr__(self, "asset_name", sys.intern(self.asset_name))
+        object.__setattr__(self, "kind", sys.intern(self.kind))
+        if self.kind in ("season", "episode"):
+            object.__setattr__(self, "name", sys.intern(self.name))
+
+    @property
+    def title(self) -> str:
+        if self.kind == "season" and self.season is not None:
+            return f"{self.name} Season {self.season}"
+        if self.kind == "episode" and self.season is not None and self.episode is not None:
+            return f"{self.name} S{self.season:02d}E{self.episode:02d}"
+        return self.name
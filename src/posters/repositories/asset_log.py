@@ -0,0 +1,147 @@
+"""Append-only asset collections for download reports that may outgrow memory."""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+import threading
+import weakref
+from collections.abc import Collection, Iterator
+from dataclasses import astuple
+from operator import itemgetter
+from pathlib import Path
+
+from posters.domain import PosterAsset
+
+DEFAULT_MAX_IN_MEMORY = 10_000
+
+_BATCH_SIZE = 1000
+_SCHEMA = """
+CREATE TABLE assets (
+    position INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    url TEXT NOT NULL,
+    asset_name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    season INTEGER,
+    episode INTEGER,
+    rating_key TEXT
+);
+"""
+
+
+class AssetLog(Collection[PosterAsset]):
+    """Assets recorded under their enumeration index and iterated in index order.
+
+    Up to ``max_in_memory`` assets are kept in a list; past that they spill to a temporary
+    SQLite file (readable only by the current user), removed when the log is collected.
+    """
+
+    def __init__(
+        self, max_in_memory: int = DEFAULT_MAX_IN_MEMORY, spill_dir: Path | None = None
+    ) -> None:
+        self.max_in_memory = max_in_memory
+        self.spill_dir = spill_dir
+        self._pending: list[tuple[int, PosterAsset]] = []
+        self._spilled = 0
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def add(self, index: int, asset: PosterAsset) -> None:
+        with self._lock:
+            self._pending.append((index, asset))
+            if self._connection is not None and len(self._pending) >= _BATCH_SIZE:
+                self._flush()
+            elif self._connection is None and len(self._pending) > self.max_in_memory:
+                self._spill()
+                self._flush()
+
+    @property
+    def spilled(self) -> bool:
+        return self._connection is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._spilled + len(self._pending)
+
+    def __contains__(self, asset: object) -> bool:
+        return any(asset == candidate for candidate in self)
+
+    def __iter__(self) -> Iterator[PosterAsset]:
+        with self._lock:
+            if self._connection is None:
+                pending = sorted(self._pending, key=itemgetter(0))
+                return iter([asset for _, asset in pending])
+            self._flush()
+            return self._iter_spilled(self._connection)
+
+    def __repr__(self) -> str:
+        return f"AssetLog(len={len(self)}, spilled={self.spilled})"
+
+    def _iter_spilled(self, connection: sqlite3.Connection) -> Iterator[PosterAsset]:
+        # Keyed batches, so neither the rows nor an open cursor outlive a single step.
+        position = -1
+        while True:
+            with self._lock:
+                rows = connection.execute(
+                    "SELECT * FROM assets WHERE position > ? ORDER BY position LIMIT ?",
+                    (position, _BATCH_SIZE),
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield PosterAsset(*row[1:])
+            position = rows[-1][0]
+
+    def _spill(self) -> None:
+        descriptor, path = tempfile.mkstemp(
+            prefix="posters-", suffix=".sqlite3", dir=self.spill_dir
+        )
+        os.close(descriptor)
+        connection = sqlite3.connect(path, check_same_thread=False)
+        connection.executescript(_SCHEMA)
+        self._connection = connection
+        weakref.finalize(self, _discard, connection, path)
+
+    def _flush(self) -> None:
+        connection = self._connection
+        if connection is None or not self._pending:
+            return
+        with connection:
+            connection.executemany(
+                "INSERT INTO assets VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(index, *astuple(asset)) for index, asset in self._pending],
+            )
+        self._spilled += len(self._pending)
+        self._pending = []
+
+
+class AssetChain(Collection[PosterAsset]):
+    """Several asset collections iterated one after another, without copying them."""
+
+    def __init__(self, *parts: Collection[PosterAsset]) -> None:
+        self._parts: list[Collection[PosterAsset]] = []
+        for part in parts:
+            if isinstance(part, AssetChain):
+                self._parts.extend(part._parts)
+            elif part:
+                self._parts.append(part)
+
+    def __len__(self) -> int:
+        return sum(len(part) for part in self._parts)
+
+    def __contains__(self, asset: object) -> bool:
+        return any(asset in part for part in self._parts)
+
+    def __iter__(self) -> Iterator[PosterAsset]:
+        for part in self._parts:
+            yield from part
+
+    def __repr__(self) -> str:
+        return f"AssetChain(len={len(self)}, parts={len(self._parts)})"
+
+
+def _discard(connection: sqlite3.Connection, path: str) -> None:
+    connection.close()
+    Path(path).unlink(missing_ok=True)
@@ -0,0 +1,63 @@
+"""Content-addressed store that deduplicates identical poster files with hardlinks."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from posters.repositories.poster_manifest import STATE_DIR
+
+
+@dataclass
+class ContentStore:
+    """Objects named by SHA-256 digest; asset paths are hardlinks to them.
+
+    When the filesystem refuses hardlinks (e.g. some network shares), the object is copied
+    instead, which keeps the asset tree correct but saves no space.
+    """
+
+    root: Path
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @classmethod
+    def in_output_dir(cls, output_dir: Path) -> ContentStore:
+        return cls(root=output_dir / STATE_DIR / "objects")
+
+    def absorb(self, target: Path, digest: str) -> bool:
+        """Move a freshly written file into the store.
+
+        Returns True when the content was already stored and the target now shares it.
+        """
+        stored = self.root / digest[:2] / f"{digest}{target.suffix}"
+        with self._lock:
+            if not stored.exists():
+                stored.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    _link_or_copy(target, stored)
+                    return False
+                except FileExistsError:
+                    # Stored meanwhile by another library's store sharing this directory.
+                    pass
+        if os.path.samefile(stored, target):
+            return False
+        staged = target.with_name(f".{target.name}.link")
+        staged.unlink(missing_ok=True)
+        try:
+            os.link(stored, staged)
+        except OSError:
+            # Without hardlinks the freshly written target already is the copy.
+            return False
+        os.replace(staged, target)
+        return True
+
+
+def _link_or_copy(source: Path, destination: Path) -> None:
+    try:
+        os.link(source, destination)
+    except FileExistsError:
+        raise
+    except OSError:
+        shutil.copyfile(source, destination)
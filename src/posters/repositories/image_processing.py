@@ -0,0 +1,140 @@
+"""Post-download image checks and rewrites, run in worker processes.
+
+Needs Pillow (the ``images`` extra). It is imported in the workers, so the download side
+only checks that it is installed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import multiprocessing
+import os
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from posters.domain import ImageFormat, ImageProcessing
+
+if TYPE_CHECKING:
+    from PIL.Image import Image
+
+DEFAULT_QUALITY = 90
+
+# Files handed to the pool per worker process before the download loop waits for results.
+_BACKLOG_PER_WORKER = 4
+
+
+@dataclass(frozen=True)
+class ProcessedImage:
+    valid: bool
+    size: int = 0
+    digest: str | None = None
+    seconds: float = 0.0
+    error: str | None = None
+
+
+def process_image(path: str, options: ImageProcessing, digest: bool = False) -> ProcessedImage:
+    """Decode ``path`` in full and rewrite it in place if ``options`` ask for it.
+
+    Files that fail to decode are left alone and reported as invalid; errors while writing
+    the rewritten file propagate.
+    """
+    from PIL import Image
+
+    started = time.perf_counter()
+    try:
+        with Image.open(path) as image:
+            # load() decodes every pixel, so truncated data is caught too.
+            image.load()
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as exc:
+        seconds = time.perf_counter() - started
+        return ProcessedImage(valid=False, seconds=seconds, error=str(exc) or type(exc).__name__)
+    if options.rewrites:
+        _rewrite(image, path, options)
+    size, hexdigest = _file_stats(path, digest)
+    return ProcessedImage(
+        valid=True, size=size, digest=hexdigest, seconds=time.perf_counter() - started
+    )
+
+
+class ImagePipeline[T]:
+    """Hands downloaded files to a process pool and returns the results in submission order.
+
+    At most a few files per worker are pending; past that ``completed`` waits for the oldest,
+    so a slow pool holds the download loop back instead of queueing the whole library.
+    """
+
+    def __init__(
+        self, options: ImageProcessing, workers: int | None = None, digest: bool = False
+    ) -> None:
+        if importlib.util.find_spec("PIL") is None:
+            raise RuntimeError("Image processing needs Pillow: pip install 'plex-metadata[images]'")
+        self.options = options
+        self.digest = digest
+        workers = workers or os.cpu_count() or 1
+        self.backlog = workers * _BACKLOG_PER_WORKER
+        # spawn, since forking a process that runs download threads is unsafe.
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self._pending: deque[tuple[T, Future[ProcessedImage]]] = deque()
+
+    def submit(self, item: T, path: Path) -> None:
+        future = self._executor.submit(process_image, str(path), self.options, self.digest)
+        self._pending.append((item, future))
+
+    def completed(self) -> Iterator[tuple[T, ProcessedImage]]:
+        """Results ready so far, waiting for the oldest ones while over the backlog."""
+        pending = self._pending
+        while pending and (len(pending) > self.backlog or pending[0][1].done()):
+            item, future = pending.popleft()
+            yield item, future.result()
+
+    def drain(self) -> Iterator[tuple[T, ProcessedImage]]:
+        while self._pending:
+            item, future = self._pending.popleft()
+            yield item, future.result()
+
+    def close(self) -> None:
+        self._pending.clear()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _rewrite(image: Image, path: str, options: ImageProcessing) -> None:
+    from PIL import Image
+
+    image_format = options.format.upper() if options.format else image.format or "JPEG"
+    if options.max_width is not None or options.max_height is not None:
+        # Keeps the aspect ratio and never enlarges.
+        image.thumbnail(
+            (options.max_width or image.width, options.max_height or image.height),
+            Image.Resampling.LANCZOS,
+        )
+    if image_format == ImageFormat.JPEG.upper() and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    # The ICC profile stays either way: dropping it would shift colours.
+    keys = ("icc_profile",) if options.strip_metadata else ("icc_profile", "exif", "xmp", "comment")
+    params: dict[str, object] = {key: image.info[key] for key in keys if key in image.info}
+    if options.strip_metadata:
+        # The JPEG encoder would otherwise copy the source's comment.
+        params["comment"] = b""
+    temp_path = f"{path}.processing"
+    image.save(temp_path, format=image_format, quality=options.quality or DEFAULT_QUALITY, **params)
+    os.replace(temp_path, path)
+
+
+def _file_stats(path: str, digest: bool) -> tuple[int, str | None]:
+    if not digest:
+        return os.stat(path).st_size, None
+    hasher = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            hasher.update(block)
+            size += len(block)
+    return size, hasher.hexdigest()
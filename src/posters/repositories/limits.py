@@ -0,0 +1,186 @@
+"""Limits on how hard a run may hit the Plex server."""
+
+from __future__ import annotations
+
+import statistics
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ConcurrencyLimit:
+    """Caps requests in flight across every library and worker sharing this instance."""
+
+    limit: int
+    _slots: threading.BoundedSemaphore = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.limit < 1:
+            raise ValueError("Concurrency limit must be at least 1.")
+        self._slots = threading.BoundedSemaphore(self.limit)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self._slots:
+            yield
+
+    @property
+    def maximum(self) -> int:
+        """A fixed limit never grows past itself."""
+        return self.limit
+
+    def observe(self, seconds: float, failed: bool) -> None:
+        """A fixed limit ignores how requests went."""
+
+
+@dataclass(frozen=True)
+class LimitChange:
+    """One decision of an ``AdaptiveLimit``, and what prompted it."""
+
+    previous: int
+    limit: int
+    reason: str
+
+    def __str__(self) -> str:
+        return f"Concurrency {self.previous} -> {self.limit} ({self.reason})"
+
+
+@dataclass
+class AdaptiveLimit:
+    """A concurrency limit between ``minimum`` and ``maximum`` that follows the server (AIMD).
+
+    Requests report their latency (to the response headers) and whether they failed with a
+    transient error. Every window of about ``limit`` observations is judged: when the error
+    rate exceeds ``error_threshold`` or the median latency exceeds ``latency_target``, the
+    limit is multiplied by ``decrease``; otherwise, if the window used every slot, it grows
+    by one. Without a ``latency_target``, ``tolerance`` times the lowest median seen is
+    the target. ``on_change`` is called (outside the lock) whenever the limit moves.
+    """
+
+    minimum: int
+    maximum: int
+    latency_target: float | None = None
+    tolerance: float = 2.0
+    error_threshold: float = 0.05
+    decrease: float = 0.5
+    min_window: int = 4
+    on_change: Callable[[LimitChange], None] = lambda change: None
+    _limit: float = field(init=False, repr=False)
+    _in_flight: int = field(default=0, init=False, repr=False)
+    _peak: int = field(default=0, init=False, repr=False)
+    _baseline: float | None = field(default=None, init=False, repr=False)
+    _latencies: list[float] = field(default_factory=list, init=False, repr=False)
+    _failures: int = field(default=0, init=False, repr=False)
+    _condition: threading.Condition = field(
+        default_factory=threading.Condition, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        if not 1 <= self.minimum <= self.maximum:
+            raise ValueError("Adaptive limits need 1 <= minimum <= maximum.")
+        if not 0 < self.decrease < 1:
+            raise ValueError("The decrease factor must be between 0 and 1.")
+        # Start low and earn concurrency, rather than start high on a busy server.
+        self._limit = float(self.minimum)
+
+    @property
+    def limit(self) -> int:
+        with self._condition:
+            return int(self._limit)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self._condition:
+            self._condition.wait_for(lambda: self._in_flight < int(self._limit))
+            self._in_flight += 1
+            self._peak = max(self._peak, self._in_flight)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify()
+
+    def observe(self, seconds: float, failed: bool) -> None:
+        with self._condition:
+            if failed:
+                self._failures += 1
+            else:
+                self._latencies.append(seconds)
+            if self._failures + len(self._latencies) < max(int(self._limit), self.min_window):
+                return
+            change = self._judge_window()
+            self._condition.notify_all()
+        if change is not None:
+            self.on_change(change)
+
+    def _judge_window(self) -> LimitChange | None:
+        total = self._failures + len(self._latencies)
+        error_rate = self._failures / total
+        median = statistics.median(self._latencies) if self._latencies else None
+        if median is not None:
+            self._baseline = median if self._baseline is None else min(self._baseline, median)
+        target = self.latency_target
+        if target is None and self._baseline is not None:
+            target = self._baseline * self.tolerance
+        saturated = self._peak >= int(self._limit)
+        self._latencies.clear()
+        self._failures = 0
+        self._peak = self._in_flight
+
+        previous = int(self._limit)
+        if error_rate > self.error_threshold:
+            reason = f"errors {error_rate:.0%} > {self.error_threshold:.0%}"
+            self._limit = max(float(self.minimum), self._limit * self.decrease)
+        elif median is not None and target is not None and median > target:
+            reason = f"latency {median * 1000:.0f} ms > {target * 1000:.0f} ms"
+            self._limit = max(float(self.minimum), self._limit * self.decrease)
+        elif saturated:
+            reason = "healthy and saturated"
+            self._limit = min(float(self.maximum), self._limit + 1)
+        else:
+            return None
+        if int(self._limit) == previous:
+            return None
+        return LimitChange(previous, int(self._limit), reason)
+
+
+@dataclass
+class TokenBucket:
+    """Allows ``rate`` units per second on average, in bursts of up to ``burst`` units.
+
+    ``take`` may borrow past an empty bucket, so amounts larger than ``burst`` still pass;
+    the debt is paid by the callers that come after.
+    """
+
+    rate: float
+    burst: float | None = None
+    clock: Callable[[], float] = time.monotonic
+    sleep: Callable[[float], None] = time.sleep
+    _tokens: float = field(init=False, repr=False)
+    _updated: float = field(init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.rate <= 0:
+            raise ValueError("Rate must be positive.")
+        if self.burst is None:
+            self.burst = self.rate
+        self._tokens = self.burst
+        self._updated = self.clock()
+
+    def take(self, amount: float = 1.0) -> float:
+        """Take ``amount`` units, sleeping until the bucket allows it; returns the wait."""
+        with self._lock:
+            now = self.clock()
+            capacity = self.burst if self.burst is not None else self.rate
+            self._tokens = min(capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            self.sleep(wait)
+        return wait
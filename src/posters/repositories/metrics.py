@@ -0,0 +1,231 @@
+"""Run metrics for poster downloads: phase timings, request latencies and transfer volume."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Generator, Iterable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass, field
+from enum import StrEnum
+from pathlib import Path
+
+# Upper bounds in seconds, as in Prometheus' default histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROMETHEUS_SUFFIX = ".prom"
+PROMETHEUS_FAMILIES = {
+    "phase_seconds": "gauge",
+    "request_duration_seconds": "histogram",
+    "downloaded_bytes": "gauge",
+    "download_bytes_per_second": "gauge",
+    "assets": "gauge",
+}
+
+_PREFIX = "plex_posters"
+
+
+class Endpoint(StrEnum):
+    LISTING = "listing"
+    SEASONS = "seasons"
+    EPISODES = "episodes"
+    ARTWORK = "artwork"
+
+
+class Phase(StrEnum):
+    # Time spent producing assets, wherever the enumeration ran.
+    ENUMERATE = "enumerate"
+    # Wall time of a download run, enumeration included.
+    DOWNLOAD = "download"
+    # Time spent writing, syncing and renaming files, summed over workers.
+    WRITE = "write"
+    # Time spent checking and rewriting downloaded images, summed over worker processes.
+    PROCESS = "process"
+
+
+@dataclass
+class LatencyHistogram:
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    total: float = 0.0
+    count: int = 0
+
+    def observe(self, seconds: float) -> None:
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """``(le, count)`` pairs with the ``+Inf`` bucket last, as Prometheus expects."""
+        bounds = [*(str(bound) for bound in LATENCY_BUCKETS), "+Inf"]
+        running, pairs = 0, []
+        for bound, count in zip(bounds, self.buckets, strict=True):
+            running += count
+            pairs.append((bound, running))
+        return pairs
+
+
+@dataclass
+class LibraryMetrics:
+    """Metrics for one library section; safe to update from worker threads."""
+
+    library: str
+    phases: dict[Phase, float] = field(default_factory=dict)
+    requests: dict[Endpoint, LatencyHistogram] = field(default_factory=dict)
+    bytes_downloaded: int = 0
+    assets: Counter[str] = field(default_factory=Counter)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def observe_request(self, endpoint: Endpoint, seconds: float) -> None:
+        with self._lock:
+            histogram = self.requests.get(endpoint)
+            if histogram is None:
+                histogram = self.requests[endpoint] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timed(self, endpoint: Endpoint) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_request(endpoint, time.perf_counter() - started)
+
+    def add_phase(self, phase: Phase, seconds: float) -> None:
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def add_bytes(self, size: int) -> None:
+        with self._lock:
+            self.bytes_downloaded += size
+
+    def count_assets(self, statuses: Counter[str]) -> None:
+        with self._lock:
+            self.assets.update(statuses)
+
+    @property
+    def bytes_per_second(self) -> float:
+        seconds = self.phases.get(Phase.DOWNLOAD)
+        return self.bytes_downloaded / seconds if seconds else 0.0
+
+    def to_dict(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "phases_seconds": {str(phase): value for phase, value in self.phases.items()},
+                "requests": {
+                    str(endpoint): {
+                        "count": histogram.count,
+                        "seconds": histogram.total,
+                        "buckets": dict(histogram.cumulative()),
+                    }
+                    for endpoint, histogram in self.requests.items()
+                },
+                "bytes": self.bytes_downloaded,
+                "bytes_per_second": self.bytes_per_second,
+                "assets": dict(self.assets),
+            }
+
+    def prometheus_samples(self) -> dict[str, list[str]]:
+        """Sample lines keyed by metric family (see ``PROMETHEUS_FAMILIES``)."""
+        library = _label(self.library)
+        with self._lock:
+            samples = {
+                "phase_seconds": [
+                    f'{{library={library},phase="{phase}"}} {seconds}'
+                    for phase, seconds in self.phases.items()
+                ],
+                "request_duration_seconds": [],
+                "downloaded_bytes": [f"{{library={library}}} {self.bytes_downloaded}"],
+                "download_bytes_per_second": [f"{{library={library}}} {self.bytes_per_second}"],
+                "assets": [
+                    f'{{library={library},status="{status}"}} {count}'
+                    for status, count in self.assets.items()
+                ],
+            }
+            for endpoint, histogram in self.requests.items():
+                labels = f'library={library},endpoint="{endpoint}"'
+                samples["request_duration_seconds"].extend(
+                    [
+                        *(
+                            f'_bucket{{{labels},le="{bound}"}} {count}'
+                            for bound, count in histogram.cumulative()
+                        ),
+                        f"_sum{{{labels}}} {histogram.total}",
+                        f"_count{{{labels}}} {histogram.count}",
+                    ]
+                )
+        return samples
+
+
+@dataclass
+class PosterMetrics:
+    """Per-library metrics collected over a CLI run, exportable as JSON or a Prometheus textfile."""
+
+    libraries: dict[str, LibraryMetrics] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def library(self, name: str) -> LibraryMetrics:
+        with self._lock:
+            metrics = self.libraries.get(name)
+            if metrics is None:
+                metrics = self.libraries[name] = LibraryMetrics(library=name)
+            return metrics
+
+    def to_json(self) -> str:
+        with self._lock:
+            libraries = list(self.libraries.values())
+        return json.dumps({"libraries": {m.library: m.to_dict() for m in libraries}}, indent=2)
+
+    def to_prometheus(self) -> str:
+        with self._lock:
+            libraries = list(self.libraries.values())
+        samples = [metrics.prometheus_samples() for metrics in libraries]
+        # The text format requires each family's samples to be contiguous.
+        lines: list[str] = []
+        for family, kind in PROMETHEUS_FAMILIES.items():
+            lines.append(f"# TYPE {_PREFIX}_{family} {kind}")
+            lines.extend(
+                f"{_PREFIX}_{family}{sample}" for entry in samples for sample in entry[family]
+            )
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path) -> None:
+        """Write the metrics as a Prometheus textfile (``.prom``) or JSON, atomically."""
+        text = self.to_prometheus() if path.suffix == PROMETHEUS_SUFFIX else self.to_json()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.tmp")
+        temp_path.write_text(text, encoding="utf-8")
+        os.replace(temp_path, path)
+
+
+def timed_request(
+    metrics: LibraryMetrics | None, endpoint: Endpoint
+) -> AbstractContextManager[None]:
+    return metrics.timed(endpoint) if metrics is not None else nullcontext()
+
+
+def timed_iter[T](
+    items: Iterable[T], metrics: LibraryMetrics, phase: Phase
+) -> Generator[T, None, None]:
+    """Yield from ``items``, adding only the time spent producing them to ``phase``."""
+    iterator = iter(items)
+    elapsed = 0.0
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - started
+            yield item
+    finally:
+        metrics.add_phase(phase, elapsed)
+
+
+def _label(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
@@ -2,17 +2,94 @@
 
 from __future__ import annotations
 
+import glob
+import hashlib
+import os
+import queue
+import random
 import re
-from collections.abc import Iterable, Mapping, Sequence
-from dataclasses import dataclass
+import sys
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict, deque
+from collections.abc import Callable, Collection, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass, field, replace
+from datetime import UTC, datetime, timedelta
+from enum import StrEnum
+from functools import partial
+from itertools import batched, islice
 from pathlib import Path
-from typing import Protocol
+from typing import TYPE_CHECKING, NamedTuple, Protocol, cast
 
 from plexapi.server import PlexServer
-from requests import HTTPError
-from tqdm import tqdm
+from requests import HTTPError, RequestException, Session
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
+from requests.exceptions import ChunkedEncodingError
 
-from posters.domain import PosterJob
+from posters.domain import (
+    ArtworkSize,
+    FsyncPolicy,
+    ImageProcessing,
+    PosterAsset,
+    PosterJob,
+    Shard,
+)
+from posters.repositories.asset_log import AssetLog
+from posters.repositories.content_store import ContentStore
+from posters.repositories.image_processing import ImagePipeline, ProcessedImage
+from posters.repositories.limits import AdaptiveLimit, ConcurrencyLimit, TokenBucket
+from posters.repositories.metrics import (
+    Endpoint,
+    LibraryMetrics,
+    Phase,
+    PosterMetrics,
+    timed_iter,
+    timed_request,
+)
+from posters.repositories.plex_urls import strip_token, thumb_version, transcode_path
+from posters.repositories.poster_cache import PosterCache
+from posters.repositories.poster_manifest import LibraryWatermark, ManifestEntry, PosterManifest
+from posters.repositories.poster_storage import LocalStorage, PosterStorage, StreamingStorage
+from posters.repositories.progress import ProgressSink
+from posters.repositories.retry import (
+    RETRYABLE_STATUS_CODES,
+    CircuitBreaker,
+    RetryPolicy,
+    is_retryable,
+    retry_after,
+)
+
+if TYPE_CHECKING:
+    from posters.repositories.run_journal import RunJournal
+
+# Assets enumerated ahead of the downloads; bounds memory regardless of library size.
+_ENUMERATION_BUFFER = 256
+# Items per listing request, and listing pages requested ahead of the one being processed.
+_PAGE_SIZE = 200
+_PREFETCH_PAGES = 2
+_CONTENT_RANGE = re.compile(r"bytes (?P<start>\d+)-\d+/(?P<total>\d+)")
+# Kept exactly as it has always been written: escaped twice in a raw string, it only matches
+# names with literal backslashes, so folder names fall through to the tag stripping below.
+# Fixing it would rename asset folders in existing trees (see the README).
+_TITLE_YEAR = re.compile(r"^(?P<title>.+?)\\s*\\((?P<year>\\d{4})\\)")
+# Library types whose totals are counted per poster kind; other sections count their items.
+_SECTION_KINDS = {"movie": ("movie",), "show": ("show", "season", "episode")}
+_ESTIMATE_CONCURRENCY = 8
+# Plex search types, for server-side filtered listings.
+_SEARCH_TYPES = {"movie": 1, "show": 2, "season": 3, "episode": 4}
+# Rating keys per /library/metadata request when fetching items by key.
+_METADATA_BATCH = 100
+# Rating key attribute pointing at the show, for items that stand for their show.
+_SHOW_KEYS = {"season": "parentRatingKey", "episode": "grandparentRatingKey"}
+# Watermarks are set this far before a run started, absorbing clock skew with the server.
+_WATERMARK_OVERLAP = timedelta(minutes=10)
+
+
+class DownloadStopped(Exception):
+    """Raised by a download stopped through ``PlexPostersRepository.stop``."""
 
 
 class HttpResponse(Protocol):
@@ -26,166 +103,1103 @@ class HttpResponse(Protocol):
     @property
     def status_code(self) -> int: ...
 
+    def close(self) -> None: ...
+
 
 class HttpSession(Protocol):
     def get(self, url: str, **kwargs) -> HttpResponse:  # type: ignore[override]
         ...
 
-
-@dataclass(frozen=True)
-class PosterAsset:
-    title: str
-    url: str
-    asset_name: str
-    kind: str
-    season: int | None = None
-    episode: int | None = None
+    def head(self, url: str, **kwargs) -> HttpResponse:  # type: ignore[override]
+        ...
 
 
 @dataclass(frozen=True)
 class DownloadReport:
     downloaded: int
     skipped_404: int
-    missing: list[PosterAsset]
+    # AssetLog for reports built by download_posters, AssetChain once merged.
+    missing: Collection[PosterAsset]
+    unchanged: int = 0
+    deduplicated: int = 0
+    bytes_saved: int = 0
+    failed: Collection[PosterAsset] = field(default_factory=list)
+    asset_name_hits: int = 0
+    asset_name_misses: int = 0
+    # Downloaded files that failed to decode; they are removed from the output.
+    invalid: Collection[PosterAsset] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class PosterEstimate:
+    """Expected posters per kind for a library, from section-level totals.
+
+    Totals include items without artwork, so they are an upper bound. ``sampled_bytes`` and
+    ``sampled_seconds`` sum the sizes and round trips of the posters probed, if any.
+    """
+
+    library: str
+    counts: Mapping[str, int]
+    sampled: int = 0
+    sampled_bytes: int = 0
+    sampled_seconds: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def projected_bytes(self) -> int | None:
+        if not self.sampled:
+            return None
+        return round(self.sampled_bytes / self.sampled * self.total)
+
+    def projected_seconds(self, workers: int) -> float | None:
+        """Time to request every poster with ``workers`` downloads in flight.
+
+        Based on the sampled round trips, so transfer time past the headers is not included.
+        """
+        if not self.sampled:
+            return None
+        return self.sampled_seconds / self.sampled * self.total / workers
+
+
+class DownloadStatus(StrEnum):
+    DOWNLOADED = "downloaded"
+    MISSING = "missing"
+    UNCHANGED = "unchanged"
+    FAILED = "failed"
+    INVALID = "invalid"
+
+
+@dataclass(frozen=True)
+class DownloadResult:
+    status: DownloadStatus
+    etag: str | None = None
+    last_modified: str | None = None
+    size: int = 0
+    digest: str | None = None
+    deduplicated: bool = False
+    # How long the asset took, from its manifest check to the end of its transfer.
+    seconds: float = field(default=0.0, compare=False)
+    # Where the asset is stored, relative to the storage root.
+    path: str | None = field(default=None, compare=False)
+    # Set on downloads that still have to pass image processing before they count.
+    pending: _PendingImage | None = field(default=None, compare=False, repr=False)
+
+
+@dataclass(frozen=True)
+class _PendingImage:
+    target: Path
+    # Deduplicates the processed file and records it in the manifest.
+    record: Callable[[DownloadResult], DownloadResult]
+
+
+@dataclass
+class _Tally:
+    """Outcome counts and asset lists accumulated over a ``download_posters`` run."""
+
+    library: str = ""
+    progress: ProgressSink | None = None
+    journal: RunJournal | None = None
+    counts: Counter[DownloadStatus] = field(default_factory=Counter)
+    missing: AssetLog = field(default_factory=AssetLog)
+    failed: AssetLog = field(default_factory=AssetLog)
+    invalid: AssetLog = field(default_factory=AssetLog)
+    deduplicated: int = 0
+    bytes_saved: int = 0
+
+    def add(self, index: int, asset: PosterAsset, result: DownloadResult) -> None:
+        self.counts[result.status] += 1
+        if self.progress is not None:
+            self.progress.finished(self.library, asset, result.status, result.size, result.seconds)
+        if self.journal is not None:
+            self.journal.record(self.library, asset, result)
+        if result.status is DownloadStatus.MISSING:
+            self.missing.add(index, asset)
+        elif result.status is DownloadStatus.FAILED:
+            self.failed.add(index, asset)
+        elif result.status is DownloadStatus.INVALID:
+            self.invalid.add(index, asset)
+        if result.deduplicated:
+            self.deduplicated += 1
+            self.bytes_saved += result.size
+
+
+@dataclass
+class AssetNameResolver:
+    """Run-scoped memo of asset folder names, counting hits and misses for the report.
+
+    Each raw folder name is normalized once, and items without a location or media of their
+    own (resolved through ``item.show()``, a request per call) fetch each show only once.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    _folders: dict[str, str] = field(default_factory=dict, repr=False)
+    _shows: dict[str, str | None] = field(default_factory=dict, repr=False)
+
+    def resolve(self, item) -> str | None:
+        raw = PlexPostersRepository._raw_asset_name(item)
+        if raw is not None:
+            name = self._folders.get(raw)
+            if name is None:
+                self.misses += 1
+                name = self._folders[raw] = PlexPostersRepository._normalize_asset_name(raw)
+            else:
+                self.hits += 1
+            return name
+        show = getattr(item, "show", None)
+        if not show:
+            return None
+        # Episodes name their show as grandparent, seasons as parent.
+        show_key = getattr(item, "grandparentRatingKey", None) or getattr(
+            item, "parentRatingKey", None
+        )
+        if show_key is not None and str(show_key) in self._shows:
+            self.hits += 1
+            return self._shows[str(show_key)]
+        self.misses += 1
+        name = self.resolve(show())
+        if show_key is not None:
+            self._shows[str(show_key)] = name
+        return name
+
+
+@dataclass(frozen=True)
+class _DownloadRun:
+    """Per-call state shared by every download of one ``download_posters`` run."""
+
+    output_dir: Path
+    storage: PosterStorage
+    manifest: PosterManifest | None = None
+    store: ContentStore | None = None
+    poster_size: ArtworkSize | None = None
+    thumb_size: ArtworkSize | None = None
+    fsync: FsyncPolicy = FsyncPolicy.NONE
+    metrics: LibraryMetrics | None = None
+    processing: ImageProcessing | None = None
+
+    @property
+    def suffix(self) -> str:
+        return self.processing.suffix if self.processing is not None else ".jpg"
+
+
+class _SeasonRecord(NamedTuple):
+    ratingKey: object
+    seasonNumber: int | None
+    posterUrl: str | None
+
+
+class _EpisodeRecord(NamedTuple):
+    ratingKey: object
+    episodeNumber: int | None
+    thumbUrl: str | None
+
+
+@dataclass(frozen=True)
+class _ShowHierarchy:
+    """Seasons and episodes of a show section, keyed by their parent rating key."""
+
+    seasons_by_show: Mapping[object, list[_SeasonRecord]]
+    episodes_by_season: Mapping[object, list[_EpisodeRecord]]
+
+    @classmethod
+    def load(cls, seasons: Iterable, episodes: Iterable) -> _ShowHierarchy:
+        # Keep only the fields iter_posters reads rather than whole Plex objects.
+        seasons_by_show: defaultdict[object, list[_SeasonRecord]] = defaultdict(list)
+        for season in seasons:
+            seasons_by_show[season.parentRatingKey].append(
+                _SeasonRecord(season.ratingKey, season.seasonNumber, season.posterUrl)
+            )
+        episodes_by_season: defaultdict[object, list[_EpisodeRecord]] = defaultdict(list)
+        for episode in episodes:
+            episodes_by_season[episode.parentRatingKey].append(
+                _EpisodeRecord(episode.ratingKey, episode.episodeNumber, episode.thumbUrl)
+            )
+        return cls(seasons_by_show=seasons_by_show, episodes_by_season=episodes_by_season)
+
+    # Records mirror the Season/Episode attributes iter_posters reads, so both are duck-typed.
+    def seasons(self, show) -> list:
+        return self.seasons_by_show.get(show.ratingKey, [])
+
+    def episodes(self, season) -> list:
+        return self.episodes_by_season.get(season.ratingKey, [])
 
 
 @dataclass(frozen=True)
 class PlexPostersRepository:
     plex: PlexServer
     session: HttpSession | None = None
+    cache: PosterCache | None = None
+    retry: RetryPolicy | None = None
+    breaker: CircuitBreaker | None = None
+    metrics: PosterMetrics | None = None
+    limit: ConcurrencyLimit | AdaptiveLimit | None = None
+    page_size: int = _PAGE_SIZE
+    prefetch_pages: int = _PREFETCH_PAGES
+    # Where posters are written; the job's output directory when not set.
+    storage: PosterStorage | None = None
+    # Caps on requests per second and artwork bytes per second, shared like ``limit``.
+    request_rate: TokenBucket | None = None
+    bandwidth: TokenBucket | None = None
+    # Told about every asset queued and finished, shared by libraries downloaded together.
+    progress: ProgressSink | None = None
+    # Records every outcome, and picks what a resumed or retried run downloads again.
+    journal: RunJournal | None = None
+    # Once set, downloads raise DownloadStopped before their next asset, e.g. because another
+    # library of the run failed. It stays set.
+    stop: threading.Event = field(default_factory=threading.Event)
 
     def __post_init__(self) -> None:
         if self.session is None:
             # noinspection PyProtectedMember
             object.__setattr__(self, "session", self.plex._session)
 
-    def iter_posters(self, library: str) -> Iterable[PosterAsset]:
-        """Yield poster assets for items in a library section."""
+    def iter_posters(
+        self,
+        library: str,
+        bulk: bool = False,
+        names: AssetNameResolver | None = None,
+        since: datetime | None = None,
+        shard: Shard | None = None,
+        rating_keys: Collection[str] = (),
+    ) -> Iterable[PosterAsset]:
+        """Yield poster assets for items in a library section.
+
+        With ``bulk``, show sections list every season and episode in section-level requests
+        and join them in memory instead of fetching children show by show. When a cache is
+        configured, listings are served from it while the section's stamp is unchanged.
+        With ``since``, only items added or updated after it are listed (bypassing the
+        cache). With ``rating_keys``, only those items are fetched; seasons and episodes
+        stand for their show. With ``shard``, only that slice's items are yielded, and only
+        their children are fetched. Asset names are memoized in ``names`` (a fresh resolver
+        when not given).
+        """
+        names = names if names is not None else AssetNameResolver()
+        if self.metrics is None:
+            return self._iter_library_posters(library, bulk, None, names, since, shard, rating_keys)
+        metrics = self.metrics.library(library)
+        return timed_iter(
+            self._iter_library_posters(library, bulk, metrics, names, since, shard, rating_keys),
+            metrics,
+            Phase.ENUMERATE,
+        )
+
+    def _iter_library_posters(
+        self,
+        library: str,
+        bulk: bool,
+        metrics: LibraryMetrics | None,
+        names: AssetNameResolver,
+        since: datetime | None = None,
+        shard: Shard | None = None,
+        rating_keys: Collection[str] = (),
+    ) -> Iterator[PosterAsset]:
         section = self.plex.library.section(library)
-        if section.type == "movie":
-            for item in section.all():
-                asset_name = self._asset_name_from_item(item)
+        if rating_keys:
+            yield from self._iter_keyed_posters(section, rating_keys, metrics, names, shard)
+            return
+        if since is not None:
+            yield from self._iter_changed_posters(section, since, metrics, names, shard)
+            return
+        cache = self.cache
+        if cache is None:
+            yield from self._iter_section_posters(section, bulk, metrics, names, shard)
+            return
+        key = f"{self.plex.machineIdentifier}/{section.key}"
+        stamp = _section_stamp(section)
+        cached = cache.load(key, stamp)
+        if cached is None and shard is not None:
+            # A slice can't fill the section's cache entry; list just the slice.
+            yield from self._iter_section_posters(section, bulk, metrics, names, shard)
+            return
+        if cached is None:
+            assets = self._iter_section_posters(section, bulk, metrics, names)
+            yield from cache.record(key, stamp, assets)
+            return
+        for asset in cached:
+            if shard is None or shard.includes(asset.asset_name):
+                yield replace(asset, url=self.plex.url(asset.url, includeToken=True))
+
+    def _iter_section_posters(
+        self,
+        section,
+        bulk: bool,
+        metrics: LibraryMetrics | None = None,
+        names: AssetNameResolver | None = None,
+        shard: Shard | None = None,
+    ) -> Iterator[PosterAsset]:
+        names = names if names is not None else AssetNameResolver()
+        request = partial(self._request, metrics=metrics)
+        hierarchy = None
+        if bulk and section.type == "show":
+            hierarchy = _ShowHierarchy.load(
+                self._iter_pages(
+                    partial(section.search, libtype="season"), Endpoint.SEASONS, request
+                ),
+                self._iter_pages(
+                    partial(section.search, libtype="episode"), Endpoint.EPISODES, request
+                ),
+            )
+        items = self._iter_pages(section.all, Endpoint.LISTING, request)
+        yield from self._iter_item_posters(section.type, items, hierarchy, request, names, shard)
+
+    def _iter_pages(
+        self,
+        fetch: Callable[..., Sequence],
+        endpoint: Endpoint,
+        request: Callable[[Endpoint], AbstractContextManager[None]],
+    ) -> Iterator:
+        """Items of a listing, requested a container page at a time from ``fetch``.
+
+        Items are yielded as each page arrives. Once the first page is in, up to
+        ``prefetch_pages`` following pages are requested concurrently while earlier ones are
+        processed. Neither memory nor the wait for the first item grows with the section.
+        """
+        size = self.page_size
+
+        def page(start: int) -> Sequence:
+            with request(endpoint):
+                return fetch(container_start=start, container_size=size, maxresults=size)
+
+        first = page(0)
+        # plexapi reports the listing's totalSize; without it, walk until a page is short.
+        total = getattr(first, "totalSize", None)
+        if len(first) < size or (total is not None and total <= size):
+            yield from first
+            return
+        starts = iter(range(size, total if total is not None else sys.maxsize, size))
+        if self.prefetch_pages < 1:
+            yield from first
+            for start in starts:
+                items = page(start)
+                yield from items
+                if len(items) < size:
+                    return
+            return
+        executor = ThreadPoolExecutor(
+            max_workers=self.prefetch_pages, thread_name_prefix="listing-page"
+        )
+        try:
+            pages = deque(
+                executor.submit(page, start) for start in islice(starts, self.prefetch_pages)
+            )
+            yield from first
+            while pages:
+                items = pages.popleft().result()
+                if len(items) < size:
+                    yield from items
+                    return
+                start = next(starts, None)
+                if start is not None:
+                    pages.append(executor.submit(page, start))
+                yield from items
+        finally:
+            # Pages not started yet are dropped when the consumer stops early.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _iter_changed_posters(
+        self,
+        section,
+        since: datetime,
+        metrics: LibraryMetrics | None,
+        names: AssetNameResolver,
+        shard: Shard | None = None,
+    ) -> Iterator[PosterAsset]:
+        """Posters of items added or updated after ``since``, filtered by the server.
+
+        Shows whose seasons or episodes changed are included with all their posters.
+        """
+        request = partial(self._request, metrics=metrics)
+        stamp = int(since.timestamp())
+        items: dict[str, object] = {}
+        for changed in ("addedAt", "updatedAt"):
+            with request(Endpoint.LISTING):
+                listed = _changed_items(section, _SEARCH_TYPES.get(section.type), changed, stamp)
+            for item in listed:
+                items.setdefault(str(item.ratingKey), item)
+        if section.type == "show":
+            shows: set[str] = set()
+            for search_type, endpoint, show_key in (
+                (_SEARCH_TYPES["season"], Endpoint.SEASONS, "parentRatingKey"),
+                (_SEARCH_TYPES["episode"], Endpoint.EPISODES, "grandparentRatingKey"),
+            ):
+                for changed in ("addedAt", "updatedAt"):
+                    with request(endpoint):
+                        children = _changed_items(section, search_type, changed, stamp)
+                    shows.update(str(getattr(child, show_key)) for child in children)
+            for show in self._fetch_metadata(shows.difference(items), request):
+                items[str(show.ratingKey)] = show
+        yield from self._iter_item_posters(
+            section.type, list(items.values()), None, request, names, shard
+        )
+
+    def _iter_keyed_posters(
+        self,
+        section,
+        rating_keys: Collection[str],
+        metrics: LibraryMetrics | None,
+        names: AssetNameResolver,
+        shard: Shard | None = None,
+    ) -> Iterator[PosterAsset]:
+        """Posters of the items with ``rating_keys``; seasons and episodes stand for their show.
+
+        Keys of deleted items, or of items of another kind than the section's, are ignored.
+        """
+        request = partial(self._request, metrics=metrics)
+        items: dict[str, object] = {}
+        shows: set[str] = set()
+        for item in self._fetch_metadata(set(rating_keys), request):
+            if section.type == "show" and item.type in _SHOW_KEYS:
+                shows.add(str(getattr(item, _SHOW_KEYS[item.type])))
+            elif item.type == section.type:
+                items.setdefault(str(item.ratingKey), item)
+        for show in self._fetch_metadata(shows.difference(items), request):
+            items[str(show.ratingKey)] = show
+        yield from self._iter_item_posters(
+            section.type, list(items.values()), None, request, names, shard
+        )
+
+    def _fetch_metadata(
+        self, rating_keys: Collection[str], request: Callable[[Endpoint], AbstractContextManager]
+    ) -> Iterator:
+        """Items by rating key, a batch per request; keys of deleted items are skipped."""
+        for keys in batched(sorted(rating_keys), _METADATA_BATCH):
+            with request(Endpoint.LISTING):
+                fetched = self.plex.fetchItems(f"/library/metadata/{','.join(keys)}")
+            yield from (item for item in fetched if item is not None)
+
+    def _iter_item_posters(
+        self,
+        section_type: str,
+        items: Iterable,
+        hierarchy: _ShowHierarchy | None,
+        request: Callable[[Endpoint], AbstractContextManager[None]],
+        names: AssetNameResolver,
+        shard: Shard | None = None,
+    ) -> Iterator[PosterAsset]:
+        if section_type == "movie":
+            for item in items:
+                asset_name = _in_shard(names.resolve(item), shard)
                 if item.posterUrl and asset_name:
                     yield PosterAsset(
-                        title=item.title,
+                        name=item.title,
                         url=item.posterUrl,
                         asset_name=asset_name,
                         kind="movie",
+                        rating_key=str(item.ratingKey),
                     )
             return
-        if section.type == "show":
-            for show in section.all():
-                asset_name = self._asset_name_from_item(show)
+        if section_type == "show":
+            for show in items:
+                asset_name = _in_shard(names.resolve(show), shard)
                 if not asset_name:
                     continue
                 if show.posterUrl:
                     yield PosterAsset(
-                        title=show.title,
+                        name=show.title,
                         url=show.posterUrl,
                         asset_name=asset_name,
                         kind="show",
+                        rating_key=str(show.ratingKey),
                     )
-                for season in show.seasons():
+                if hierarchy:
+                    seasons = hierarchy.seasons(show)
+                else:
+                    with request(Endpoint.SEASONS):
+                        seasons = show.seasons()
+                for season in seasons:
                     if season.posterUrl and season.seasonNumber is not None:
                         yield PosterAsset(
-                            title=f"{show.title} Season {season.seasonNumber}",
+                            name=show.title,
                             url=season.posterUrl,
                             asset_name=asset_name,
                             kind="season",
                             season=season.seasonNumber,
+                            rating_key=str(season.ratingKey),
                         )
-                    for episode in season.episodes():
+                    if hierarchy:
+                        episodes = hierarchy.episodes(season)
+                    else:
+                        with request(Endpoint.EPISODES):
+                            episodes = season.episodes()
+                    for episode in episodes:
                         if (
                             episode.thumbUrl
                             and season.seasonNumber is not None
                             and episode.episodeNumber is not None
                         ):
                             yield PosterAsset(
-                                title=(
-                                    f"{show.title} "
-                                    f"S{season.seasonNumber:02d}E{episode.episodeNumber:02d}"
-                                ),
+                                name=show.title,
                                 url=episode.thumbUrl,
                                 asset_name=asset_name,
                                 kind="episode",
                                 season=season.seasonNumber,
                                 episode=episode.episodeNumber,
+                                rating_key=str(episode.ratingKey),
                             )
             return
-        for item in section.all():
-            asset_name = self._asset_name_from_item(item)
+        for item in items:
+            asset_name = _in_shard(names.resolve(item), shard)
             if item.posterUrl and asset_name:
                 yield PosterAsset(
-                    title=item.title,
+                    name=item.title,
                     url=item.posterUrl,
                     asset_name=asset_name,
-                    kind=section.type,
+                    kind=section_type,
+                    rating_key=str(item.ratingKey),
                 )
 
+    @contextmanager
+    def _request(self, endpoint: Endpoint, metrics: LibraryMetrics | None) -> Iterator[None]:
+        """Hold a slot of the shared concurrency limit for one Plex request and time it."""
+        with self._slot(), timed_request(metrics, endpoint):
+            yield
+
+    @contextmanager
+    def _slot(self) -> Iterator[None]:
+        """Hold a slot of the shared concurrency limit, once the request rate allows."""
+        with self.limit.slot() if self.limit is not None else nullcontext():
+            if self.request_rate is not None:
+                self.request_rate.take()
+            yield
+
+    def _get(
+        self, url: str, headers: Mapping[str, str] | None, metrics: LibraryMetrics | None
+    ) -> HttpResponse:
+        """GET artwork, telling the concurrency limit how long the server took to answer."""
+        session = self.session
+        if session is None:
+            raise RuntimeError("HTTP session is not configured.")
+        started = time.perf_counter()
+        try:
+            with timed_request(metrics, Endpoint.ARTWORK):
+                response = session.get(url, stream=True, timeout=30, headers=headers or None)
+        except RequestException as exc:
+            if self.limit is not None:
+                self.limit.observe(time.perf_counter() - started, is_retryable(exc))
+            raise
+        if self.limit is not None:
+            failed = response.status_code in RETRYABLE_STATUS_CODES
+            self.limit.observe(time.perf_counter() - started, failed)
+        return response
+
+    def _throttle(self, size: int) -> None:
+        if self.bandwidth is not None:
+            self.bandwidth.take(size)
+
     def iter_targets(self, job: PosterJob, limit: int | None = None) -> Iterable[Path]:
-        """Yield target file paths for poster assets."""
+        """Yield target file paths for poster assets, without creating any directories."""
         output_dir = Path(job.output_dir)
-        output_dir.mkdir(parents=True, exist_ok=True)
-
-        assets = self._collect_assets(job.library, limit)
-        for index, asset in enumerate(assets):
-            asset_dir = output_dir / asset.asset_name
-            asset_dir.mkdir(parents=True, exist_ok=True)
+        suffix = job.processing.suffix if job.processing is not None else ".jpg"
+        for index, asset in enumerate(self._iter_assets(job, limit)):
             filename = self._asset_filename(asset, index)
-            yield asset_dir / f"{filename}.jpg"
+            yield output_dir / asset.asset_name / f"{filename}{suffix}"
+
+    def estimate_posters(self, job: PosterJob, samples: int = 0) -> PosterEstimate:
+        """Count a library's posters per kind from section totals, without listing its items.
+
+        With ``samples``, about that many posters, spread over the kinds in proportion to
+        their counts, are sized with concurrent HEAD requests to project the transfer.
+        """
+        metrics = self.metrics.library(job.library) if self.metrics is not None else None
+        section = self.plex.library.section(job.library)
+        counts: dict[str, int] = {}
+        for kind in _SECTION_KINDS.get(section.type, (section.type,)):
+            libtype = kind if section.type in _SECTION_KINDS else None
+            with self._request(Endpoint.LISTING, metrics):
+                counts[kind] = section.totalViewSize(libtype=libtype, includeCollections=False) or 0
+        if not samples:
+            return PosterEstimate(library=job.library, counts=counts)
+        urls = self._sample_artwork_urls(section, job, counts, samples, metrics)
+        probes = [probe for probe in self._probe_artwork(urls) if probe is not None]
+        return PosterEstimate(
+            library=job.library,
+            counts=counts,
+            sampled=len(probes),
+            sampled_bytes=sum(size for size, _ in probes),
+            sampled_seconds=sum(seconds for _, seconds in probes),
+        )
+
+    def _sample_artwork_urls(
+        self,
+        section,
+        job: PosterJob,
+        counts: Mapping[str, int],
+        samples: int,
+        metrics: LibraryMetrics | None,
+    ) -> list[str]:
+        """Artwork URLs of one page of items per kind, starting at a random offset."""
+        total = sum(counts.values())
+        urls: list[str] = []
+        for kind, count in counts.items():
+            if not count:
+                continue
+            page = min(count, max(1, round(samples * count / total)))
+            start = random.randrange(count - page + 1)
+            with self._request(Endpoint.LISTING, metrics):
+                items = section.search(
+                    libtype=kind if section.type in _SECTION_KINDS else None,
+                    container_start=start,
+                    container_size=page,
+                    maxresults=page,
+                )
+            size = job.thumb_size if kind == "episode" else job.poster_size
+            for item in items:
+                url = item.thumbUrl if kind == "episode" else item.posterUrl
+                if url and size is not None:
+                    url = self.plex.url(transcode_path(url, size), includeToken=True)
+                if url:
+                    urls.append(url)
+        return urls
+
+    def _probe_artwork(self, urls: list[str]) -> list[tuple[int, float] | None]:
+        if not urls:
+            return []
+        with ThreadPoolExecutor(
+            max_workers=min(len(urls), _ESTIMATE_CONCURRENCY), thread_name_prefix="poster-probe"
+        ) as executor:
+            return list(executor.map(self._probe_artwork_size, urls))
+
+    def _probe_artwork_size(self, url: str) -> tuple[int, float] | None:
+        """``(bytes, seconds)`` for one artwork URL, or None if its size can't be told."""
+        session = self.session
+        if session is None:
+            raise RuntimeError("HTTP session is not configured.")
+        started = time.perf_counter()
+        try:
+            with self._slot():
+                response = session.head(url, timeout=30, allow_redirects=True)
+                response.close()
+                size = _content_length(response) if response.status_code == 200 else None
+                if size is None and response.status_code != 404:
+                    # Not every endpoint answers HEAD; a one-byte range reports the full size.
+                    response = session.get(
+                        url, stream=True, timeout=30, headers={"Range": "bytes=0-0"}
+                    )
+                    response.close()
+                    if response.status_code == 206:
+                        size = _resumed_length(response, 0)
+                    elif response.status_code == 200:
+                        size = _content_length(response)
+        except RequestException:
+            return None
+        if size is None:
+            return None
+        return size, time.perf_counter() - started
 
     def download_posters(self, job: PosterJob, limit: int | None = None) -> DownloadReport:
-        """Download posters to the job output directory. Returns report."""
+        """Download posters to the job output directory. Returns report.
+
+        In incremental mode a per-library manifest in the output directory records what was
+        written, and posters whose thumb version and file are unchanged are skipped. With
+        ``dedup``, identical images are stored once and hardlinked into the asset tree.
+        With ``processing``, downloaded files are checked (and rewritten) in a process pool
+        while downloads continue; files that fail to decode are removed and reported.
+        State (manifests, watermarks) stays in the output directory when the repository
+        writes posters to another storage; those stream each response into it instead.
+        """
         output_dir = Path(job.output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
+        storage = self.storage if self.storage is not None else LocalStorage(output_dir)
+        if not isinstance(storage, LocalStorage) and (job.dedup or job.processing is not None):
+            raise RuntimeError("Deduplication and image processing need local storage.")
 
-        downloaded = 0
-        skipped_404 = 0
-        missing: list[PosterAsset] = []
-        assets = self._collect_assets(job.library, limit)
-        with tqdm(total=len(assets), desc="Posters", unit="poster") as poster_bar:
-            for index, asset in enumerate(assets):
-                asset_dir = output_dir / asset.asset_name
-                asset_dir.mkdir(parents=True, exist_ok=True)
-                filename = self._asset_filename(asset, index)
-                target = asset_dir / f"{filename}.jpg"
-                if self._download(asset.url, target, asset.title):
-                    downloaded += 1
+        run = _DownloadRun(
+            output_dir=output_dir,
+            storage=storage,
+            manifest=PosterManifest.for_library(output_dir, job.library, job.shard)
+            if job.incremental
+            else None,
+            store=ContentStore.in_output_dir(output_dir) if job.dedup else None,
+            poster_size=job.poster_size,
+            thumb_size=job.thumb_size,
+            fsync=job.fsync,
+            metrics=self.metrics.library(job.library) if self.metrics is not None else None,
+            processing=job.processing,
+        )
+        pipeline: ImagePipeline[tuple[int, PosterAsset, DownloadResult]] | None = None
+        if job.processing is not None:
+            pipeline = ImagePipeline(job.processing, workers=job.image_workers, digest=job.dedup)
+        started = time.perf_counter()
+        started_at = datetime.now(UTC)
+        tally = _Tally(library=job.library, progress=self.progress, journal=self.journal)
+        # Enumeration runs ahead on its own thread, so the first download starts as soon as
+        # the first asset is yielded.
+        names = AssetNameResolver()
+        assets = _prefetched(self._iter_assets(job, limit, names), _ENUMERATION_BUFFER)
+        if self.journal is not None:
+            assets = self.journal.select(job.library, assets)
+        assets = _stoppable(assets, self.stop)
+        if self.progress is not None:
+            assets = _announced(assets, job.library, self.progress)
+        try:
+            for index, asset, result in self._download_stream(run, assets, job.workers):
+                if pipeline is not None and result.pending is not None:
+                    pipeline.submit((index, asset, result), result.pending.target)
                 else:
-                    skipped_404 += 1
-                    missing.append(asset)
-                poster_bar.update(1)
-        return DownloadReport(downloaded=downloaded, skipped_404=skipped_404, missing=missing)
+                    tally.add(index, asset, result)
+                if pipeline is not None:
+                    _tally_processed(tally, run, pipeline.completed())
+            if pipeline is not None:
+                _tally_processed(tally, run, pipeline.drain())
+            if self.journal is not None:
+                self.journal.finish(job.library)
+            if (
+                (job.incremental or job.changed_only)
+                # Runs over an explicit window or chosen items, or cut short, leave changes out.
+                and job.since is None
+                and not job.rating_keys
+                and limit is None
+                and not tally.failed
+                and not tally.invalid
+            ):
+                LibraryWatermark.for_library(output_dir, job.library, job.shard).save(
+                    started_at - _WATERMARK_OVERLAP
+                )
+        finally:
+            if pipeline is not None:
+                pipeline.close()
+            if run.manifest is not None:
+                run.manifest.save()
+            if run.metrics is not None:
+                run.metrics.add_phase(Phase.DOWNLOAD, time.perf_counter() - started)
+                run.metrics.count_assets(Counter({str(k): v for k, v in tally.counts.items()}))
+        return DownloadReport(
+            downloaded=tally.counts[DownloadStatus.DOWNLOADED],
+            skipped_404=len(tally.missing),
+            missing=tally.missing,
+            unchanged=tally.counts[DownloadStatus.UNCHANGED],
+            deduplicated=tally.deduplicated,
+            bytes_saved=tally.bytes_saved,
+            failed=tally.failed,
+            asset_name_hits=names.hits,
+            asset_name_misses=names.misses,
+            invalid=tally.invalid,
+        )
 
-    def _download(self, url: str, target: Path, title: str) -> bool:
+    def _download_stream(
+        self, run: _DownloadRun, assets: Iterable[PosterAsset], workers: int
+    ) -> Iterator[tuple[int, PosterAsset, DownloadResult]]:
+        """Download assets, yielding ``(index, asset, result)`` as each one completes."""
+        if workers == 1:
+            for index, asset in enumerate(assets):
+                yield index, asset, self._download_asset(run, asset, index)
+            return
+        # Sized for the most the limit allows, so an adaptive limit can grow into the pool.
+        self._size_connection_pool(max(workers, self.limit.maximum if self.limit else 0))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="poster")
+        in_flight: dict[Future[DownloadResult], tuple[int, PosterAsset]] = {}
+        try:
+            for index, asset in enumerate(assets):
+                future = executor.submit(self._download_asset, run, asset, index)
+                in_flight[future] = (index, asset)
+                if len(in_flight) < workers * 2:
+                    continue
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    # Re-raises non-404 errors; queued downloads are cancelled below.
+                    yield *in_flight.pop(future), future.result()
+            for future in as_completed(in_flight):
+                yield *in_flight[future], future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _download_asset(self, run: _DownloadRun, asset: PosterAsset, index: int) -> DownloadResult:
+        started = time.perf_counter()
+        path = f"{asset.asset_name}/{self._asset_filename(asset, index)}{run.suffix}"
+        result = self._fetch_asset(run, asset, path)
+        return replace(result, seconds=time.perf_counter() - started, path=path)
+
+    def _fetch_asset(self, run: _DownloadRun, asset: PosterAsset, path: str) -> DownloadResult:
+        storage = run.storage
+        target: Path | None = None
+        if isinstance(storage, LocalStorage):
+            target = storage.path(path)
+            target.parent.mkdir(parents=True, exist_ok=True)
+
+        manifest = run.manifest
+        key = f"{asset.rating_key}/{asset.kind}" if asset.rating_key else path
+        version = thumb_version(asset.url)
+        url = asset.url
+        size = run.thumb_size if asset.kind == "episode" else run.poster_size
+        if size is not None:
+            # Fetch a server-side resized copy; the resize spec is part of the version so
+            # changing it invalidates manifest entries.
+            url = self.plex.url(transcode_path(asset.url, size), includeToken=True)
+            if version is not None:
+                version = f"{version}@{size.max_width}x{size.max_height}q{size.quality}"
+        processing = run.processing
+        if processing is not None and processing.rewrites and version is not None:
+            version = (
+                f"{version}~{processing.max_width}x{processing.max_height}q{processing.quality}"
+                f"{processing.format or ''}{'-stripped' if processing.strip_metadata else ''}"
+            )
+        entry = manifest.get(key) if manifest is not None else None
+        if entry is not None and entry.is_current(storage, path, version):
+            return DownloadResult(DownloadStatus.UNCHANGED)
+        headers = None
+        if entry is not None and entry.path == path and storage.stored_size(path) is not None:
+            headers = entry.conditional_headers()
+        if target is None:
+            fetch = partial(
+                self._stream,
+                url,
+                cast(StreamingStorage, storage),
+                path,
+                headers=headers,
+                metrics=run.metrics,
+            )
+        else:
+            fetch = partial(
+                self._download,
+                url,
+                target,
+                headers=headers,
+                # Processed files are hashed by the worker after they are rewritten.
+                digest=run.store is not None and processing is None,
+                fsync=run.fsync,
+                metrics=run.metrics,
+            )
+        result = self._download_with_retries(fetch)
+        record = partial(self._record_download, run, key, path, target, entry, version)
+        if (
+            target is not None
+            and processing is not None
+            and result.status is DownloadStatus.DOWNLOADED
+        ):
+            return replace(result, pending=_PendingImage(target, record))
+        return record(result)
+
+    @staticmethod
+    def _record_download(
+        run: _DownloadRun,
+        key: str,
+        path: str,
+        target: Path | None,
+        entry: ManifestEntry | None,
+        version: str | None,
+        result: DownloadResult,
+    ) -> DownloadResult:
+        """Deduplicate a finished download and record it in the manifest.
+
+        ``target`` is the local file, or None for posters streamed to another storage.
+        """
+        manifest = run.manifest
+        if run.store is not None and result.digest is not None and target is not None:
+            result = replace(result, deduplicated=run.store.absorb(target, result.digest))
+        if manifest is not None and result.status in (
+            DownloadStatus.DOWNLOADED,
+            DownloadStatus.UNCHANGED,
+        ):
+            previous = entry if result.status is DownloadStatus.UNCHANGED else None
+            if target is not None:
+                size = target.stat().st_size
+            else:
+                size = previous.size if previous is not None else result.size
+            manifest.record(
+                key,
+                ManifestEntry(
+                    version=version,
+                    size=size,
+                    path=path,
+                    etag=result.etag or (previous.etag if previous else None),
+                    last_modified=result.last_modified
+                    or (previous.last_modified if previous else None),
+                ),
+            )
+        return result
+
+    def _size_connection_pool(self, connections: int) -> None:
+        # requests keeps DEFAULT_POOLSIZE connections per host; more concurrent requests than
+        # that would discard and reopen connections instead of reusing them.
         session = self.session
-        if session is None:
-            raise RuntimeError("HTTP session is not configured.")
-        response = session.get(url, stream=True, timeout=30)
+        if connections <= DEFAULT_POOLSIZE or not isinstance(session, Session):
+            return
+        current = session.get_adapter("http://")
+        if isinstance(current, HTTPAdapter) and current._pool_maxsize >= connections:
+            # Already sized, possibly by a library running in parallel with this one.
+            return
+        adapter = HTTPAdapter(pool_maxsize=connections)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+    def _download_with_retries(self, fetch: Callable[[], DownloadResult]) -> DownloadResult:
+        """Run ``fetch``, retrying transient failures (5xx, 429, connection errors) with backoff.
+
+        Without a retry policy every error propagates as before. With one, assets that keep
+        failing come back as ``FAILED``; non-transient errors still abort the run.
+        """
+        retry, breaker = self.retry, self.breaker
+        attempt = 0
+        while True:
+            if breaker is not None:
+                breaker.wait()
+            try:
+                # The slot covers the whole transfer, body included, but not backoff sleeps.
+                with self._slot():
+                    result = fetch()
+            except RequestException as exc:
+                transient = is_retryable(exc)
+                if breaker is not None and transient:
+                    breaker.record(False)
+                if retry is None or not transient:
+                    raise
+                if attempt >= retry.attempts:
+                    return DownloadResult(DownloadStatus.FAILED)
+                time.sleep(retry.delay(attempt, retry_after(exc)))
+                attempt += 1
+                continue
+            if breaker is not None:
+                breaker.record(True)
+            return result
+
+    def _download(
+        self,
+        url: str,
+        target: Path,
+        headers: Mapping[str, str] | None = None,
+        digest: bool = False,
+        fsync: FsyncPolicy = FsyncPolicy.NONE,
+        metrics: LibraryMetrics | None = None,
+    ) -> DownloadResult:
+        """Stream ``url`` into a ``.part`` file next to ``target`` and rename it into place.
+
+        A ``.part`` left by an interrupted download of the same URL is resumed with a Range
+        request; servers that ignore the range answer 200 and the file restarts from zero.
+        Resumed requests drop conditional ``headers``: they describe the poster in place, not
+        the partial one, and a 304 would leave the ``.part`` behind.
+        """
+        part = _part_path(target, url)
+        try:
+            offset = part.stat().st_size
+        except FileNotFoundError:
+            offset = 0
+        request_headers = dict(headers or {})
+        if offset:
+            request_headers = {
+                name: value
+                for name, value in request_headers.items()
+                if name not in ("If-None-Match", "If-Modified-Since")
+            }
+            request_headers["Range"] = f"bytes={offset}-"
+        response = self._get(url, request_headers, metrics)
+        if response.status_code == 304:
+            response.close()
+            return DownloadResult(DownloadStatus.UNCHANGED)
+        resumed_length = _resumed_length(response, offset) if offset else None
+        if offset and response.status_code in (206, 416) and resumed_length is None:
+            # The partial file no longer lines up with the resource; start over.
+            response.close()
+            part.unlink()
+            return self._download(
+                url, target, headers=headers, digest=digest, fsync=fsync, metrics=metrics
+            )
         try:
             response.raise_for_status()
         except HTTPError as exc:
+            response.close()
             if exc.response is not None and exc.response.status_code == 404:
-                return False
+                part.unlink(missing_ok=True)
+                return DownloadResult(DownloadStatus.MISSING)
             raise
-        total = int(response.headers.get("Content-Length", 0))
-        with (
-            target.open("wb") as handle,
-            tqdm(
-                total=total or None,
-                desc=title,
-                unit="B",
-                unit_scale=True,
-                unit_divisor=1024,
-                leave=False,
-            ) as file_bar,
-        ):
+        expected = resumed_length
+        if expected is None:
+            offset = 0
+            expected = _content_length(response)
+        size = offset
+        write_seconds = 0.0
+        hasher = hashlib.sha256() if digest else None
+        if hasher is not None and offset:
+            with part.open("rb") as existing:
+                for block in iter(lambda: existing.read(1024 * 1024), b""):
+                    hasher.update(block)
+        with part.open("ab" if offset else "wb") as handle:
             for chunk in response.iter_content(chunk_size=1024 * 1024):
                 if chunk:
+                    self._throttle(len(chunk))
+                    started = time.perf_counter()
                     handle.write(chunk)
-                    if total:
-                        file_bar.update(len(chunk))
-        return True
+                    write_seconds += time.perf_counter() - started
+                    size += len(chunk)
+                    if hasher is not None:
+                        hasher.update(chunk)
+            started = time.perf_counter()
+            if fsync is not FsyncPolicy.NONE:
+                handle.flush()
+                os.fsync(handle.fileno())
+        write_seconds += time.perf_counter() - started
+        if metrics is not None:
+            metrics.add_bytes(size - offset)
+        if expected is not None and size != expected:
+            # Keep the partial file so the retry (or the next run) can resume it.
+            raise ChunkedEncodingError(f"Incomplete download: {size} of {expected} bytes")
+        # Renaming replaces the directory entry, so a hardlinked target is never modified.
+        started = time.perf_counter()
+        os.replace(part, target)
+        _remove_stale_parts(target)
+        if fsync is FsyncPolicy.DIRECTORY:
+            _fsync_directory(target.parent)
+        if metrics is not None:
+            metrics.add_phase(Phase.WRITE, write_seconds + time.perf_counter() - started)
+        return DownloadResult(
+            DownloadStatus.DOWNLOADED,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            size=size,
+            digest=hasher.hexdigest() if hasher is not None else None,
+        )
+
+    def _stream(
+        self,
+        url: str,
+        storage: StreamingStorage,
+        path: str,
+        headers: Mapping[str, str] | None = None,
+        metrics: LibraryMetrics | None = None,
+    ) -> DownloadResult:
+        """Stream ``url`` into ``storage`` at ``path``; only complete bodies are committed."""
+        response = self._get(url, headers, metrics)
+        if response.status_code == 304:
+            response.close()
+            return DownloadResult(DownloadStatus.UNCHANGED)
+        try:
+            response.raise_for_status()
+        except HTTPError as exc:
+            response.close()
+            if exc.response is not None and exc.response.status_code == 404:
+                return DownloadResult(DownloadStatus.MISSING)
+            raise
+        expected = _content_length(response)
+        size = 0
+        write_seconds = 0.0
+        writer = storage.writer(path)
+        try:
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                if chunk:
+                    self._throttle(len(chunk))
+                    started = time.perf_counter()
+                    writer.write(chunk)
+                    write_seconds += time.perf_counter() - started
+                    size += len(chunk)
+            if expected is not None and size != expected:
+                raise ChunkedEncodingError(f"Incomplete download: {size} of {expected} bytes")
+            started = time.perf_counter()
+            writer.commit()
+            write_seconds += time.perf_counter() - started
+        except BaseException:
+            writer.abort()
+            raise
+        if metrics is not None:
+            metrics.add_bytes(size)
+            metrics.add_phase(Phase.WRITE, write_seconds)
+        return DownloadResult(
+            DownloadStatus.DOWNLOADED,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            size=size,
+        )
 
     @staticmethod
     def _asset_filename(asset: PosterAsset, index: int) -> str:
@@ -199,9 +1213,15 @@ class PlexPostersRepository:
 
     @staticmethod
     def _asset_name_from_item(item) -> str | None:
+        """Resolve a single item's asset name without memoization."""
+        return AssetNameResolver().resolve(item)
+
+    @staticmethod
+    def _raw_asset_name(item) -> str | None:
+        """The item's own folder (or file) name, before normalization."""
         locations = getattr(item, "locations", None)
         if locations:
-            return PlexPostersRepository._normalize_asset_name(Path(locations[0]).name)
+            return Path(locations[0]).name
         media = getattr(item, "media", None)
         if media:
             parts = getattr(media[0], "parts", None)
@@ -210,11 +1230,7 @@ class PlexPostersRepository:
                 # If the media file is stored directly under a file-like folder, use the file name.
                 if Path(raw).suffix:
                     raw = Path(parts[0].file).stem
-                return PlexPostersRepository._normalize_asset_name(raw)
-        show = getattr(item, "show", None)
-        if show:
-            show_obj = show()
-            return PlexPostersRepository._asset_name_from_item(show_obj)
+                return raw
         return None
 
     @staticmethod
@@ -224,7 +1240,7 @@ class PlexPostersRepository:
         if Path(raw).suffix:
             raw = Path(raw).stem
         # Prefer "Title (YYYY)" if present.
-        match = re.match(r"^(?P<title>.+?)\\s*\\((?P<year>\\d{4})\\)", raw)
+        match = _TITLE_YEAR.match(raw)
         if match:
             title = match.group("title").strip()
             year = match.group("year")
@@ -235,8 +1251,156 @@ class PlexPostersRepository:
                 raw = raw.split(token, 1)[0].strip()
         return raw
 
-    def _collect_assets(self, library: str, limit: int | None) -> Sequence[PosterAsset]:
-        assets = list(self.iter_posters(library))
-        if limit is not None:
-            return assets[:limit]
-        return assets
+    def _iter_assets(
+        self, job: PosterJob, limit: int | None, names: AssetNameResolver | None = None
+    ) -> Iterator[PosterAsset]:
+        since = job.since
+        if since is None and job.changed_only and not job.rating_keys:
+            # Without a watermark (first run, or none complete yet) everything is listed.
+            watermark = LibraryWatermark.for_library(Path(job.output_dir), job.library, job.shard)
+            since = watermark.load()
+        assets = self.iter_posters(
+            job.library,
+            bulk=job.bulk_enumeration,
+            names=names,
+            since=since,
+            shard=job.shard,
+            rating_keys=job.rating_keys,
+        )
+        # islice stops pulling from the enumeration once the limit is reached.
+        return islice(assets, limit)
+
+
+def _stoppable(assets: Iterable[PosterAsset], stop: threading.Event) -> Iterator[PosterAsset]:
+    for asset in assets:
+        if stop.is_set():
+            raise DownloadStopped("Stopped before downloading every poster.")
+        yield asset
+
+
+def _announced(
+    assets: Iterable[PosterAsset], library: str, progress: ProgressSink
+) -> Iterator[PosterAsset]:
+    for asset in assets:
+        progress.queued(library, asset)
+        yield asset
+
+
+def _tally_processed(
+    tally: _Tally,
+    run: _DownloadRun,
+    items: Iterable[tuple[tuple[int, PosterAsset, DownloadResult], ProcessedImage]],
+) -> None:
+    """Count downloads whose image processing has finished, recording those that passed."""
+    for (index, asset, result), processed in items:
+        pending = cast(_PendingImage, result.pending)
+        if run.metrics is not None:
+            run.metrics.add_phase(Phase.PROCESS, processed.seconds)
+        if not processed.valid:
+            # Removed, so the next run downloads it again instead of keeping a broken poster.
+            pending.target.unlink(missing_ok=True)
+            invalid = DownloadResult(
+                DownloadStatus.INVALID, seconds=result.seconds, path=result.path
+            )
+            tally.add(index, asset, invalid)
+            continue
+        result = replace(result, size=processed.size, digest=processed.digest, pending=None)
+        tally.add(index, asset, pending.record(result))
+
+
+def _in_shard(asset_name: str | None, shard: Shard | None) -> str | None:
+    """``asset_name``, or None when its item belongs to another shard."""
+    if asset_name is None or shard is None or shard.includes(asset_name):
+        return asset_name
+    return None
+
+
+def _changed_items(section, search_type: int | None, changed: str, stamp: int) -> list:
+    """Items of ``search_type`` whose ``changed`` timestamp is after ``stamp``."""
+    type_filter = f"type={search_type}&" if search_type is not None else ""
+    return section.fetchItems(
+        f"/library/sections/{section.key}/all?{type_filter}{changed}>>={stamp}"
+    )
+
+
+def _section_stamp(section) -> str:
+    """Cache stamp for a section; changes whenever Plex updates or rescans it."""
+    updated = str(int(section.updatedAt.timestamp())) if section.updatedAt else "-"
+    # plexapi does not parse scannedAt, so it is read from the section's XML as sent.
+    scanned = section._data.attrib.get("scannedAt") or "-"
+    return f"{updated}:{scanned}"
+
+
+def _part_path(target: Path, url: str) -> Path:
+    # Keyed by URL (minus token) so a partial file is only ever resumed from the same artwork.
+    url_key = zlib.crc32(strip_token(url).encode())
+    return target.with_name(f"{target.name}.{url_key:08x}.part")
+
+
+def _remove_stale_parts(target: Path) -> None:
+    """Remove partial downloads of other artwork versions, which can never be resumed now."""
+    for part in target.parent.glob(f"{glob.escape(target.name)}.*.part"):
+        part.unlink(missing_ok=True)
+
+
+def _resumed_length(response: HttpResponse, offset: int) -> int | None:
+    """Full length of a 206 response that continues exactly at ``offset``, else None."""
+    if response.status_code != 206:
+        return None
+    match = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+    if match is None or int(match.group("start")) != offset:
+        return None
+    return int(match.group("total"))
+
+
+def _content_length(response: HttpResponse) -> int | None:
+    # With a Content-Encoding the header counts encoded bytes, not what iter_content yields.
+    length = response.headers.get("Content-Length")
+    if response.headers.get("Content-Encoding") or not length or not length.isdigit():
+        return None
+    return int(length)
+
+
+def _fsync_directory(directory: Path) -> None:
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def _prefetched[T](items: Iterable[T], maxsize: int) -> Iterator[T]:
+    """Iterate ``items`` on a background thread, handing them over through a bounded queue."""
+    buffer: queue.Queue[tuple[T | None, BaseException | None, bool]] = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(entry: tuple[T | None, BaseException | None, bool]) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put((item, None, False)):
+                    return
+        except BaseException as exc:
+            put((None, exc, True))
+            return
+        put((None, None, True))
+
+    threading.Thread(target=produce, name="poster-enumeration", daemon=True).start()
+    try:
+        while True:
+            item, error, finished = buffer.get()
+            if error is not None:
+                raise error
+            if finished:
+                return
+            yield cast(T, item)
+    finally:
+        stop.set()
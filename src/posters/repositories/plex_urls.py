@@ -0,0 +1,39 @@
+"""Helpers for Plex artwork URLs."""
+
+from __future__ import annotations
+
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from posters.domain import ArtworkSize
+
+# The photo transcoder needs both bounds; an unset side is effectively unbounded.
+_UNBOUNDED = 100_000
+
+
+def strip_token(url: str) -> str:
+    """Reduce a Plex URL to its server-relative path and query, without the token."""
+    parts = urlsplit(url)
+    query = [(name, value) for name, value in parse_qsl(parts.query) if name != "X-Plex-Token"]
+    return f"{parts.path}?{urlencode(query)}" if query else parts.path
+
+
+def thumb_version(url: str) -> str | None:
+    """Return the updatedAt component of a Plex thumb URL (``.../thumb/<updatedAt>``)."""
+    segments = urlsplit(url).path.rstrip("/").split("/")
+    if len(segments) >= 2 and segments[-2] in ("thumb", "art") and segments[-1].isdigit():
+        return segments[-1]
+    return None
+
+
+def transcode_path(url: str, size: ArtworkSize) -> str:
+    """Server-relative photo transcoder path that fits ``url`` inside the ``size`` box."""
+    params: dict[str, str | int] = {
+        "url": strip_token(url),
+        "width": size.max_width or _UNBOUNDED,
+        "height": size.max_height or _UNBOUNDED,
+        "minSize": 0,
+        "upscale": 0,
+    }
+    if size.quality is not None:
+        params["quality"] = size.quality
+    return f"/photo/:/transcode?{urlencode(params)}"
@@ -0,0 +1,184 @@
+"""On-disk SQLite cache of enumerated poster assets, one entry per library section."""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from collections.abc import Generator, Iterable, Iterator
+from contextlib import closing
+from dataclasses import astuple, dataclass
+from pathlib import Path
+from typing import cast
+
+from posters.domain import PosterAsset
+from posters.repositories.plex_urls import strip_token
+
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60
+DEFAULT_MAX_ASSETS = 2_000_000
+
+_BATCH_SIZE = 1000
+# Bump when the tables change; older caches are dropped rather than migrated.
+_SCHEMA_VERSION = 2
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (id INTEGER PRIMARY KEY AUTOINCREMENT);
+CREATE TABLE IF NOT EXISTS sections (
+    cache_key TEXT PRIMARY KEY,
+    stamp TEXT NOT NULL,
+    generation INTEGER NOT NULL,
+    asset_count INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS assets (
+    generation INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    url TEXT NOT NULL,
+    asset_name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    season INTEGER,
+    episode INTEGER,
+    rating_key TEXT,
+    PRIMARY KEY (generation, seq)
+) WITHOUT ROWID;
+"""
+
+
+def default_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "plex-metadata"
+
+
+@dataclass(frozen=True)
+class PosterCache:
+    """Section listings keyed by section and invalidated by its updatedAt/scannedAt stamp.
+
+    Entries older than ``max_age`` seconds are ignored and evicted; once more than
+    ``max_assets`` rows are cached, least recently used sections are evicted first.
+    Plex tokens are stripped from URLs before they are written to disk.
+    """
+
+    path: Path
+    refresh: bool = False
+    max_age: float = DEFAULT_MAX_AGE
+    max_assets: int = DEFAULT_MAX_ASSETS
+
+    def load(self, key: str, stamp: str) -> Iterator[PosterAsset] | None:
+        """Return cached assets for a section, or None when the entry is missing or stale."""
+        if self.refresh or not self.path.exists():
+            return None
+        with closing(self._connect()) as connection, connection:
+            row = connection.execute(
+                "SELECT generation, created_at FROM sections WHERE cache_key = ? AND stamp = ?",
+                (key, stamp),
+            ).fetchone()
+            if row is None or row[1] < time.time() - self.max_age:
+                return None
+            connection.execute(
+                "UPDATE sections SET last_used = ? WHERE cache_key = ?", (time.time(), key)
+            )
+        return self._iter_generation(row[0])
+
+    def record(
+        self, key: str, stamp: str, assets: Iterable[PosterAsset]
+    ) -> Generator[PosterAsset, None, None]:
+        """Pass assets through, caching them once the enumeration runs to completion.
+
+        Rows are written in batches as they stream past, so recording never holds the whole
+        section in memory. An enumeration that stops early (e.g. ``--limit``) is discarded.
+        """
+        with closing(self._connect()) as connection, connection:
+            cursor = connection.execute("INSERT INTO generations DEFAULT VALUES")
+            generation = cast(int, cursor.lastrowid)
+        count = 0
+        batch: list[tuple[object, ...]] = []
+        completed = False
+        try:
+            for asset in assets:
+                batch.append((generation, count, *_row(asset)))
+                count += 1
+                if len(batch) >= _BATCH_SIZE:
+                    self._insert(batch)
+                    batch = []
+                yield asset
+            self._insert(batch)
+            self._commit(key, stamp, generation, count)
+            completed = True
+        finally:
+            if not completed:
+                with closing(self._connect()) as connection, connection:
+                    connection.execute("DELETE FROM assets WHERE generation = ?", (generation,))
+
+    def _iter_generation(self, generation: int) -> Iterator[PosterAsset]:
+        # Read in keyed batches on short-lived connections, so a consumer that stops early
+        # (or lives on another thread) never holds a cursor open.
+        seq = 0
+        while True:
+            with closing(self._connect()) as connection:
+                rows = connection.execute(
+                    "SELECT seq, name, url, asset_name, kind, season, episode, rating_key "
+                    "FROM assets WHERE generation = ? AND seq >= ? ORDER BY seq LIMIT ?",
+                    (generation, seq, _BATCH_SIZE),
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield PosterAsset(*row[1:])
+            seq = rows[-1][0] + 1
+
+    def _insert(self, rows: list[tuple[object, ...]]) -> None:
+        if not rows:
+            return
+        with closing(self._connect()) as connection, connection:
+            connection.executemany("INSERT INTO assets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def _commit(self, key: str, stamp: str, generation: int, count: int) -> None:
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            previous = connection.execute(
+                "SELECT generation FROM sections WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if previous is not None:
+                connection.execute("DELETE FROM assets WHERE generation = ?", previous)
+            connection.execute(
+                "INSERT OR REPLACE INTO sections VALUES (?, ?, ?, ?, ?, ?)",
+                (key, stamp, generation, count, now, now),
+            )
+            self._evict(connection, now)
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> None:
+        expired = connection.execute(
+            "SELECT cache_key, generation FROM sections WHERE created_at < ?",
+            (now - self.max_age,),
+        ).fetchall()
+        total = connection.execute("SELECT COALESCE(SUM(asset_count), 0) FROM sections").fetchone()
+        excess = total[0] - self.max_assets
+        if excess > 0:
+            for key, generation, count in connection.execute(
+                "SELECT cache_key, generation, asset_count FROM sections ORDER BY last_used"
+            ).fetchall():
+                if excess <= 0:
+                    break
+                expired.append((key, generation))
+                excess -= count
+        for key, generation in expired:
+            connection.execute("DELETE FROM assets WHERE generation = ?", (generation,))
+            connection.execute("DELETE FROM sections WHERE cache_key = ?", (key,))
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        if connection.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            connection.executescript(
+                "DROP TABLE IF EXISTS assets; DROP TABLE IF EXISTS sections; "
+                "DROP TABLE IF EXISTS generations; "
+                f"{_SCHEMA} PRAGMA user_version = {_SCHEMA_VERSION};"
+            )
+        return connection
+
+
+def _row(asset: PosterAsset) -> tuple[object, ...]:
+    name, url, *rest = astuple(asset)
+    return (name, strip_token(url), *rest)
@@ -0,0 +1,128 @@
+"""Persistent manifest of downloaded posters, used for incremental syncs."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from posters.domain import Shard
+
+if TYPE_CHECKING:
+    from posters.repositories.poster_storage import PosterStorage
+
+STATE_DIR = ".plex-metadata"
+MANIFEST_VERSION = 1
+
+_UNSAFE_FILENAME = re.compile(r"[^\w.-]+")
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    version: str | None
+    size: int
+    path: str
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def is_current(self, storage: PosterStorage, path: str, version: str | None) -> bool:
+        """Return True when the stored poster matches this entry and the thumb version."""
+        if version is None or version != self.version or path != self.path:
+            return False
+        return storage.stored_size(path) == self.size
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class PosterManifest:
+    """Manifest entries for one library, keyed by rating key and asset kind."""
+
+    path: Path
+    entries: dict[str, ManifestEntry] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @classmethod
+    def for_library(
+        cls, output_dir: Path, library: str, shard: Shard | None = None
+    ) -> PosterManifest:
+        filename = _library_filename(library, shard)
+        return cls.load(output_dir / STATE_DIR / "manifests" / f"{filename}.json")
+
+    @classmethod
+    def load(cls, path: Path) -> PosterManifest:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return cls(path=path)
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path=path)
+        entries = {key: ManifestEntry(**entry) for key, entry in data["entries"].items()}
+        return cls(path=path, entries=entries)
+
+    def get(self, key: str) -> ManifestEntry | None:
+        with self._lock:
+            return self.entries.get(key)
+
+    def record(self, key: str, entry: ManifestEntry) -> None:
+        with self._lock:
+            self.entries[key] = entry
+
+    def save(self) -> None:
+        """Write the manifest atomically so an interrupted run never leaves it truncated."""
+        with self._lock:
+            data = {
+                "version": MANIFEST_VERSION,
+                "entries": {key: asdict(entry) for key, entry in self.entries.items()},
+            }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f".{self.path.name}.tmp")
+        temp_path.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(temp_path, self.path)
+
+
+@dataclass(frozen=True)
+class LibraryWatermark:
+    """When the last complete run over a library started, for listing only later changes."""
+
+    path: Path
+
+    @classmethod
+    def for_library(
+        cls, output_dir: Path, library: str, shard: Shard | None = None
+    ) -> LibraryWatermark:
+        filename = _library_filename(library, shard)
+        return cls(output_dir / STATE_DIR / "watermarks" / f"{filename}.json")
+
+    def load(self) -> datetime | None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+        return datetime.fromisoformat(data["since"])
+
+    def save(self, since: datetime) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f".{self.path.name}.tmp")
+        data = {"version": MANIFEST_VERSION, "since": since.isoformat()}
+        temp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(temp_path, self.path)
+
+
+def _library_filename(library: str, shard: Shard | None = None) -> str:
+    filename = _UNSAFE_FILENAME.sub("_", library).strip("_") or "library"
+    # Shards sharing an output directory each keep their own state.
+    return f"{filename}.shard-{shard.index}-of-{shard.count}" if shard is not None else filename
@@ -0,0 +1,349 @@
+"""Where downloaded posters are written, behind the Kometa asset layout.
+
+Paths are relative POSIX paths such as ``Movie (1999)/poster.jpg``. ``LocalStorage`` is the
+asset tree on disk, which downloads write to directly (resuming partial files, with
+optional fsync, deduplication and image processing). The other backends take streamed
+bodies through a ``StorageWriter``: ``PackStorage`` appends every poster to one tar or zip
+archive, and ``S3Storage`` uploads to an S3 bucket or an S3-compatible store. S3 needs
+boto3 (the ``s3`` extra).
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import mimetypes
+import os
+import shutil
+import tarfile
+import threading
+import time
+import zipfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from typing import IO, Any, Protocol
+
+from requests import RequestException
+
+# Part size of S3 multipart uploads; S3 requires at least 5 MiB for all but the last part.
+S3_PART_SIZE = 8 * 1024 * 1024
+# Archive members are buffered in memory up to this size, and in a temporary file above it.
+_SPOOL_SIZE = 8 * 1024 * 1024
+_NOT_FOUND_CODES = {"404", "NoSuchKey", "NotFound"}
+
+
+class S3StorageError(RequestException):
+    """An S3 call that failed, reported like any other failed request."""
+
+
+class PosterStorage(Protocol):
+    def location(self, path: str) -> str:
+        """Where ``path`` is stored, for messages and dry runs."""
+        ...
+
+    def stored_size(self, path: str) -> int | None:
+        """Size of the stored poster at ``path``, or None when there is none."""
+        ...
+
+    def close(self) -> None:
+        """Publish what the run stored."""
+        ...
+
+    def discard(self) -> None:
+        """End a run that failed, keeping whatever an earlier run published."""
+        ...
+
+
+class StorageWriter(Protocol):
+    def write(self, chunk: bytes) -> None: ...
+
+    def commit(self) -> None:
+        """Make the written poster visible at its path."""
+        ...
+
+    def abort(self) -> None: ...
+
+
+class StreamingStorage(PosterStorage, Protocol):
+    def writer(self, path: str) -> StorageWriter: ...
+
+
+class S3Client(Protocol):
+    """The subset of a boto3 S3 client the S3 backend uses."""
+
+    def head_object(self, *, Bucket: str, Key: str) -> dict: ...
+
+    def put_object(
+        self, *, Bucket: str, Key: str, Body: bytes, ContentType: str | None = ...
+    ) -> dict: ...
+
+    def create_multipart_upload(
+        self, *, Bucket: str, Key: str, ContentType: str | None = ...
+    ) -> dict: ...
+
+    def upload_part(
+        self, *, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: bytes
+    ) -> dict: ...
+
+    def complete_multipart_upload(
+        self, *, Bucket: str, Key: str, UploadId: str, MultipartUpload: dict[str, Any]
+    ) -> dict: ...
+
+    def abort_multipart_upload(self, *, Bucket: str, Key: str, UploadId: str) -> dict: ...
+
+
+@dataclass(frozen=True)
+class LocalStorage:
+    """The asset tree under ``root``; downloads write these files themselves."""
+
+    root: Path
+
+    def path(self, path: str) -> Path:
+        return self.root / path
+
+    def location(self, path: str) -> str:
+        return str(self.root / path)
+
+    def stored_size(self, path: str) -> int | None:
+        try:
+            return (self.root / path).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def close(self) -> None:
+        pass
+
+    def discard(self) -> None:
+        pass
+
+
+class PackStorage:
+    """Every poster of a run in one uncompressed tar or zip archive at ``path``.
+
+    Members are appended one at a time, so each download is buffered until it completes.
+    The archive is created with the first poster, under a temporary name, and renamed into
+    place on ``close``; ``discard`` deletes it instead, so a failed run leaves an earlier
+    archive as it was. A path written twice keeps its first copy.
+    """
+
+    def __init__(self, path: Path, kind: str) -> None:
+        if kind not in ("tar", "zip"):
+            raise ValueError(f"Unknown pack format {kind!r}; use tar or zip.")
+        self.path = path
+        self.kind = kind
+        self._temp_path = path.with_name(f".{path.name}.tmp")
+        self._sizes: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._archive: tarfile.TarFile | zipfile.ZipFile | None = None
+
+    def location(self, path: str) -> str:
+        return f"{self.path}!/{path}"
+
+    def stored_size(self, path: str) -> int | None:
+        with self._lock:
+            return self._sizes.get(path)
+
+    def writer(self, path: str) -> StorageWriter:
+        return _SpooledWriter(self, path)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._archive is None:
+                return
+            self._archive.close()
+            self._archive = None
+            os.replace(self._temp_path, self.path)
+
+    def discard(self) -> None:
+        with self._lock:
+            if self._archive is None:
+                return
+            self._archive.close()
+            self._archive = None
+            self._temp_path.unlink(missing_ok=True)
+
+    def add(self, path: str, body: IO[bytes], size: int) -> None:
+        with self._lock:
+            if path in self._sizes:
+                return
+            archive = self._archive if self._archive is not None else self._open()
+            if isinstance(archive, tarfile.TarFile):
+                info = tarfile.TarInfo(path)
+                info.size = size
+                info.mtime = int(time.time())
+                archive.addfile(info, body)
+            else:
+                info = zipfile.ZipInfo(path, date_time=time.localtime()[:6])
+                with archive.open(info, "w") as member:
+                    shutil.copyfileobj(body, member)
+            self._sizes[path] = size
+
+    def _open(self) -> tarfile.TarFile | zipfile.ZipFile:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # The archive stays open across downloads until ``close``.
+        if self.kind == "tar":
+            self._archive = tarfile.open(self._temp_path, "w", format=tarfile.PAX_FORMAT)  # noqa: SIM115
+        else:
+            # JPEG and WebP are compressed already.
+            self._archive = zipfile.ZipFile(self._temp_path, "w", zipfile.ZIP_STORED)  # noqa: SIM115
+        return self._archive
+
+
+class _SpooledWriter:
+    def __init__(self, pack: PackStorage, path: str) -> None:
+        self._pack = pack
+        self._path = path
+        self._size = 0
+        self._spool = SpooledTemporaryFile(max_size=_SPOOL_SIZE)  # noqa: SIM115
+
+    def write(self, chunk: bytes) -> None:
+        self._spool.write(chunk)
+        self._size += len(chunk)
+
+    def commit(self) -> None:
+        self._spool.seek(0)
+        try:
+            self._pack.add(self._path, self._spool, self._size)
+        finally:
+            self._spool.close()
+
+    def abort(self) -> None:
+        self._spool.close()
+
+
+class S3Storage:
+    """Objects under ``prefix`` in ``bucket``, uploaded as the response body streams in.
+
+    Bodies go out in multipart uploads of ``part_size`` parts, so no poster is held whole
+    in memory; bodies smaller than one part are sent with a single PutObject.
+    """
+
+    def __init__(
+        self, client: S3Client, bucket: str, prefix: str = "", part_size: int = S3_PART_SIZE
+    ) -> None:
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.part_size = part_size
+
+    def key(self, path: str) -> str:
+        return f"{self.prefix}/{path}" if self.prefix else path
+
+    def location(self, path: str) -> str:
+        return f"s3://{self.bucket}/{self.key(path)}"
+
+    def stored_size(self, path: str) -> int | None:
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=self.key(path))
+        except Exception as exc:
+            if _is_not_found(exc):
+                return None
+            raise S3StorageError(f"S3 HeadObject {self.location(path)}: {exc}") from exc
+        return int(response["ContentLength"])
+
+    def writer(self, path: str) -> StorageWriter:
+        return _MultipartWriter(self, self.key(path), mimetypes.guess_type(path)[0])
+
+    def close(self) -> None:
+        pass
+
+    def discard(self) -> None:
+        # Each object is published by its own upload; unfinished uploads are aborted.
+        pass
+
+
+class _MultipartWriter:
+    def __init__(self, storage: S3Storage, key: str, content_type: str | None) -> None:
+        self._storage = storage
+        self._target = {"Bucket": storage.bucket, "Key": key}
+        self._location = f"s3://{storage.bucket}/{key}"
+        self._content_type = {"ContentType": content_type} if content_type else {}
+        self._buffer = bytearray()
+        self._upload_id: str | None = None
+        self._parts: list[dict[str, object]] = []
+
+    def write(self, chunk: bytes) -> None:
+        self._buffer += chunk
+        part_size = self._storage.part_size
+        while len(self._buffer) >= part_size:
+            self._upload_part(bytes(self._buffer[:part_size]))
+            del self._buffer[:part_size]
+
+    def commit(self) -> None:
+        client = self._storage.client
+        if self._upload_id is None:
+            with _s3_errors("PutObject", self._location):
+                client.put_object(**self._target, **self._content_type, Body=bytes(self._buffer))
+            return
+        if self._buffer:
+            self._upload_part(bytes(self._buffer))
+        with _s3_errors("CompleteMultipartUpload", self._location):
+            client.complete_multipart_upload(
+                **self._target, UploadId=self._upload_id, MultipartUpload={"Parts": self._parts}
+            )
+
+    def abort(self) -> None:
+        if self._upload_id is not None:
+            with _s3_errors("AbortMultipartUpload", self._location):
+                self._storage.client.abort_multipart_upload(
+                    **self._target, UploadId=self._upload_id
+                )
+
+    def _upload_part(self, body: bytes) -> None:
+        client = self._storage.client
+        if self._upload_id is None:
+            with _s3_errors("CreateMultipartUpload", self._location):
+                upload = client.create_multipart_upload(**self._target, **self._content_type)
+            self._upload_id = upload["UploadId"]
+        number = len(self._parts) + 1
+        with _s3_errors("UploadPart", self._location):
+            response = client.upload_part(
+                **self._target, UploadId=self._upload_id, PartNumber=number, Body=body
+            )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": number})
+
+
+def open_storage(spec: str, output_dir: Path, s3_endpoint_url: str | None = None) -> PosterStorage:
+    """Storage for ``spec``: ``local``, ``tar:PATH``, ``zip:PATH`` or ``s3://bucket/prefix``."""
+    if spec == "local":
+        return LocalStorage(output_dir)
+    if spec.startswith("s3://"):
+        bucket, _, prefix = spec.removeprefix("s3://").partition("/")
+        if not bucket:
+            raise ValueError(f"Expected s3://bucket/prefix, not {spec!r}.")
+        return S3Storage(_s3_client(s3_endpoint_url), bucket, prefix)
+    kind, separator, path = spec.partition(":")
+    if kind in ("tar", "zip") and separator and path:
+        return PackStorage(Path(path), kind)
+    raise ValueError(
+        f"Unknown storage {spec!r}; use local, tar:PATH, zip:PATH or s3://bucket/prefix."
+    )
+
+
+def _s3_client(endpoint_url: str | None) -> S3Client:
+    if importlib.util.find_spec("boto3") is None:
+        raise RuntimeError("S3 storage needs boto3: pip install 'plex-metadata[s3]'")
+    boto3 = importlib.import_module("boto3")
+    return boto3.client("s3", endpoint_url=endpoint_url)
+
+
+@contextmanager
+def _s3_errors(operation: str, location: str) -> Iterator[None]:
+    # botocore's ClientError and BotoCoreError (e.g. EndpointConnectionError) are not
+    # RequestExceptions, so neither the repository nor the CLI would report them.
+    try:
+        yield
+    except RequestException:
+        raise
+    except Exception as exc:
+        raise S3StorageError(f"S3 {operation} {location}: {exc}") from exc
+
+
+def _is_not_found(exc: Exception) -> bool:
+    # botocore's ClientError carries the service error code; botocore is not imported here.
+    response = getattr(exc, "response", None)
+    if not isinstance(response, dict):
+        return False
+    return str(response.get("Error", {}).get("Code")) in _NOT_FOUND_CODES
@@ -0,0 +1,350 @@
+"""Download posters as Plex reports library changes, for `posters watch`.
+
+Changes arrive from Plex's notification stream (websocket alerts, which need the
+``websocket-client`` package) or from webhook POSTs. They are coalesced in a bounded queue
+and handed to the repository once they have been quiet for a debounce interval. Periodic
+reconciliation sweeps catch whatever no notification reported.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import cast
+
+from posters.domain import LibraryChange, PosterJob
+from posters.repositories.plex_posters import (
+    DownloadReport,
+    DownloadStopped,
+    PlexPostersRepository,
+)
+
+# Timeline entries for library items, and the state Plex sends once an item is processed.
+_LIBRARY_IDENTIFIER = "com.plexapp.plugins.library"
+_PROCESSED_STATE = 5
+_ITEM_TYPES = {1, 2, 3, 4}
+_WEBHOOK_EVENTS = {"library.new"}
+# Longest the watcher sleeps before checking for a stop request.
+_POLL_INTERVAL = 1.0
+# How soon a sweep is retried after a failed download, instead of the full interval.
+_FAILURE_RETRY = 60.0
+
+
+def parse_alert(data: Mapping) -> list[LibraryChange]:
+    """Changes in a notification from Plex's ``/:/websockets/notifications`` stream."""
+    if data.get("type") != "timeline":
+        return []
+    changes: list[LibraryChange] = []
+    for entry in data.get("TimelineEntry") or []:
+        if (
+            entry.get("identifier") == _LIBRARY_IDENTIFIER
+            and entry.get("state") == _PROCESSED_STATE
+            and entry.get("type") in _ITEM_TYPES
+            and int(entry.get("sectionID", -1)) >= 0
+            and entry.get("itemID")
+        ):
+            changes.append(LibraryChange(str(entry["sectionID"]), str(entry["itemID"])))
+    return changes
+
+
+def parse_webhook(body: bytes, content_type: str) -> list[LibraryChange]:
+    """Changes in a webhook POST: Plex's multipart ``payload`` field, or a JSON body."""
+    if content_type.startswith("multipart/"):
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + body
+        )
+        payloads = [
+            part.get_payload(decode=True)
+            for part in message.iter_parts()
+            if part.get_param("name", header="content-disposition") == "payload"
+        ]
+        if not payloads:
+            raise ValueError("Webhook has no payload field.")
+        body = cast(bytes, payloads[0])
+    try:
+        payload = json.loads(body)
+    except ValueError as exc:
+        raise ValueError(f"Webhook payload is not JSON: {exc}") from exc
+    metadata = payload.get("Metadata") or {}
+    if (
+        payload.get("event") not in _WEBHOOK_EVENTS
+        or "librarySectionID" not in metadata
+        or "ratingKey" not in metadata
+    ):
+        return []
+    return [LibraryChange(str(metadata["librarySectionID"]), str(metadata["ratingKey"]))]
+
+
+class ChangeQueue:
+    """Coalesces changes and releases each once it has been quiet for ``debounce`` seconds.
+
+    Repeated changes of one item are merged; an item that keeps changing is released after
+    ``max_delay`` anyway. At most ``max_pending`` distinct items are held: ``put`` waits for
+    room, and once that times out the change is dropped and ``overflowed`` is set, so the
+    watcher can reconcile instead.
+    """
+
+    def __init__(
+        self, debounce: float = 5.0, max_pending: int = 10_000, max_delay: float | None = None
+    ) -> None:
+        self.debounce = debounce
+        self.max_pending = max_pending
+        self.max_delay = max_delay if max_delay is not None else debounce * 10
+        self.dropped = 0
+        self._overflowed = False
+        # Change -> (first seen, last seen), in arrival order.
+        self._pending: dict[LibraryChange, tuple[float, float]] = {}
+        self._condition = threading.Condition()
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def put(self, change: LibraryChange, timeout: float | None = None) -> bool:
+        """Queue ``change``, waiting up to ``timeout`` for room; False if it was dropped."""
+        with self._condition:
+            now = time.monotonic()
+            if change in self._pending:
+                self._pending[change] = (self._pending[change][0], now)
+                return True
+            if not self._condition.wait_for(lambda: len(self._pending) < self.max_pending, timeout):
+                self._overflowed = True
+                self.dropped += 1
+                return False
+            now = time.monotonic()
+            self._pending[change] = (now, now)
+            self._condition.notify_all()
+            return True
+
+    def take(self, timeout: float) -> list[LibraryChange]:
+        """Changes that are due, waiting up to ``timeout`` for one; empty if none came due."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                due = [change for change, seen in self._pending.items() if self._due(seen, now)]
+                if due:
+                    for change in due:
+                        del self._pending[change]
+                    self._condition.notify_all()
+                    return due
+                if now >= deadline:
+                    return []
+                wake = min(
+                    (self._release_at(seen) for seen in self._pending.values()), default=deadline
+                )
+                self._condition.wait(min(wake, deadline) - now)
+
+    def take_overflow(self) -> bool:
+        """Whether changes were dropped since the last call."""
+        with self._condition:
+            overflowed, self._overflowed = self._overflowed, False
+            return overflowed
+
+    def _due(self, seen: tuple[float, float], now: float) -> bool:
+        return now >= self._release_at(seen)
+
+    def _release_at(self, seen: tuple[float, float]) -> float:
+        first, last = seen
+        return min(last + self.debounce, first + self.max_delay)
+
+
+@dataclass
+class PosterWatcher:
+    """Downloads the posters of changed items, and sweeps each library periodically.
+
+    ``job`` is the template for every download; ``libraries`` maps the section IDs to
+    watch to their titles. Sweeps are ``changed_only`` runs from each library's watermark,
+    starting with one when the watcher starts, so changes made while it was not running are
+    picked up too. ``run`` sweeps on a background thread: the first sweep of a library
+    without a watermark lists all of it, and changes keep being taken meanwhile. Changes to
+    the library being swept wait for its sweep rather than in the queue.
+    """
+
+    repository: PlexPostersRepository
+    job: PosterJob
+    libraries: Mapping[str, str]
+    changes: ChangeQueue
+    reconcile_interval: float | None = 3600.0
+    on_report: Callable[[str, DownloadReport], None] = lambda library, report: None
+    on_error: Callable[[str, Exception], None] = lambda library, exc: None
+    _next_sweep: float = field(default=0.0, init=False)
+    _sweep: threading.Thread | None = field(default=None, init=False)
+    _stopping: threading.Event = field(default_factory=threading.Event, init=False)
+    # One download per library at a time, so a sweep and a change never write one poster.
+    _busy: dict[str, threading.Lock] = field(default_factory=dict, init=False)
+    _held: list[LibraryChange] = field(default_factory=list, init=False)
+
+    def __post_init__(self) -> None:
+        self._busy = {section_id: threading.Lock() for section_id in self.libraries}
+
+    def run(self, stop: threading.Event) -> None:
+        """Process changes until ``stop`` is set."""
+        self._next_sweep = time.monotonic()
+        self._stopping.clear()
+        try:
+            while not stop.is_set():
+                if not self._sweeping() and (self.changes.take_overflow() or self._sweep_due()):
+                    self._sweep = threading.Thread(target=self.reconcile, name="sweep")
+                    self._sweep.start()
+                held, self._held = self._held, []
+                batch = self.changes.take(self._wait())
+                if held or batch:
+                    self.download_changes([*held, *batch])
+        finally:
+            self._end_sweep()
+
+    def download_changes(self, changes: Iterable[LibraryChange]) -> None:
+        keys: dict[str, list[str]] = {}
+        for change in changes:
+            if change.section_id in self.libraries:
+                keys.setdefault(change.section_id, []).append(change.rating_key)
+        for section_id, rating_keys in keys.items():
+            busy = self._busy[section_id]
+            if not busy.acquire(blocking=False):
+                self._hold(section_id, rating_keys)
+                continue
+            try:
+                job = replace(
+                    self.job, changed_only=False, since=None, rating_keys=tuple(rating_keys)
+                )
+                self._download(self.libraries[section_id], job)
+            finally:
+                busy.release()
+
+    def reconcile(self) -> None:
+        job = replace(self.job, changed_only=True, since=None, rating_keys=())
+        if self.reconcile_interval is not None:
+            self._next_sweep = time.monotonic() + self.reconcile_interval
+        for section_id, library in self.libraries.items():
+            if self._stopping.is_set():
+                return
+            with self._busy[section_id]:
+                self._download(library, job)
+
+    def _download(self, library: str, job: PosterJob) -> None:
+        try:
+            report = self.repository.download_posters(replace(job, library=library))
+        except DownloadStopped:
+            return
+        except Exception as exc:
+            # One failed download must not stop the watcher.
+            self.on_error(library, exc)
+            self._retry_sweep_soon()
+            return
+        if report.failed or report.invalid:
+            self._retry_sweep_soon()
+        self.on_report(library, report)
+
+    def _hold(self, section_id: str, rating_keys: list[str]) -> None:
+        """Keep changes to a library being swept until its sweep ends, up to ``max_pending``."""
+        room = max(0, self.changes.max_pending - len(self._held))
+        if len(rating_keys) > room:
+            # They changed after the sweep's watermark, so the next sweep picks them up.
+            self.changes.dropped += len(rating_keys) - room
+            self._next_sweep = time.monotonic()
+        self._held.extend(LibraryChange(section_id, key) for key in rating_keys[:room])
+
+    def _end_sweep(self) -> None:
+        if self._sweeping():
+            # A first sweep can take long; it stops at its next poster instead.
+            self._stopping.set()
+            self.repository.stop.set()
+        if self._sweep is not None:
+            self._sweep.join()
+
+    def _sweeping(self) -> bool:
+        return self._sweep is not None and self._sweep.is_alive()
+
+    def _retry_sweep_soon(self) -> None:
+        # The watermark did not move, so the sweep picks up what this download missed.
+        self._next_sweep = min(self._next_sweep, time.monotonic() + _FAILURE_RETRY)
+
+    def _sweep_due(self) -> bool:
+        return self.reconcile_interval is not None and time.monotonic() >= self._next_sweep
+
+    def _wait(self) -> float:
+        if self.reconcile_interval is None or self._sweeping():
+            # Held changes are offered again after this, once their library's sweep ended.
+            return _POLL_INTERVAL
+        return max(0.0, min(self._next_sweep - time.monotonic(), _POLL_INTERVAL))
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        server = cast(_WebhookServer, self.server)
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        try:
+            changes = parse_webhook(body, self.headers.get("Content-Type", ""))
+        except ValueError:
+            self._reply(400)
+            return
+        # Waiting for room pushes back on the sender; a full queue turns into a sweep.
+        accepted = all([server.changes.put(change, server.put_timeout) for change in changes])
+        self._reply(204 if accepted else 503)
+
+    def _reply(self, status: int) -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class _WebhookServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], changes: ChangeQueue, put_timeout: float):
+        super().__init__(address, _WebhookHandler)
+        self.changes = changes
+        self.put_timeout = put_timeout
+
+
+@contextmanager
+def serve_webhooks(
+    changes: ChangeQueue, host: str = "127.0.0.1", port: int = 0, put_timeout: float = 5.0
+) -> Iterator[str]:
+    """Accept Plex webhook POSTs into ``changes`` on a background thread; yields the URL."""
+    server = _WebhookServer((host, port), changes, put_timeout)
+    thread = threading.Thread(target=server.serve_forever, name="webhooks", daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{server.server_address[1]}/"
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+@contextmanager
+def listen_for_alerts(
+    plex, changes: ChangeQueue, on_error: Callable[[Exception], None] = lambda exc: None
+) -> Iterator[None]:
+    """Feed Plex's notification stream into ``changes`` (needs ``websocket-client``).
+
+    The listener thread blocks while the queue is full, so the stream is read only as fast
+    as changes are taken.
+    """
+    if importlib.util.find_spec("websocket") is None:
+        raise RuntimeError("Plex alerts need websocket-client: pip install 'plex-metadata[watch]'")
+
+    def on_alert(data: Mapping) -> None:
+        for change in parse_alert(data):
+            changes.put(change)
+
+    listener = plex.startAlertListener(callback=on_alert, callbackError=on_error)
+    try:
+        yield
+    finally:
+        listener.stop()
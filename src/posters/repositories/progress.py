@@ -0,0 +1,174 @@
+"""Progress reporting for poster downloads: one aggregate bar, or a JSON Lines event stream.
+
+A sink is shared by every library of a run. Downloads report each asset as it is queued and
+once its outcome is known (``downloaded``, ``unchanged``, ``missing``, ``failed`` or
+``invalid``), and the run reports notable decisions, such as concurrency changes, as
+messages. Outcomes are reported from the thread that collects results, not from the
+download workers, so sinks see one call per asset and little contention.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+from collections import deque
+from typing import Protocol, TextIO
+
+from tqdm import tqdm
+
+from posters.domain import PosterAsset
+
+# The bar's throughput is averaged over this many seconds, and redrawn at most this often.
+_RATE_WINDOW = 10.0
+_REFRESH_INTERVAL = 0.5
+# JSON Lines output is flushed at least this often, so tailing it stays current.
+_FLUSH_INTERVAL = 1.0
+# Event names of outcomes, where they differ from the download status.
+_EVENTS = {"missing": "404"}
+
+
+class ProgressSink(Protocol):
+    def queued(self, library: str, asset: PosterAsset) -> None: ...
+
+    def finished(
+        self, library: str, asset: PosterAsset, status: str, size: int, seconds: float
+    ) -> None:
+        """``size`` is the bytes transferred, ``seconds`` how long the download took."""
+        ...
+
+    def message(self, text: str) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class SilentProgress:
+    """No progress output; messages still go to stderr, as log lines."""
+
+    def queued(self, library: str, asset: PosterAsset) -> None:
+        pass
+
+    def finished(
+        self, library: str, asset: PosterAsset, status: str, size: int, seconds: float
+    ) -> None:
+        pass
+
+    def message(self, text: str) -> None:
+        print(text, file=sys.stderr)
+
+    def close(self) -> None:
+        pass
+
+
+class BarProgress:
+    """One bar over every library: posters finished of those queued, and recent throughput."""
+
+    def __init__(self, file: TextIO | None = None) -> None:
+        # Messages go above the bar, to the same stream (stderr unless given).
+        self._file = file if file is not None else sys.stderr
+        self._bar = tqdm(
+            desc="Posters", unit="poster", total=0, file=self._file, dynamic_ncols=True
+        )
+        self._lock = threading.Lock()
+        # (finished at, bytes) of recent downloads, for the rolling throughput.
+        self._recent: deque[tuple[float, int]] = deque()
+        self._recent_bytes = 0
+        self._queued = 0
+        self._problems = 0
+        self._refreshed = 0.0
+
+    def queued(self, library: str, asset: PosterAsset) -> None:
+        with self._lock:
+            self._queued += 1
+            self._bar.total = self._queued
+
+    def finished(
+        self, library: str, asset: PosterAsset, status: str, size: int, seconds: float
+    ) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if size:
+                self._recent.append((now, size))
+                self._recent_bytes += size
+            if status in ("failed", "invalid"):
+                self._problems += 1
+            if now - self._refreshed >= _REFRESH_INTERVAL:
+                self._refreshed = now
+                self._bar.set_postfix_str(self._summary(now), refresh=False)
+            self._bar.update(1)
+
+    def message(self, text: str) -> None:
+        with self._lock:
+            self._bar.write(text, file=self._file)
+
+    def close(self) -> None:
+        with self._lock:
+            self._bar.set_postfix_str(self._summary(time.monotonic()), refresh=False)
+            self._bar.close()
+
+    def _summary(self, now: float) -> str:
+        while self._recent and self._recent[0][0] < now - _RATE_WINDOW:
+            self._recent_bytes -= self._recent.popleft()[1]
+        span = now - self._recent[0][0] if self._recent else 0.0
+        rate = self._recent_bytes / max(span, 1.0) / (1024 * 1024)
+        summary = f"{rate:.1f} MiB/s"
+        return f"{summary}, {self._problems} failed" if self._problems else summary
+
+
+class JsonlProgress:
+    """One JSON object per line for every queued and finished asset, and every message.
+
+    Finished events carry ``bytes`` and ``ms``; every event has ``ts``, seconds since the
+    epoch. ``stream`` is closed with the sink unless ``close_stream`` is false, as for stdout.
+    """
+
+    def __init__(self, stream: TextIO, close_stream: bool = True) -> None:
+        self._stream = stream
+        self._close_stream = close_stream
+        self._lock = threading.Lock()
+        self._flushed = time.monotonic()
+
+    def queued(self, library: str, asset: PosterAsset) -> None:
+        self._write(
+            {
+                "event": "queued",
+                "library": library,
+                "asset": asset.asset_name,
+                "kind": asset.kind,
+                "rating_key": asset.rating_key,
+            }
+        )
+
+    def finished(
+        self, library: str, asset: PosterAsset, status: str, size: int, seconds: float
+    ) -> None:
+        self._write(
+            {
+                "event": _EVENTS.get(status, status),
+                "library": library,
+                "asset": asset.asset_name,
+                "kind": asset.kind,
+                "rating_key": asset.rating_key,
+                "bytes": size,
+                "ms": round(seconds * 1000, 1),
+            }
+        )
+
+    def message(self, text: str) -> None:
+        self._write({"event": "message", "message": text})
+
+    def close(self) -> None:
+        with self._lock:
+            self._stream.flush()
+            if self._close_stream:
+                self._stream.close()
+
+    def _write(self, event: dict) -> None:
+        line = json.dumps(event | {"ts": round(time.time(), 3)}, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._stream.write(line)
+            now = time.monotonic()
+            if now - self._flushed >= _FLUSH_INTERVAL:
+                self._flushed = now
+                self._stream.flush()
@@ -0,0 +1,99 @@
+"""Download reports as JSON Lines files, so the reports of sharded runs can be merged.
+
+The first line holds the counts; every missing, failed or undecodable poster follows on a
+line of its own, so neither writing nor reading holds a whole list in memory. Plex tokens
+are stripped from poster URLs.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from posters.domain import PosterAsset, Shard
+from posters.repositories.asset_log import AssetLog
+from posters.repositories.plex_posters import DownloadReport
+from posters.repositories.plex_urls import strip_token
+
+REPORT_FORMAT = "plex-metadata/posters-report"
+REPORT_VERSION = 1
+
+_COUNTS = (
+    "downloaded",
+    "unchanged",
+    "deduplicated",
+    "bytes_saved",
+    "asset_name_hits",
+    "asset_name_misses",
+)
+_LISTS = ("missing", "failed", "invalid")
+
+
+@dataclass(frozen=True)
+class ReportFile:
+    report: DownloadReport
+    output_dir: str
+    libraries: tuple[str, ...] = ()
+    shard: Shard | None = None
+
+
+def write_report(path: Path, report_file: ReportFile) -> None:
+    """Write ``report_file`` to ``path`` atomically."""
+    report = report_file.report
+    header = {
+        "format": REPORT_FORMAT,
+        "version": REPORT_VERSION,
+        "output_dir": report_file.output_dir,
+        "libraries": list(report_file.libraries),
+        "shard": str(report_file.shard) if report_file.shard is not None else None,
+        **{name: getattr(report, name) for name in _COUNTS},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.tmp")
+    with temp_path.open("w", encoding="utf-8") as handle:
+        handle.write(json.dumps(header) + "\n")
+        for name in _LISTS:
+            for asset in getattr(report, name):
+                entry = asdict(asset) | {"url": strip_token(asset.url)}
+                handle.write(json.dumps({"list": name, "asset": entry}) + "\n")
+    os.replace(temp_path, path)
+
+
+def read_report(path: Path) -> ReportFile:
+    """Read a report written by ``write_report``; raises ValueError for anything else."""
+    with path.open(encoding="utf-8") as handle:
+        lines = iter(handle)
+        header = _parse(path, next(lines, ""))
+        if header.get("format") != REPORT_FORMAT or header.get("version") != REPORT_VERSION:
+            raise ValueError(f"{path} is not a posters report (version {REPORT_VERSION}).")
+        assets = {name: AssetLog() for name in _LISTS}
+        for index, entry in enumerate(_parse(path, line) for line in _non_blank(lines)):
+            assets[entry["list"]].add(index, PosterAsset(**entry["asset"]))
+    shard = header.get("shard")
+    report = DownloadReport(
+        skipped_404=len(assets["missing"]),
+        missing=assets["missing"],
+        failed=assets["failed"],
+        invalid=assets["invalid"],
+        **{name: header[name] for name in _COUNTS},
+    )
+    return ReportFile(
+        report=report,
+        output_dir=header["output_dir"],
+        libraries=tuple(header["libraries"]),
+        shard=Shard.parse(shard) if shard else None,
+    )
+
+
+def _parse(path: Path, line: str) -> dict:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"{path} is not a posters report: {exc}") from exc
+
+
+def _non_blank(lines: Iterator[str]) -> Iterator[str]:
+    return (line for line in lines if line.strip())
@@ -0,0 +1,102 @@
+"""Retry and circuit-breaker policies for poster downloads."""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+
+from requests import ConnectionError, HTTPError, RequestException, Timeout
+from requests.exceptions import ChunkedEncodingError
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Jittered exponential backoff; ``Retry-After`` from the server takes precedence."""
+
+    attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    max_retry_after: float = 300.0
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+@dataclass
+class CircuitBreaker:
+    """Pauses every caller for ``cooldown`` seconds once the recent error rate spikes.
+
+    Outcomes of the last ``window`` requests are kept; when at least ``min_requests`` were
+    seen and the share of failures reaches ``threshold``, the breaker opens.
+    """
+
+    window: int = 50
+    min_requests: int = 10
+    threshold: float = 0.5
+    cooldown: float = 30.0
+    clock: Callable[[], float] = time.monotonic
+    sleep: Callable[[float], None] = time.sleep
+    _outcomes: deque[bool] = field(default_factory=deque, repr=False)
+    _open_until: float = field(default=0.0, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def wait(self) -> None:
+        """Block while the breaker is open."""
+        while True:
+            with self._lock:
+                remaining = self._open_until - self.clock()
+            if remaining <= 0:
+                return
+            self.sleep(remaining)
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            self._outcomes.append(ok)
+            if len(self._outcomes) > self.window:
+                self._outcomes.popleft()
+            failures = self._outcomes.count(False)
+            if (
+                len(self._outcomes) >= self.min_requests
+                and failures / len(self._outcomes) >= self.threshold
+            ):
+                self._open_until = self.clock() + self.cooldown
+                self._outcomes.clear()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._open_until > self.clock()
+
+
+def is_retryable(exc: RequestException) -> bool:
+    if isinstance(exc, HTTPError):
+        response = exc.response
+        return response is not None and response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, ConnectionError | Timeout | ChunkedEncodingError)
+
+
+def retry_after(exc: RequestException) -> float | None:
+    """Seconds requested by a ``Retry-After`` header (delta-seconds or HTTP-date)."""
+    response = exc.response
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=UTC)
+    return max((when - datetime.now(UTC)).total_seconds(), 0.0)
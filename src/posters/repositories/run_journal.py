@@ -0,0 +1,260 @@
+"""Append-only journal of a download run, for `--resume` and `--retry-failed`.
+
+The journal is a JSON Lines file in the output directory's state directory. A run starts it
+with a header naming its libraries; every finished asset then adds a line with its library,
+key, target path and outcome, and every library that completes adds a ``finished`` line.
+Lines are buffered and written in batches, and synced when a library completes. A crash
+can cut the last line short; reading ignores it.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import IO
+
+from posters.domain import PosterAsset, Shard
+from posters.repositories.asset_log import AssetLog
+from posters.repositories.plex_posters import DownloadReport, DownloadResult, DownloadStatus
+from posters.repositories.plex_urls import strip_token
+from posters.repositories.poster_manifest import STATE_DIR
+
+JOURNAL_FORMAT = "plex-metadata/posters-journal"
+JOURNAL_VERSION = 1
+
+# Outcomes `--retry-failed` downloads again.
+RETRY_STATUSES = frozenset({DownloadStatus.MISSING, DownloadStatus.FAILED, DownloadStatus.INVALID})
+_BATCH_SIZE = 256
+_FLUSH_INTERVAL = 1.0
+# Bytes read at a time when looking back for the end of the last complete line.
+_TAIL_CHUNK = 4096
+
+
+def journal_key(asset: PosterAsset) -> str:
+    if asset.rating_key:
+        return f"{asset.rating_key}/{asset.kind}"
+    return f"{asset.asset_name}/{asset.kind}/{asset.season}/{asset.episode}"
+
+
+@dataclass(frozen=True)
+class JournalEntry:
+    library: str
+    key: str
+    target: str | None
+    status: DownloadStatus
+    asset: PosterAsset
+    size: int = 0
+    deduplicated: bool = False
+
+
+@dataclass
+class JournalState:
+    """What an earlier run recorded: its libraries, those it completed, and each asset's
+    latest outcome per library."""
+
+    libraries: tuple[str, ...] = ()
+    finished: set[str] = field(default_factory=set)
+    entries: dict[str, dict[str, JournalEntry]] = field(default_factory=dict)
+
+    def report(self, libraries: Iterable[str]) -> DownloadReport:
+        """The recorded outcomes of ``libraries`` as one report."""
+        lists = {status: AssetLog() for status in RETRY_STATUSES}
+        counts = {DownloadStatus.DOWNLOADED: 0, DownloadStatus.UNCHANGED: 0}
+        deduplicated = bytes_saved = index = 0
+        for library in libraries:
+            for entry in self.entries.get(library, {}).values():
+                if entry.status in lists:
+                    lists[entry.status].add(index, entry.asset)
+                    index += 1
+                elif entry.status in counts:
+                    counts[entry.status] += 1
+                if entry.deduplicated:
+                    deduplicated += 1
+                    bytes_saved += entry.size
+        return DownloadReport(
+            downloaded=counts[DownloadStatus.DOWNLOADED],
+            skipped_404=len(lists[DownloadStatus.MISSING]),
+            missing=lists[DownloadStatus.MISSING],
+            unchanged=counts[DownloadStatus.UNCHANGED],
+            deduplicated=deduplicated,
+            bytes_saved=bytes_saved,
+            failed=lists[DownloadStatus.FAILED],
+            invalid=lists[DownloadStatus.INVALID],
+        )
+
+    def retry_keys(self, library: str) -> dict[str, str | None]:
+        """Journal keys of ``library``'s assets to retry, with their rating keys."""
+        return {
+            key: entry.asset.rating_key
+            for key, entry in self.entries.get(library, {}).items()
+            if entry.status in RETRY_STATUSES
+        }
+
+
+class RunJournal:
+    """Records a run's outcomes; ``start`` begins a new journal, ``reopen`` continues one.
+
+    A reopened journal filters what is downloaded again (see ``select``): on resume, assets
+    it already recorded are skipped; with ``retry_failed``, only the assets it recorded as
+    missing, failed or invalid are downloaded.
+    """
+
+    def __init__(
+        self, path: Path, batch_size: int = _BATCH_SIZE, flush_interval: float = _FLUSH_INTERVAL
+    ) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._handle: IO[str] | None = None
+        self._pending: list[str] = []
+        self._flushed = time.monotonic()
+        self._lock = threading.Lock()
+        self._skip: dict[str, set[str]] = {}
+        self._only: dict[str, set[str]] | None = None
+
+    @classmethod
+    def for_output_dir(cls, output_dir: Path, shard: Shard | None = None) -> RunJournal:
+        name = f"journal.shard-{shard.index}-of-{shard.count}" if shard else "journal"
+        return cls(output_dir / STATE_DIR / f"{name}.jsonl")
+
+    def start(self, libraries: Iterable[str]) -> None:
+        """Replace any earlier journal with a new one for ``libraries``."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        header = {
+            "format": JOURNAL_FORMAT,
+            "version": JOURNAL_VERSION,
+            "started": datetime.now(UTC).isoformat(),
+            "libraries": list(libraries),
+        }
+        temp_path = self.path.with_name(f".{self.path.name}.tmp")
+        temp_path.write_text(json.dumps(header) + "\n", encoding="utf-8")
+        os.replace(temp_path, self.path)
+        self._handle = self.path.open("a", encoding="utf-8")
+
+    def reopen(self, retry_failed: bool = False) -> JournalState:
+        """Load the journal and append to it; raises FileNotFoundError or ValueError."""
+        state = read_journal(self.path)
+        if retry_failed:
+            self._only = {library: set(state.retry_keys(library)) for library in state.entries}
+        else:
+            self._skip = {library: set(entries) for library, entries in state.entries.items()}
+        _drop_partial_line(self.path)
+        self._handle = self.path.open("a", encoding="utf-8")
+        return state
+
+    def select(self, library: str, assets: Iterable[PosterAsset]) -> Iterator[PosterAsset]:
+        skip = self._skip.get(library, set())
+        only = self._only.get(library, set()) if self._only is not None else None
+        for asset in assets:
+            key = journal_key(asset)
+            if key not in skip and (only is None or key in only):
+                yield asset
+
+    def record(self, library: str, asset: PosterAsset, result: DownloadResult) -> None:
+        line = {
+            "library": library,
+            "key": journal_key(asset),
+            "target": result.path,
+            "status": result.status,
+            "size": result.size,
+            "deduplicated": result.deduplicated,
+            "asset": asdict(asset) | {"url": strip_token(asset.url)},
+        }
+        with self._lock:
+            self._pending.append(json.dumps(line) + "\n")
+            if (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._flushed >= self.flush_interval
+            ):
+                self._flush()
+
+    def finish(self, library: str) -> None:
+        """Record that ``library`` completed, and sync the journal."""
+        with self._lock:
+            self._pending.append(json.dumps({"finished": library}) + "\n")
+            self._flush(sync=True)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle is None:
+                return
+            self._flush(sync=True)
+            self._handle.close()
+            self._handle = None
+
+    def _flush(self, sync: bool = False) -> None:
+        if self._handle is None:
+            raise RuntimeError("The journal is not open.")
+        if self._pending:
+            self._handle.write("".join(self._pending))
+            self._pending.clear()
+        self._handle.flush()
+        if sync:
+            os.fsync(self._handle.fileno())
+        self._flushed = time.monotonic()
+
+
+def read_journal(path: Path) -> JournalState:
+    """Read a journal written by ``RunJournal``; raises ValueError for anything else."""
+    with path.open(encoding="utf-8") as handle:
+        lines = handle.read().splitlines()
+    if not lines:
+        raise ValueError(f"{path} is empty.")
+    header = _parse(path, lines[0])
+    if header.get("format") != JOURNAL_FORMAT or header.get("version") != JOURNAL_VERSION:
+        raise ValueError(f"{path} is not a posters journal (version {JOURNAL_VERSION}).")
+    state = JournalState(libraries=tuple(header["libraries"]))
+    for number, line in enumerate(lines[1:], start=2):
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as exc:
+            if number == len(lines):
+                # Cut short by a crash; the asset is downloaded again.
+                break
+            raise ValueError(f"{path}:{number} is not a journal entry: {exc}") from exc
+        if "finished" in data:
+            state.finished.add(data["finished"])
+            continue
+        entry = JournalEntry(
+            library=data["library"],
+            key=data["key"],
+            target=data["target"],
+            status=DownloadStatus(data["status"]),
+            asset=PosterAsset(**data["asset"]),
+            size=data["size"],
+            deduplicated=data["deduplicated"],
+        )
+        state.entries.setdefault(entry.library, {})[entry.key] = entry
+    return state
+
+
+def _drop_partial_line(path: Path) -> None:
+    """Cut off a line left unfinished by a crash, so appended entries start on their own."""
+    with path.open("rb+") as handle:
+        size = handle.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(end - _TAIL_CHUNK, 0)
+            handle.seek(start)
+            newline = handle.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        if end < size:
+            handle.truncate(end)
+            handle.flush()
+            os.fsync(handle.fileno())
+
+
+def _parse(path: Path, line: str) -> dict:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"{path} is not a posters journal: {exc}") from exc
@@ -1,9 +1,27 @@
 """Request/input schemas for posters repositories."""
 
+from datetime import datetime
 from typing import Annotated
 
 from pydantic import BaseModel, Field
 
+from posters.domain import FsyncPolicy, ImageFormat, ProgressMode
+
+
+class ArtworkSizeRequest(BaseModel):
+    max_width: Annotated[int | None, Field(ge=1)] = None
+    max_height: Annotated[int | None, Field(ge=1)] = None
+    quality: Annotated[int | None, Field(ge=1, le=100)] = None
+
+
+class ImageProcessingRequest(BaseModel):
+    verify: bool = False
+    max_width: Annotated[int | None, Field(ge=1)] = None
+    max_height: Annotated[int | None, Field(ge=1)] = None
+    format: ImageFormat | None = None
+    quality: Annotated[int | None, Field(ge=1, le=100)] = None
+    strip_metadata: bool = False
+
 
 class PostersDownloadRequest(BaseModel):
     base_url: str = Field(..., min_length=1)
@@ -13,3 +31,52 @@ class PostersDownloadRequest(BaseModel):
     output_dir: str = Field(default="posters", min_length=1)
     limit: Annotated[int | None, Field(ge=1)] = None
     dry_run: bool = False
+    estimate: bool = False
+    estimate_bytes: bool = False
+    estimate_samples: Annotated[int, Field(ge=1)] = 50
+    workers: Annotated[int, Field(ge=1)] = 1
+    parallel_libraries: Annotated[int, Field(ge=1)] = 1
+    max_in_flight: Annotated[int | None, Field(ge=1)] = None
+    adaptive: bool = False
+    min_in_flight: Annotated[int, Field(ge=1)] = 1
+    latency_target_ms: Annotated[float | None, Field(gt=0)] = None
+    max_rps: Annotated[float | None, Field(gt=0)] = None
+    max_bandwidth: Annotated[int | None, Field(ge=1)] = None
+    bulk_enumeration: bool = False
+    page_size: Annotated[int, Field(ge=1)] = 200
+    prefetch_pages: Annotated[int, Field(ge=0)] = 2
+    incremental: bool = False
+    since: datetime | None = None
+    changed_only: bool = False
+    dedup: bool = False
+    cache: bool = True
+    refresh_cache: bool = False
+    cache_dir: str | None = Field(default=None, min_length=1)
+    retries: Annotated[int, Field(ge=0)] = 3
+    retry_delay: Annotated[float, Field(ge=0)] = 0.5
+    breaker_cooldown: Annotated[float, Field(ge=0)] = 30.0
+    poster_size: ArtworkSizeRequest = ArtworkSizeRequest()
+    thumb_size: ArtworkSizeRequest = ArtworkSizeRequest()
+    fsync: FsyncPolicy = FsyncPolicy.NONE
+    progress: ProgressMode = ProgressMode.BAR
+    progress_out: str | None = Field(default=None, min_length=1)
+    # Continue the journal of the last run in output_dir instead of starting a new one.
+    resume: bool = False
+    retry_failed: bool = False
+    metrics_out: str | None = Field(default=None, min_length=1)
+    shard: Annotated[str | None, Field(pattern=r"^\d+/\d+$")] = None
+    report_out: str | None = Field(default=None, min_length=1)
+    storage: str = Field(default="local", min_length=1)
+    s3_endpoint_url: str | None = Field(default=None, min_length=1)
+    image_processing: ImageProcessingRequest = ImageProcessingRequest()
+    image_workers: Annotated[int | None, Field(ge=1)] = None
+
+
+class PostersWatchRequest(PostersDownloadRequest):
+    incremental: bool = True
+    alerts: bool = True
+    webhook_host: str = Field(default="127.0.0.1", min_length=1)
+    webhook_port: Annotated[int | None, Field(ge=0, le=65535)] = None
+    debounce: Annotated[float, Field(ge=0)] = 5.0
+    max_pending: Annotated[int, Field(ge=1)] = 10_000
+    reconcile_interval: Annotated[float, Field(ge=0)] = 60.0
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+from posters.domain import PosterAsset
+from posters.repositories.asset_log import AssetChain, AssetLog
+
+
+def _asset(number: int) -> PosterAsset:
+    return PosterAsset(
+        name="Show",
+        url=f"http://plex/library/metadata/{number}/thumb/1",
+        asset_name="Show (2001)",
+        kind="episode",
+        season=1,
+        episode=number,
+        rating_key=str(number),
+    )
+
+
+def test_iterates_in_index_order() -> None:
+    log = AssetLog()
+    for number in (3, 1, 2):
+        log.add(number, _asset(number))
+
+    assert [asset.episode for asset in log] == [1, 2, 3]
+    assert len(log) == 3
+    assert not log.spilled
+
+
+def test_spills_to_disk_past_the_memory_limit(tmp_path: Path) -> None:
+    log = AssetLog(max_in_memory=10, spill_dir=tmp_path)
+    for number in reversed(range(2500)):
+        log.add(number, _asset(number))
+
+    assert log.spilled
+    assert len(log) == 2500
+    assert [asset.episode for asset in log] == list(range(2500))
+    assert _asset(7) in log
+    (spill_file,) = tmp_path.iterdir()
+
+    del log
+    assert not spill_file.exists()
+
+
+def test_chain_concatenates_without_copying() -> None:
+    first, second = AssetLog(), AssetLog()
+    first.add(0, _asset(1))
+    second.add(0, _asset(2))
+
+    chain = AssetChain(AssetChain([], first), second)
+
+    assert [asset.episode for asset in chain] == [1, 2]
+    assert len(chain) == 2
+    assert repr(chain) == "AssetChain(len=2, parts=2)"
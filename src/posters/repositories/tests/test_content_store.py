@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from pathlib import Path
+from unittest.mock import patch
+
+from posters.repositories.content_store import ContentStore
+
+
+def test_absorb_links_duplicates_to_one_object(tmp_path: Path) -> None:
+    store = ContentStore(root=tmp_path / "objects")
+    first = tmp_path / "A" / "poster.jpg"
+    second = tmp_path / "B" / "poster.jpg"
+    for target in (first, second):
+        target.parent.mkdir()
+        target.write_bytes(b"same")
+
+    assert store.absorb(first, "ab12") is False
+    assert store.absorb(second, "ab12") is True
+    assert first.samefile(second)
+    assert (tmp_path / "objects" / "ab" / "ab12.jpg").samefile(first)
+
+
+def test_absorb_falls_back_to_copies_without_hardlinks(tmp_path: Path) -> None:
+    store = ContentStore(root=tmp_path / "objects")
+    first = tmp_path / "poster.jpg"
+    second = tmp_path / "Season01.jpg"
+    first.write_bytes(b"same")
+    second.write_bytes(b"same")
+
+    with patch("os.link", side_effect=OSError("hardlinks unsupported")):
+        assert store.absorb(first, "ab12") is False
+        assert store.absorb(second, "ab12") is False
+
+    assert (tmp_path / "objects" / "ab" / "ab12.jpg").read_bytes() == b"same"
+    assert second.read_bytes() == b"same"
+    assert not first.samefile(second)
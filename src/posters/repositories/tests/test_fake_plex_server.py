@@ -0,0 +1,199 @@
+from datetime import UTC, datetime
+from pathlib import Path
+
+from plexapi.server import PlexServer
+from requests.adapters import HTTPAdapter
+
+from posters.domain import PosterJob, Shard
+from posters.repositories.limits import AdaptiveLimit
+from posters.repositories.plex_posters import PlexPostersRepository
+from posters.repositories.poster_cache import PosterCache
+from tests.fake_plex import (
+    RESET_PATH,
+    STATS_PATH,
+    UPDATED_TIMESTAMP,
+    FakePlexConfig,
+    SyntheticLibrary,
+    fake_plex_server,
+)
+
+CONFIG = FakePlexConfig(
+    libraries=(
+        SyntheticLibrary("Movies", items=150),
+        SyntheticLibrary("TV Shows", type="show", items=3, seasons=2, episodes=3),
+    ),
+    payload_size=512,
+)
+
+
+def test_enumerates_synthetic_libraries_over_http() -> None:
+    with fake_plex_server(CONFIG) as base_url:
+        repository = PlexPostersRepository(plex=PlexServer(base_url, "token"))
+
+        movies = list(repository.iter_posters("Movies"))
+        shows = list(repository.iter_posters("TV Shows"))
+        bulk = list(repository.iter_posters("TV Shows", bulk=True))
+
+    assert len(movies) == 150
+    assert [asset.kind for asset in shows[:3]] == ["show", "season", "episode"]
+    assert len(shows) == 3 * (1 + 2 * (1 + 3))
+    assert bulk == shows
+    assert shows[-1].title == "Show 2 S02E03"
+
+
+def test_downloads_synthetic_posters_over_http(tmp_path: Path) -> None:
+    with fake_plex_server(CONFIG) as base_url:
+        repository = PlexPostersRepository(plex=PlexServer(base_url, "token"))
+        job = PosterJob(output_dir=str(tmp_path), library="TV Shows", base_url=base_url, workers=4)
+
+        report = repository.download_posters(job)
+
+    assert report.downloaded == 27
+    posters = sorted(tmp_path.rglob("*.jpg"))
+    assert len(posters) == 27
+    assert all(path.stat().st_size == 512 for path in posters)
+
+
+def test_cached_runs_list_the_section_once(tmp_path: Path) -> None:
+    cache = PosterCache(path=tmp_path / "cache.sqlite3")
+    with fake_plex_server(CONFIG) as base_url:
+        plex = PlexServer(base_url, "token")
+        repository = PlexPostersRepository(plex=plex, cache=cache)
+        job = PosterJob(output_dir=str(tmp_path / "posters"), library="TV Shows", base_url=base_url)
+
+        first = repository.download_posters(job)
+        plex._session.get(f"{base_url}{RESET_PATH}")
+        targets = list(repository.iter_targets(job))
+        requests = plex._session.get(f"{base_url}{STATS_PATH}").json()
+
+    assert first.downloaded == 27
+    assert len(targets) == 27
+    assert "listing" not in requests
+    assert "children" not in requests
+
+
+def test_connection_pool_fits_the_most_an_adaptive_limit_allows(tmp_path: Path) -> None:
+    with fake_plex_server(CONFIG) as base_url:
+        plex = PlexServer(base_url, "token")
+        repository = PlexPostersRepository(plex=plex, limit=AdaptiveLimit(minimum=1, maximum=40))
+        job = PosterJob(output_dir=str(tmp_path), library="TV Shows", base_url=base_url, workers=4)
+
+        repository.download_posters(job)
+
+    adapter = plex._session.get_adapter(base_url)
+    assert isinstance(adapter, HTTPAdapter)
+    assert adapter._pool_maxsize == 40
+
+
+def test_estimates_from_section_totals_without_listing_items(tmp_path: Path) -> None:
+    output_dir = tmp_path / "posters"
+    with fake_plex_server(CONFIG) as base_url:
+        plex = PlexServer(base_url, "token")
+        repository = PlexPostersRepository(plex=plex)
+        job = PosterJob(output_dir=str(output_dir), library="TV Shows", base_url=base_url)
+
+        estimate = repository.estimate_posters(job, samples=6)
+        requests = plex._session.get(f"{base_url}{STATS_PATH}").json()
+
+    assert estimate.counts == {"show": 3, "season": 6, "episode": 18}
+    assert estimate.sampled >= 3
+    assert estimate.projected_bytes == 27 * 512
+    assert "children" not in requests
+    assert not output_dir.exists()
+
+
+def test_lists_only_items_changed_since_a_timestamp() -> None:
+    config = FakePlexConfig(
+        libraries=(
+            SyntheticLibrary("Movies", items=150, changed=2),
+            SyntheticLibrary("TV Shows", type="show", items=3, seasons=2, episodes=3, changed=1),
+        )
+    )
+    since = datetime.fromtimestamp(UPDATED_TIMESTAMP - 1, UTC)
+    with fake_plex_server(config) as base_url:
+        repository = PlexPostersRepository(plex=PlexServer(base_url, "token"))
+
+        movies = list(repository.iter_posters("Movies", since=since))
+        shows = list(repository.iter_posters("TV Shows", since=since))
+
+    assert [asset.name for asset in movies] == ["Movie 148", "Movie 149"]
+    # The show changed through an episode, so all of its posters are listed again.
+    assert {asset.name for asset in shows} == {"Show 2"}
+    assert len(shows) == 1 + 2 * (1 + 3)
+
+
+def test_changed_only_runs_resume_from_the_watermark(tmp_path: Path) -> None:
+    with fake_plex_server(CONFIG) as base_url:
+        plex = PlexServer(base_url, "token")
+        repository = PlexPostersRepository(plex=plex)
+        job = PosterJob(
+            output_dir=str(tmp_path), library="Movies", base_url=base_url, changed_only=True
+        )
+
+        first = repository.download_posters(job)
+        plex._session.get(f"{base_url}{RESET_PATH}")
+        second = repository.download_posters(job)
+        requests = plex._session.get(f"{base_url}{STATS_PATH}").json()
+
+    assert first.downloaded == 150
+    assert (tmp_path / ".plex-metadata" / "watermarks" / "Movies.json").exists()
+    assert second.downloaded == 0
+    assert "artwork" not in requests
+
+
+def test_shards_split_libraries_disjointly_and_keep_shows_together(tmp_path: Path) -> None:
+    with fake_plex_server(CONFIG) as base_url:
+        repository = PlexPostersRepository(plex=PlexServer(base_url, "token"))
+        shards = [Shard(1, 2), Shard(2, 2)]
+
+        movies = [list(repository.iter_posters("Movies", shard=shard)) for shard in shards]
+        shows = [list(repository.iter_posters("TV Shows", shard=shard)) for shard in shards]
+        reports = [
+            repository.download_posters(
+                PosterJob(
+                    output_dir=str(tmp_path),
+                    library="Movies",
+                    base_url=base_url,
+                    incremental=True,
+                    shard=shard,
+                )
+            )
+            for shard in shards
+        ]
+
+    assert all(movies) and sum(map(len, movies)) == 150
+    assert not {a.asset_name for a in movies[0]} & {a.asset_name for a in movies[1]}
+    assert sum(map(len, shows)) == 27
+    for assets in shows:
+        assert len(assets) % 9 == 0
+    assert [report.downloaded for report in reports] == [len(assets) for assets in movies]
+    manifests = sorted(path.name for path in (tmp_path / ".plex-metadata" / "manifests").iterdir())
+    assert manifests == ["Movies.shard-1-of-2.json", "Movies.shard-2-of-2.json"]
+
+
+def test_enumerates_in_container_pages_and_stops_fetching_early() -> None:
+    with fake_plex_server(CONFIG) as base_url:
+        plex = PlexServer(base_url, "token")
+        paged = PlexPostersRepository(plex=plex, page_size=40, prefetch_pages=2)
+        sequential = PlexPostersRepository(plex=plex, page_size=40, prefetch_pages=0)
+
+        movies = list(paged.iter_posters("Movies"))
+        listed = plex._session.get(f"{base_url}{STATS_PATH}").json()["listing"]
+        assert [asset.asset_name for asset in sequential.iter_posters("Movies")] == [
+            asset.asset_name for asset in movies
+        ]
+        bulk = list(
+            PlexPostersRepository(plex=plex, page_size=5).iter_posters("TV Shows", bulk=True)
+        )
+        plex._session.get(f"{base_url}{RESET_PATH}")
+        assets = iter(paged.iter_posters("Movies"))
+        first = [next(assets) for _ in range(10)]
+        del assets
+        early = plex._session.get(f"{base_url}{STATS_PATH}").json()["listing"]
+
+    assert len(movies) == 150
+    assert [asset.name for asset in movies[:2]] == ["Movie 0", "Movie 1"]
+    assert listed == 4
+    assert len(bulk) == 27
+    assert len(first) == 10
+    assert early <= 3
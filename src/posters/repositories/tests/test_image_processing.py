@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import io
+from pathlib import Path
+
+from pytest import importorskip
+
+from posters.domain import ImageFormat, ImageProcessing
+from posters.repositories.image_processing import process_image
+
+Image = importorskip("PIL.Image")
+
+
+def _jpeg(width: int = 400, height: int = 600, **params) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 40, 40)).save(buffer, format="JPEG", **params)
+    return buffer.getvalue()
+
+
+def test_verify_only_leaves_valid_files_untouched(tmp_path: Path) -> None:
+    path = tmp_path / "poster.jpg"
+    path.write_bytes(_jpeg())
+
+    result = process_image(str(path), ImageProcessing())
+
+    assert result.valid
+    assert path.read_bytes() == _jpeg()
+    assert result.size == path.stat().st_size
+
+
+def test_truncated_and_garbage_files_are_invalid(tmp_path: Path) -> None:
+    truncated = tmp_path / "truncated.jpg"
+    truncated.write_bytes(_jpeg()[:400])
+    garbage = tmp_path / "garbage.jpg"
+    garbage.write_bytes(b"<html>Not found</html>")
+
+    assert not process_image(str(truncated), ImageProcessing()).valid
+    result = process_image(str(garbage), ImageProcessing())
+    assert not result.valid
+    assert result.error
+    assert garbage.read_bytes() == b"<html>Not found</html>"
+
+
+def test_resizes_within_box_and_strips_metadata(tmp_path: Path) -> None:
+    path = tmp_path / "poster.jpg"
+    exif = Image.Exif()
+    exif[0x010F] = "Camera maker"
+    path.write_bytes(_jpeg(comment=b"scanner", exif=exif))
+    options = ImageProcessing(max_width=100, max_height=1000, quality=80, strip_metadata=True)
+
+    result = process_image(str(path), options, digest=True)
+
+    assert result.valid and result.digest is not None
+    with Image.open(path) as image:
+        assert image.size == (100, 150)
+        assert image.format == "JPEG"
+        assert "exif" not in image.info
+        assert "comment" not in image.info
+
+
+def test_reencodes_to_webp(tmp_path: Path) -> None:
+    path = tmp_path / "poster.webp"
+    path.write_bytes(_jpeg())
+
+    result = process_image(str(path), ImageProcessing(format=ImageFormat.WEBP))
+
+    assert result.valid
+    with Image.open(path) as image:
+        assert image.format == "WEBP"
+        assert image.size == (400, 600)
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import pytest
+from plexapi.server import PlexServer
+
+from posters.domain import PosterJob
+from posters.repositories.limits import AdaptiveLimit, LimitChange, TokenBucket
+from posters.repositories.plex_posters import PlexPostersRepository
+from posters.repositories.retry import RetryPolicy
+from tests.fake_plex import FakePlexConfig, SyntheticLibrary, fake_plex_server
+
+
+def _fill(limit: AdaptiveLimit, count: int, seconds: float, failed: bool = False) -> None:
+    """Observe ``count`` requests, each holding every slot the limit allows."""
+    for _ in range(count):
+        slots = [limit.slot() for _ in range(limit.limit)]
+        for slot in slots:
+            slot.__enter__()
+        limit.observe(seconds, failed)
+        for slot in slots:
+            slot.__exit__(None, None, None)
+
+
+def test_adaptive_limit_grows_while_healthy_and_halves_on_trouble() -> None:
+    changes: list[LimitChange] = []
+    limit = AdaptiveLimit(minimum=2, maximum=5, min_window=2, on_change=changes.append)
+
+    _fill(limit, 20, 0.1)
+    assert limit.limit == 5
+    _fill(limit, 5, 0.1, failed=True)
+    assert limit.limit == 2
+    _fill(limit, 10, 0.1)
+    _fill(limit, 5, 0.5)
+
+    assert [(change.previous, change.limit) for change in changes[:4]] == [
+        (2, 3),
+        (3, 4),
+        (4, 5),
+        (5, 2),
+    ]
+    assert changes[3].reason.startswith("errors")
+    assert changes[-1].reason == "latency 500 ms > 200 ms"
+    assert str(changes[0]) == "Concurrency 2 -> 3 (healthy and saturated)"
+
+
+def test_adaptive_limit_only_grows_when_its_slots_are_used() -> None:
+    limit = AdaptiveLimit(minimum=2, maximum=5, min_window=2)
+
+    for _ in range(10):
+        limit.observe(0.1, False)
+
+    assert limit.limit == 2
+
+
+def test_adaptive_limit_blocks_callers_beyond_the_limit() -> None:
+    limit = AdaptiveLimit(minimum=1, maximum=4)
+    entered = threading.Event()
+
+    def second_caller() -> None:
+        with limit.slot():
+            entered.set()
+
+    with limit.slot():
+        thread = threading.Thread(target=second_caller)
+        thread.start()
+        assert not entered.wait(0.05)
+    thread.join(timeout=1)
+
+    assert entered.is_set()
+    with pytest.raises(ValueError):
+        AdaptiveLimit(minimum=3, maximum=2)
+
+
+def test_token_bucket_paces_callers_after_a_burst() -> None:
+    now = [0.0]
+    slept: list[float] = []
+
+    def sleep(seconds: float) -> None:
+        slept.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=100, burst=50, clock=lambda: now[0], sleep=sleep)
+
+    waits = [bucket.take(25) for _ in range(4)]
+    assert waits == [0.0, 0.0, 0.25, 0.25]
+    now[0] += 10
+    assert bucket.take(200) == pytest.approx(1.5)
+    assert slept == [0.25, 0.25, pytest.approx(1.5)]
+
+
+def test_adaptive_downloads_raise_concurrency_and_respect_bandwidth(tmp_path: Path) -> None:
+    config = FakePlexConfig(libraries=(SyntheticLibrary("Movies", items=60),), payload_size=1024)
+    changes: list[LimitChange] = []
+    limit = AdaptiveLimit(minimum=1, maximum=6, latency_target=5.0, on_change=changes.append)
+    bandwidth = TokenBucket(rate=1024 * 1024)
+    with fake_plex_server(config) as base_url:
+        repository = PlexPostersRepository(
+            plex=PlexServer(base_url, "token"),
+            limit=limit,
+            bandwidth=bandwidth,
+            retry=RetryPolicy(attempts=2, base_delay=0),
+        )
+        job = PosterJob(output_dir=str(tmp_path), library="Movies", base_url=base_url, workers=6)
+
+        report = repository.download_posters(job)
+
+    assert report.downloaded == 60
+    assert changes and all(change.limit > change.previous for change in changes)
+    assert limit.limit > 1
@@ -0,0 +1,74 @@
+import json
+from collections import Counter
+from pathlib import Path
+
+from posters.repositories.metrics import Endpoint, Phase, PosterMetrics, timed_iter
+
+
+def _metrics() -> PosterMetrics:
+    metrics = PosterMetrics()
+    for name in ("Movies", 'TV "Shows"'):
+        library = metrics.library(name)
+        library.observe_request(Endpoint.ARTWORK, 0.003)
+        library.observe_request(Endpoint.ARTWORK, 0.2)
+        library.observe_request(Endpoint.ARTWORK, 60.0)
+        library.add_phase(Phase.DOWNLOAD, 2.0)
+        library.add_bytes(1000)
+        library.count_assets(Counter({"downloaded": 3}))
+    return metrics
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    histogram = _metrics().library("Movies").requests[Endpoint.ARTWORK]
+
+    buckets = dict(histogram.cumulative())
+
+    assert buckets["0.005"] == 1
+    assert buckets["0.1"] == 1
+    assert buckets["0.25"] == 2
+    assert buckets["10.0"] == 2
+    assert buckets["+Inf"] == 3
+    assert histogram.count == 3
+
+
+def test_prometheus_text_groups_samples_by_family() -> None:
+    text = _metrics().to_prometheus()
+
+    lines = text.splitlines()
+    families = [line.split()[2] for line in lines if line.startswith("# TYPE")]
+    assert len(families) == len(set(families))
+    assert 'plex_posters_downloaded_bytes{library="TV \\"Shows\\""} 1000' in lines
+    assert 'plex_posters_download_bytes_per_second{library="Movies"} 500.0' in lines
+    assert (
+        "plex_posters_request_duration_seconds_bucket"
+        '{library="Movies",endpoint="artwork",le="+Inf"} 3' in lines
+    )
+    bytes_index = lines.index("# TYPE plex_posters_downloaded_bytes gauge")
+    assert all("downloaded_bytes" in line for line in lines[bytes_index + 1 : bytes_index + 3])
+
+
+def test_write_selects_format_from_suffix(tmp_path: Path) -> None:
+    metrics = _metrics()
+
+    metrics.write(tmp_path / "run.json")
+    metrics.write(tmp_path / "textfile" / "posters.prom")
+
+    data = json.loads((tmp_path / "run.json").read_text())
+    assert data["libraries"]["Movies"]["requests"]["artwork"]["count"] == 3
+    assert data["libraries"]["Movies"]["assets"] == {"downloaded": 3}
+    assert (tmp_path / "textfile" / "posters.prom").read_text().startswith("# TYPE")
+    assert sorted(path.name for path in tmp_path.rglob("*")) == [
+        "posters.prom",
+        "run.json",
+        "textfile",
+    ]
+
+
+def test_timed_iter_records_phase_even_when_stopped_early() -> None:
+    library = PosterMetrics().library("Movies")
+
+    items = timed_iter(iter(range(10)), library, Phase.ENUMERATE)
+    assert next(items) == 0
+    items.close()
+
+    assert Phase.ENUMERATE in library.phases
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from posters.domain import PosterAsset
+from posters.repositories.plex_urls import strip_token
+from posters.repositories.poster_cache import PosterCache
+
+
+def _assets(count: int) -> list[PosterAsset]:
+    return [
+        PosterAsset(
+            name=f"Movie {number}",
+            url=f"http://plex/library/metadata/{number}/thumb/1?X-Plex-Token=secret",
+            asset_name=f"Movie {number}",
+            kind="movie",
+            rating_key=str(number),
+        )
+        for number in range(count)
+    ]
+
+
+def test_record_then_load_round_trips_without_token(tmp_path: Path) -> None:
+    cache = PosterCache(path=tmp_path / "cache.sqlite3")
+
+    passed_through = list(cache.record("server/1", "10:20", _assets(3)))
+    loaded = cache.load("server/1", "10:20")
+
+    assert [asset.title for asset in passed_through] == ["Movie 0", "Movie 1", "Movie 2"]
+    assert loaded is not None
+    (first, *_) = list(loaded)
+    assert first.url == "/library/metadata/0/thumb/1"
+    assert first.rating_key == "0"
+    assert b"secret" not in (tmp_path / "cache.sqlite3").read_bytes()
+
+
+def test_changed_stamp_or_refresh_is_a_miss(tmp_path: Path) -> None:
+    path = tmp_path / "cache.sqlite3"
+    list(PosterCache(path=path).record("server/1", "10:20", _assets(1)))
+
+    assert PosterCache(path=path).load("server/1", "11:20") is None
+    assert PosterCache(path=path, refresh=True).load("server/1", "10:20") is None
+
+
+def test_partial_enumeration_is_not_cached(tmp_path: Path) -> None:
+    cache = PosterCache(path=tmp_path / "cache.sqlite3")
+
+    recording = cache.record("server/1", "10:20", _assets(3))
+    next(recording)
+    recording.close()
+
+    assert cache.load("server/1", "10:20") is None
+
+
+def test_failed_enumeration_is_not_cached(tmp_path: Path) -> None:
+    cache = PosterCache(path=tmp_path / "cache.sqlite3")
+
+    def failing() -> Iterator[PosterAsset]:
+        yield from _assets(2)
+        raise RuntimeError("listing failed")
+
+    with pytest.raises(RuntimeError):
+        list(cache.record("server/1", "10:20", failing()))
+
+    assert cache.load("server/1", "10:20") is None
+
+
+def test_evicts_least_recently_used_sections_over_budget(tmp_path: Path) -> None:
+    cache = PosterCache(path=tmp_path / "cache.sqlite3", max_assets=4)
+
+    list(cache.record("server/1", "a", _assets(3)))
+    list(cache.record("server/2", "b", _assets(3)))
+
+    assert cache.load("server/1", "a") is None
+    assert cache.load("server/2", "b") is not None
+
+
+def test_strip_token_keeps_other_query_parameters() -> None:
+    url = "http://plex:32400/photo/:/transcode?width=100&X-Plex-Token=secret"
+    assert strip_token(url) == "/photo/:/transcode?width=100"
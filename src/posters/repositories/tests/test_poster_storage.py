@@ -0,0 +1,199 @@
+import io
+import tarfile
+import zipfile
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from plexapi.server import PlexServer
+from requests import RequestException
+
+from posters.domain import PosterJob
+from posters.repositories.plex_posters import PlexPostersRepository
+from posters.repositories.poster_storage import (
+    LocalStorage,
+    PackStorage,
+    S3Storage,
+    S3StorageError,
+    open_storage,
+)
+from tests.fake_plex import STATS_PATH, FakePlexConfig, SyntheticLibrary, fake_plex_server
+from tests.fake_s3 import FakeClientError, FakeS3Client
+
+CONFIG = FakePlexConfig(
+    libraries=(SyntheticLibrary("TV Shows", type="show", items=3, seasons=2, episodes=3),),
+    payload_size=512,
+)
+
+
+def _pack_members(path: Path) -> dict[str, bytes]:
+    if path.suffix == ".zip":
+        with zipfile.ZipFile(path) as archive:
+            return {name: archive.read(name) for name in archive.namelist()}
+    with tarfile.open(path) as archive:
+        return {
+            member.name: archive.extractfile(member).read()  # type: ignore[union-attr]
+            for member in archive.getmembers()
+        }
+
+
+@pytest.mark.parametrize("kind", ["tar", "zip"])
+def test_pack_keeps_committed_posters_only(tmp_path: Path, kind: str) -> None:
+    pack = PackStorage(tmp_path / f"posters.{kind}", kind)
+    for path, chunks in [
+        ("Movie (1999)/poster.jpg", [b"abc", b"def"]),
+        ("Movie (1999)/poster.jpg", [b"second copy"]),
+    ]:
+        writer = pack.writer(path)
+        for chunk in chunks:
+            writer.write(chunk)
+        writer.commit()
+    aborted = pack.writer("Other/poster.jpg")
+    aborted.write(b"partial")
+    aborted.abort()
+
+    assert pack.stored_size("Movie (1999)/poster.jpg") == 6
+    assert not (tmp_path / f"posters.{kind}").exists()
+    pack.close()
+
+    assert _pack_members(tmp_path / f"posters.{kind}") == {"Movie (1999)/poster.jpg": b"abcdef"}
+    assert [path.name for path in tmp_path.iterdir()] == [f"posters.{kind}"]
+
+
+def test_discarded_pack_keeps_the_previous_archive(tmp_path: Path) -> None:
+    path = tmp_path / "posters.tar"
+    for body, finish in ((b"complete", PackStorage.close), (b"partial", PackStorage.discard)):
+        pack = PackStorage(path, "tar")
+        writer = pack.writer("Movie (1999)/poster.jpg")
+        writer.write(body)
+        writer.commit()
+        finish(pack)
+
+    assert _pack_members(path) == {"Movie (1999)/poster.jpg": b"complete"}
+    assert [child.name for child in tmp_path.iterdir()] == ["posters.tar"]
+
+
+def test_s3_uploads_large_bodies_in_parts() -> None:
+    client = FakeS3Client()
+    storage = S3Storage(client, "bucket", prefix="/assets/", part_size=4)
+    body = bytes(range(10))
+
+    writer = storage.writer("Movie/poster.jpg")
+    for index in range(0, len(body), 3):
+        writer.write(body[index : index + 3])
+    writer.commit()
+    small = storage.writer("Movie/background.png")
+    small.write(b"png")
+    small.commit()
+
+    assert client.objects["bucket", "assets/Movie/poster.jpg"] == body
+    assert client.part_sizes["assets/Movie/poster.jpg"] == [4, 4, 2]
+    assert client.content_types["bucket", "assets/Movie/poster.jpg"] == "image/jpeg"
+    assert client.objects["bucket", "assets/Movie/background.png"] == b"png"
+    assert storage.stored_size("Movie/poster.jpg") == 10
+    assert storage.stored_size("Missing/poster.jpg") is None
+    assert storage.location("Movie/poster.jpg") == "s3://bucket/assets/Movie/poster.jpg"
+
+
+def test_s3_aborts_uploads_that_fail() -> None:
+    client = FakeS3Client()
+    storage = S3Storage(client, "bucket", part_size=4)
+
+    writer = storage.writer("Movie/poster.jpg")
+    writer.write(b"12345678")
+    writer.abort()
+
+    assert client.aborted == ["Movie/poster.jpg"]
+    assert storage.stored_size("Movie/poster.jpg") is None
+
+
+def test_s3_failures_are_reported_as_request_errors(tmp_path: Path) -> None:
+    client = FakeS3Client()
+    client.put_object = MagicMock(side_effect=FakeClientError("AccessDenied"))
+    client.head_object = MagicMock(side_effect=ConnectionRefusedError("no endpoint"))
+    storage = S3Storage(client, "bucket", "posters")
+
+    with pytest.raises(S3StorageError, match="HeadObject s3://bucket/posters/Movie/poster.jpg"):
+        storage.stored_size("Movie/poster.jpg")
+    with fake_plex_server(CONFIG) as base_url:
+        repository = PlexPostersRepository(plex=PlexServer(base_url, "token"), storage=storage)
+        job = PosterJob(output_dir=str(tmp_path), library="TV Shows", base_url=base_url)
+        with pytest.raises(RequestException, match="PutObject .*AccessDenied"):
+            repository.download_posters(job)
+
+
+def test_opens_storage_from_spec(tmp_path: Path) -> None:
+    assert open_storage("local", tmp_path) == LocalStorage(tmp_path)
+    pack = open_storage(f"zip:{tmp_path / 'posters.zip'}", tmp_path)
+    assert isinstance(pack, PackStorage) and pack.kind == "zip"
+    pack.close()
+    for spec in ("ftp://host/posters", "tar:", "s3://"):
+        with pytest.raises(ValueError):
+            open_storage(spec, tmp_path)
+
+
+def test_downloads_stream_into_a_pack(tmp_path: Path) -> None:
+    pack = PackStorage(tmp_path / "posters.tar", "tar")
+    with fake_plex_server(CONFIG) as base_url:
+        repository = PlexPostersRepository(plex=PlexServer(base_url, "token"), storage=pack)
+        job = PosterJob(
+            output_dir=str(tmp_path / "state"), library="TV Shows", base_url=base_url, workers=4
+        )
+
+        report = repository.download_posters(job)
+    pack.close()
+
+    members = _pack_members(tmp_path / "posters.tar")
+    assert report.downloaded == 27
+    assert len(members) == 27
+    assert all(len(body) == 512 for body in members.values())
+    assert not list((tmp_path / "state").rglob("*.jpg"))
+
+
+def test_incremental_uploads_skip_posters_already_in_the_bucket(tmp_path: Path) -> None:
+    client = FakeS3Client()
+    with fake_plex_server(CONFIG) as base_url:
+        plex = PlexServer(base_url, "token")
+        repository = PlexPostersRepository(
+            plex=plex, storage=S3Storage(client, "bucket", "posters")
+        )
+        job = PosterJob(
+            output_dir=str(tmp_path), library="TV Shows", base_url=base_url, incremental=True
+        )
+
+        first = repository.download_posters(job)
+        second = repository.download_posters(job)
+        artwork = plex._session.get(f"{base_url}{STATS_PATH}").json()["artwork"]
+
+    assert (first.downloaded, second.downloaded, second.unchanged) == (27, 0, 27)
+    assert artwork == 27
+    assert len(client.objects) == 27
+    assert all(key.startswith("posters/Show ") for _, key in client.objects)
+
+
+def test_dedup_and_processing_need_local_storage(tmp_path: Path) -> None:
+    repository = PlexPostersRepository(
+        plex=MagicMock(), storage=S3Storage(FakeS3Client(), "bucket")
+    )
+    job = PosterJob(output_dir=str(tmp_path), library="Movies", base_url="http://plex", dedup=True)
+
+    with pytest.raises(RuntimeError, match="local storage"):
+        repository.download_posters(job)
+
+
+def test_s3_storage_against_moto() -> None:
+    moto = pytest.importorskip("moto")
+    boto3 = pytest.importorskip("boto3")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="bucket")
+        storage = S3Storage(client, "bucket", "posters", part_size=5 * 1024 * 1024)
+        body = io.BytesIO(bytes(11 * 1024 * 1024))
+
+        writer = storage.writer("Movie/poster.jpg")
+        while chunk := body.read(1024 * 1024):
+            writer.write(chunk)
+        writer.commit()
+
+        assert storage.stored_size("Movie/poster.jpg") == 11 * 1024 * 1024
+        assert storage.stored_size("Missing/poster.jpg") is None
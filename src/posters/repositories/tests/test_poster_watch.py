@@ -0,0 +1,242 @@
+import json
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from unittest.mock import MagicMock
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from plexapi.server import PlexServer
+from pytest import raises
+
+from posters.domain import LibraryChange, PosterJob
+from posters.repositories.plex_posters import DownloadReport, PlexPostersRepository
+from posters.repositories.poster_watch import (
+    ChangeQueue,
+    PosterWatcher,
+    parse_alert,
+    parse_webhook,
+    serve_webhooks,
+)
+from tests.fake_plex import FakePlexConfig, SyntheticLibrary, fake_plex_server
+
+CONFIG = FakePlexConfig(
+    libraries=(
+        SyntheticLibrary("Movies", items=20),
+        SyntheticLibrary("TV Shows", type="show", items=3, seasons=2, episodes=3),
+    ),
+    payload_size=256,
+)
+
+
+def _multipart(payload: dict) -> tuple[bytes, str]:
+    boundary = "plex-boundary"
+    body = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="payload"\r\n'
+        "Content-Type: application/json\r\n\r\n"
+        f"{json.dumps(payload)}\r\n"
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="thumb"; filename="poster.jpg"\r\n'
+        "Content-Type: image/jpeg\r\n\r\n"
+        "\xff\xd8\xff\r\n"
+        f"--{boundary}--\r\n"
+    ).encode("latin-1")
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def test_parses_processed_timeline_alerts() -> None:
+    alert = {
+        "type": "timeline",
+        "TimelineEntry": [
+            {
+                "identifier": "com.plexapp.plugins.library",
+                "sectionID": "1",
+                "itemID": "7",
+                "type": 1,
+                "state": 5,
+            },
+            {
+                "identifier": "com.plexapp.plugins.library",
+                "sectionID": "1",
+                "itemID": "8",
+                "type": 1,
+                "state": 0,
+            },
+            {
+                "identifier": "com.plexapp.plugins.library",
+                "sectionID": "-1",
+                "itemID": "9",
+                "type": 4,
+                "state": 5,
+            },
+        ],
+    }
+
+    assert parse_alert(alert) == [LibraryChange("1", "7")]
+    assert parse_alert({"type": "activity", "ActivityNotification": []}) == []
+
+
+def test_parses_multipart_and_json_webhooks() -> None:
+    payload = {"event": "library.new", "Metadata": {"librarySectionID": 2, "ratingKey": "42"}}
+
+    assert parse_webhook(*_multipart(payload)) == [LibraryChange("2", "42")]
+    assert parse_webhook(json.dumps(payload).encode(), "application/json") == [
+        LibraryChange("2", "42")
+    ]
+    assert parse_webhook(*_multipart(payload | {"event": "media.play"})) == []
+    with raises(ValueError):
+        parse_webhook(b"<xml/>", "text/xml")
+
+
+def test_queue_coalesces_repeated_changes_until_quiet() -> None:
+    changes = ChangeQueue(debounce=0.1)
+    changes.put(LibraryChange("1", "7"))
+    changes.put(LibraryChange("1", "8"))
+    changes.put(LibraryChange("1", "7"))
+
+    assert changes.take(timeout=0) == []
+    assert changes.take(timeout=1) == [LibraryChange("1", "7"), LibraryChange("1", "8")]
+    assert len(changes) == 0
+
+
+def test_full_queue_pushes_back_then_drops_and_flags_overflow() -> None:
+    changes = ChangeQueue(debounce=0, max_pending=1)
+    changes.put(LibraryChange("1", "1"))
+
+    started = time.monotonic()
+    assert not changes.put(LibraryChange("1", "2"), timeout=0.05)
+    assert time.monotonic() - started >= 0.05
+    assert changes.put(LibraryChange("1", "1"), timeout=0)
+    assert changes.take_overflow() and not changes.take_overflow()
+    assert changes.dropped == 1
+    assert changes.take(timeout=1) == [LibraryChange("1", "1")]
+
+
+def test_webhook_server_queues_changes_and_rejects_garbage() -> None:
+    changes = ChangeQueue(debounce=0)
+    body, content_type = _multipart(
+        {"event": "library.new", "Metadata": {"librarySectionID": 1, "ratingKey": 5}}
+    )
+    with serve_webhooks(changes) as url:
+        with urlopen(Request(url, body, {"Content-Type": content_type})) as response:
+            status = response.status
+        with raises(HTTPError) as rejected:
+            urlopen(Request(url, b"nope", {"Content-Type": "application/json"}))
+
+    assert status == 204
+    assert rejected.value.code == 400
+    assert changes.take(timeout=1) == [LibraryChange("1", "5")]
+
+
+def test_watcher_downloads_only_changed_items(tmp_path: Path) -> None:
+    with fake_plex_server(CONFIG) as base_url:
+        repository = PlexPostersRepository(plex=PlexServer(base_url, "token"))
+        shows = list(repository.iter_posters("TV Shows"))
+        episode = next(asset for asset in shows if asset.kind == "episode")
+        movie = next(iter(repository.iter_posters("Movies")))
+        changes = ChangeQueue(debounce=0)
+        watcher = PosterWatcher(
+            repository=repository,
+            job=PosterJob(output_dir=str(tmp_path), library="", base_url=base_url),
+            libraries={"1": "Movies", "2": "TV Shows"},
+            changes=changes,
+            reconcile_interval=None,
+        )
+
+        watcher.download_changes(
+            [
+                LibraryChange("1", str(movie.rating_key)),
+                LibraryChange("2", str(episode.rating_key)),
+                LibraryChange("9", "1"),
+            ]
+        )
+
+    posters = sorted(path.relative_to(tmp_path) for path in tmp_path.rglob("*.jpg"))
+    assert len(posters) == 1 + 9
+    assert Path(movie.asset_name) / "poster.jpg" in posters
+    assert {path.parts[0] for path in posters} == {movie.asset_name, episode.asset_name}
+
+
+def test_watcher_sweeps_on_start_and_after_overflow() -> None:
+    repository = MagicMock()
+    repository.download_posters.return_value = DownloadReport(
+        downloaded=0, skipped_404=0, missing=[]
+    )
+    stop = threading.Event()
+
+    def watcher(changes: ChangeQueue, reconcile_interval: float | None) -> PosterWatcher:
+        return PosterWatcher(
+            repository=repository,
+            job=PosterJob(output_dir="posters", library="", base_url="http://plex"),
+            libraries={"1": "Movies"},
+            changes=changes,
+            reconcile_interval=reconcile_interval,
+            on_report=lambda library, report: stop.set(),
+        )
+
+    watcher(ChangeQueue(), reconcile_interval=3600).run(stop)
+    stop.clear()
+    overflowing = ChangeQueue(debounce=60, max_pending=1)
+    overflowing.put(LibraryChange("1", "1"))
+    overflowing.put(LibraryChange("1", "2"), timeout=0)
+    watcher(overflowing, reconcile_interval=None).run(stop)
+
+    jobs = [call.args[0] for call in repository.download_posters.call_args_list]
+    assert [(job.library, job.changed_only, job.rating_keys) for job in jobs] == [
+        ("Movies", True, ()),
+        ("Movies", True, ()),
+    ]
+
+
+def test_changes_are_downloaded_while_a_sweep_runs() -> None:
+    sweeping = threading.Event()
+    finish_sweep = threading.Event()
+    stop = threading.Event()
+    downloads: list[tuple[str, bool, tuple[str, ...]]] = []
+
+    def download_posters(job: PosterJob) -> DownloadReport:
+        if job.changed_only and job.library == "Movies":
+            sweeping.set()
+            finish_sweep.wait(5)
+        downloads.append((job.library, job.changed_only, job.rating_keys))
+        if job.rating_keys == ("7",):
+            stop.set()
+        return DownloadReport(downloaded=0, skipped_404=0, missing=[])
+
+    repository = MagicMock()
+    repository.download_posters.side_effect = download_posters
+    changes = ChangeQueue(debounce=0)
+    watcher = PosterWatcher(
+        repository=repository,
+        job=PosterJob(output_dir="posters", library="", base_url="http://plex"),
+        libraries={"1": "Movies", "2": "TV Shows"},
+        changes=changes,
+        reconcile_interval=3600,
+    )
+    thread = threading.Thread(target=watcher.run, args=(stop,))
+    thread.start()
+    assert sweeping.wait(5)
+    changes.put(LibraryChange("2", "5"))
+    changes.put(LibraryChange("1", "6"))
+    assert _eventually(lambda: ("TV Shows", False, ("5",)) in downloads)
+    # The change to the library being swept waits for the sweep, outside the queue.
+    assert ("Movies", False, ("6",)) not in downloads
+    assert len(changes) == 0
+    finish_sweep.set()
+    assert _eventually(lambda: ("Movies", False, ("6",)) in downloads)
+    changes.put(LibraryChange("2", "7"))
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert downloads.index(("Movies", True, ())) < downloads.index(("Movies", False, ("6",)))
+
+
+def _eventually(check: Callable[[], bool], timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not check():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
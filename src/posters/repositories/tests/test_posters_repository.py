@@ -1,14 +1,32 @@
 from __future__ import annotations
 
-from collections.abc import Buffer
+import io
+import time
+from collections.abc import Buffer, Iterator
+from dataclasses import replace
+from datetime import datetime
 from pathlib import Path
+from threading import Event, Lock
 from typing import cast
 from unittest.mock import MagicMock, patch
 
-from pytest import fixture
-
-from posters.domain import PosterJob
-from posters.repositories.plex_posters import PlexPostersRepository
+from pytest import fixture, importorskip, raises
+from requests import ConnectionError, HTTPError
+from requests.exceptions import ChunkedEncodingError
+
+from posters.domain import ArtworkSize, FsyncPolicy, ImageFormat, ImageProcessing, PosterJob
+from posters.repositories.limits import ConcurrencyLimit
+from posters.repositories.metrics import Endpoint, Phase, PosterMetrics
+from posters.repositories.plex_posters import (
+    AssetNameResolver,
+    DownloadResult,
+    DownloadStatus,
+    PlexPostersRepository,
+    PosterAsset,
+    _part_path,
+)
+from posters.repositories.poster_cache import PosterCache
+from posters.repositories.retry import RetryPolicy
 
 
 @fixture()
@@ -80,9 +98,11 @@ def test_iter_posters_yields_only_items_with_urls(
 
 
 def test_download_posters_writes_files(tmp_path: Path, repository: PlexPostersRepository) -> None:
-    def fake_download(_self: PlexPostersRepository, _url: str, target: Path, _title: str) -> bool:
+    def fake_download(
+        _self: PlexPostersRepository, _url: str, target: Path, **_options: object
+    ) -> DownloadResult:
         target.write_bytes(cast(Buffer, b"fake"))
-        return True
+        return DownloadResult(DownloadStatus.DOWNLOADED)
 
     with patch.object(PlexPostersRepository, "_download", autospec=True) as mock_download:
         mock_download.side_effect = fake_download
@@ -96,9 +116,11 @@ def test_download_posters_writes_files(tmp_path: Path, repository: PlexPostersRe
 
 
 def test_download_posters_respects_limit(tmp_path: Path, repository: PlexPostersRepository) -> None:
-    def fake_download(_self: PlexPostersRepository, _url: str, target: Path, _title: str) -> bool:
+    def fake_download(
+        _self: PlexPostersRepository, _url: str, target: Path, **_options: object
+    ) -> DownloadResult:
         target.write_bytes(cast(Buffer, b"fake"))
-        return True
+        return DownloadResult(DownloadStatus.DOWNLOADED)
 
     with patch.object(PlexPostersRepository, "_download", autospec=True) as mock_download:
         mock_download.side_effect = fake_download
@@ -119,6 +141,7 @@ def test_iter_targets_respects_limit(tmp_path: Path, repository: PlexPostersRepo
     (target,) = targets
     assert target.name == "poster.jpg"
     assert target.parent.name == "Movie One (1999)"
+    assert not target.parent.exists()
 
 
 def test_tv_assets_use_kometa_naming(tmp_path: Path) -> None:
@@ -177,3 +200,571 @@ def test_tv_skips_missing_episode_numbers(tmp_path: Path) -> None:
     assert "Show Name/poster.jpg" in names
     assert "Show Name/Season01.jpg" in names
     assert "Show Name/S01E00.jpg" not in names
+
+
+def test_download_posters_with_workers_downloads_all(
+    tmp_path: Path, repository: PlexPostersRepository
+) -> None:
+    def fake_download(
+        _self: PlexPostersRepository, url: str, target: Path, **_options: object
+    ) -> DownloadResult:
+        if url.endswith("2.jpg"):
+            return DownloadResult(DownloadStatus.MISSING)
+        target.write_bytes(cast(Buffer, b"fake"))
+        return DownloadResult(DownloadStatus.DOWNLOADED)
+
+    with patch.object(PlexPostersRepository, "_download", autospec=True) as mock_download:
+        mock_download.side_effect = fake_download
+        job = PosterJob(output_dir=str(tmp_path), library="Movies", base_url="http://x", workers=4)
+        report = repository.download_posters(job=job)
+
+    assert report.downloaded == 1
+    assert report.skipped_404 == 1
+    assert [asset.title for asset in report.missing] == ["Movie Two"]
+    assert (tmp_path / "Movie One (1999)" / "poster.jpg").exists()
+
+
+def test_download_posters_with_workers_aborts_on_error(
+    tmp_path: Path, repository: PlexPostersRepository
+) -> None:
+    with patch.object(PlexPostersRepository, "_download", autospec=True) as mock_download:
+        mock_download.side_effect = HTTPError("503 Server Error")
+        job = PosterJob(output_dir=str(tmp_path), library="Movies", base_url="http://x", workers=2)
+        with raises(HTTPError):
+            repository.download_posters(job=job)
+
+
+def test_download_posters_starts_before_enumeration_finishes(
+    tmp_path: Path, repository: PlexPostersRepository
+) -> None:
+    first_downloaded = Event()
+
+    def slow_enumeration(
+        _self: PlexPostersRepository, _library: str, **_options: object
+    ) -> Iterator[PosterAsset]:
+        yield PosterAsset(name="One", url="http://x/1.jpg", asset_name="One", kind="movie")
+        assert first_downloaded.wait(timeout=5), "enumeration finished before any download"
+        yield PosterAsset(name="Two", url="http://x/2.jpg", asset_name="Two", kind="movie")
+
+    def fake_download(
+        _self: PlexPostersRepository, _url: str, target: Path, **_options: object
+    ) -> DownloadResult:
+        target.write_bytes(cast(Buffer, b"fake"))
+        first_downloaded.set()
+        return DownloadResult(DownloadStatus.DOWNLOADED)
+
+    with (
+        patch.object(PlexPostersRepository, "iter_posters", slow_enumeration),
+        patch.object(PlexPostersRepository, "_download", autospec=True) as mock_download,
+    ):
+        mock_download.side_effect = fake_download
+        job = PosterJob(output_dir=str(tmp_path), library="Movies", base_url="http://x")
+        report = repository.download_posters(job=job)
+
+    assert report.downloaded == 2
+
+
+def test_download_posters_stops_enumeration_at_limit(
+    tmp_path: Path, repository: PlexPostersRepository
+) -> None:
+    def endless_enumeration(
+        _self: PlexPostersRepository, _library: str, **_options: object
+    ) -> Iterator[PosterAsset]:
+        for number in range(3):
+            yield PosterAsset(
+                name=str(number),
+                url=f"http://x/{number}.jpg",
+                asset_name=str(number),
+                kind="movie",
+            )
+        raise AssertionError("enumerated past the limit")
+
+    with (
+        patch.object(PlexPostersRepository, "iter_posters", endless_enumeration),
+        patch.object(
+            PlexPostersRepository,
+            "_download",
+            autospec=True,
+            return_value=DownloadResult(DownloadStatus.DOWNLOADED),
+        ),
+    ):
+        job = PosterJob(output_dir=str(tmp_path), library="Movies", base_url="http://x", workers=2)
+        report = repository.download_posters(job=job, limit=3)
+
+    assert report.downloaded == 3
+
+
+def test_bulk_enumeration_joins_hierarchy_without_per_show_requests(tmp_path: Path) -> None:
+    show = MagicMock(
+        title="Show Name",
+        ratingKey=10,
+        posterUrl="http://example.com/show.jpg",
+        locations=["/media/TV/Show Name"],
+    )
+    season = MagicMock(
+        ratingKey=11, parentRatingKey=10, seasonNumber=1, posterUrl="http://example.com/s.jpg"
+    )
+    episode = MagicMock(parentRatingKey=11, episodeNumber=2, thumbUrl="http://example.com/e.jpg")
+    listings = {None: [show], "season": [season], "episode": [episode]}
+    plex = MagicMock()
+    section = MagicMock()
+    section.type = "show"
+    section.all.side_effect = lambda **container: listings[None]
+    section.search.side_effect = lambda libtype, **container: listings[libtype]
+    plex.library.section.return_value = section
+    repo = PlexPostersRepository(plex=plex)
+
+    job = PosterJob(
+        output_dir=str(tmp_path), library="TV", base_url="http://x", bulk_enumeration=True
+    )
+    targets = list(repo.iter_targets(job=job))
+
+    names = [t.relative_to(tmp_path).as_posix() for t in targets]
+    assert names == ["Show Name/poster.jpg", "Show Name/Season01.jpg", "Show Name/S01E02.jpg"]
+    show.seasons.assert_not_called()
+    season.episodes.assert_not_called()
+
+
+def _fake_response(status_code: int, body: bytes = b"", headers: dict | None = None) -> MagicMock:
+    response = MagicMock(status_code=status_code, headers=headers or {})
+    if status_code >= 400:
+        response.raise_for_status.side_effect = HTTPError(response=response)
+    response.iter_content.return_value = [body]
+    return response
+
+
+def test_incremental_download_skips_unchanged_posters(tmp_path: Path) -> None:
+    item = MagicMock(
+        title="Movie One",
+        posterUrl="http://plex/library/metadata/1/thumb/1700000000?X-Plex-Token=t",
+        ratingKey=1,
+        locations=["/media/Movies/Movie One (1999)"],
+    )
+    plex = MagicMock()
+    plex.library.section.return_value = MagicMock(type="movie", all=MagicMock(return_value=[item]))
+    session = MagicMock()
+    session.get.return_value = _fake_response(200, b"poster", {"ETag": '"abc"'})
+    repo = PlexPostersRepository(plex=plex, session=session)
+    job = PosterJob(
+        output_dir=str(tmp_path), library="Movies", base_url="http://x", incremental=True
+    )
+
+    first = repo.download_posters(job=job)
+    second = repo.download_posters(job=job)
+
+    assert (first.downloaded, first.unchanged) == (1, 0)
+    assert (second.downloaded, second.unchanged) == (0, 1)
+    assert session.get.call_count == 1
+    assert (tmp_path / ".plex-metadata" / "manifests" / "Movies.json").exists()
+
+
+def test_incremental_download_treats_304_as_unchanged(tmp_path: Path) -> None:
+    item = MagicMock(
+        title="Movie One",
+        posterUrl="http://plex/library/metadata/1/thumb/1700000000",
+        ratingKey=1,
+        locations=["/media/Movies/Movie One (1999)"],
+    )
+    plex = MagicMock()
+    plex.library.section.return_value = MagicMock(type="movie", all=MagicMock(return_value=[item]))
+    session = MagicMock()
+    session.get.return_value = _fake_response(200, b"poster", {"ETag": '"abc"'})
+    repo = PlexPostersRepository(plex=plex, session=session)
+    job = PosterJob(
+        output_dir=str(tmp_path), library="Movies", base_url="http://x", incremental=True
+    )
+    repo.download_posters(job=job)
+
+    item.posterUrl = "http://plex/library/metadata/1/thumb/1800000000"
+    session.get.return_value = _fake_response(304)
+    report = repo.download_posters(job=job)
+
+    assert report.unchanged == 1
+    assert session.get.call_args.kwargs["headers"] == {"If-None-Match": '"abc"'}
+    assert (tmp_path / "Movie One (1999)" / "poster.jpg").read_bytes() == b"poster"
+
+
+def test_iter_posters_serves_repeat_enumerations_from_cache(
+    tmp_path: Path, fake_plex: MagicMock
+) -> None:
+    section = fake_plex.library.section.return_value
+    section.key = 1
+    section.updatedAt = datetime(2024, 1, 1)
+    section._data.attrib = {"scannedAt": "1704153600"}
+    fake_plex.machineIdentifier = "server"
+    fake_plex.url.side_effect = lambda key, includeToken: f"http://plex{key}?X-Plex-Token=t"
+    repo = PlexPostersRepository(plex=fake_plex, cache=PosterCache(path=tmp_path / "c.sqlite3"))
+
+    first = list(repo.iter_posters("Movies"))
+    second = list(repo.iter_posters("Movies"))
+    section.updatedAt = datetime(2024, 2, 1)
+    third = list(repo.iter_posters("Movies"))
+
+    assert section.all.call_count == 2
+    assert [asset.asset_name for asset in second] == [asset.asset_name for asset in first]
+    assert second[0].url == "http://plex/1.jpg?X-Plex-Token=t"
+    assert len(third) == 2
+
+
+def test_dedup_hardlinks_identical_posters(tmp_path: Path, fake_plex: MagicMock) -> None:
+    session = MagicMock()
+    session.get.side_effect = lambda *_args, **_kwargs: _fake_response(200, b"poster")
+    repo = PlexPostersRepository(plex=fake_plex, session=session)
+    job = PosterJob(output_dir=str(tmp_path), library="Movies", base_url="http://x", dedup=True)
+
+    report = repo.download_posters(job=job)
+
+    first = tmp_path / "Movie One (1999)" / "poster.jpg"
+    second = tmp_path / "Movie Two (2004)" / "poster.jpg"
+    assert report.downloaded == 2
+    assert (report.deduplicated, report.bytes_saved) == (1, len(b"poster"))
+    assert first.samefile(second)
+    assert second.read_bytes() == b"poster"
+
+
+def test_retries_transient_errors_and_honors_retry_after(
+    tmp_path: Path, fake_plex: MagicMock
+) -> None:
+    session = MagicMock()
+    session.get.side_effect = [
+        _fake_response(503, headers={"Retry-After": "7"}),
+        _fake_response(200, b"poster"),
+        ConnectionError("reset"),
+        _fake_response(200, b"poster"),
+    ]
+    repo = PlexPostersRepository(plex=fake_plex, session=session, retry=RetryPolicy(attempts=2))
+    job = PosterJob(output_dir=str(tmp_path), library="Movies", base_url="http://x")
+
+    with patch("posters.repositories.plex_posters.time.sleep") as sleep:
+        report = repo.download_posters(job=job)
+
+    assert report.downloaded == 2
+    assert list(report.failed) == []
+    assert sleep.call_args_list[0].args == (7.0,)
+
+
+def test_exhausted_retries_are_reported_as_failed(tmp_path: Path, fake_plex: MagicMock) -> None:
+    session = MagicMock()
+    session.get.side_effect = lambda url, **_kwargs: _fake_response(
+        503 if url.endswith("1.jpg") else 200, b"poster"
+    )
+    repo = PlexPostersRepository(
+        plex=fake_plex, session=session, retry=RetryPolicy(attempts=2, base_delay=0)
+    )
+    job = PosterJob(output_dir=str(tmp_path), library="Movies", base_url="http://x")
+
+    report = repo.download_posters(job=job)
+
+    assert report.downloaded == 1
+    assert report.skipped_404 == 0
+    assert [asset.title for asset in report.failed] == ["Movie One"]
+    assert session.get.call_count == 4
+
+
+def test_non_transient_errors_still_abort_with_retries(
+    tmp_path: Path, fake_plex: MagicMock
+) -> None:
+    session = MagicMock()
+    session.get.return_value = _fake_response(401)
+    repo = PlexPostersRepository(plex=fake_plex, session=session, retry=RetryPolicy(base_delay=0))
+    job = PosterJob(output_dir=str(tmp_path), library="Movies", base_url="http://x")
+
+    with raises(HTTPError):
+        repo.download_posters(job=job)
+    assert session.get.call_count == 1
+
+
+def test_resized_artwork_is_fetched_through_photo_transcoder(
+    tmp_path: Path, fake_plex: MagicMock
+) -> None:
+    fake_plex.url.side_effect = lambda key, includeToken: f"http://plex{key}&X-Plex-Token=t"
+    session = MagicMock()
+    session.get.side_effect = lambda *_args, **_kwargs: _fake_response(200, b"small")
+    repo = PlexPostersRepository(plex=fake_plex, session=session)
+    job = PosterJob(
+        output_dir=str(tmp_path),
+        library="Movies",
+        base_url="http://x",
+        poster_size=ArtworkSize(max_width=1000, max_height=1500, quality=85),
+    )
+
+    report = repo.download_posters(job=job)
+
+    assert report.downloaded == 2
+    fetched = session.get.call_args_list[0].args[0]
+    assert fetched.startswith("http://plex/photo/:/transcode?url=%2F1.jpg&width=1000&height=1500")
+    assert "quality=85" in fetched
+    assert (tmp_path / "Movie One (1999)" / "poster.jpg").read_bytes() == b"small"
+
+
+def _single_movie_repository(session: MagicMock) -> PlexPostersRepository:
+    item = MagicMock(
+        title="Movie One",
+        posterUrl="http://plex/library/metadata/1/thumb/1700000000",
+        ratingKey=1,
+        locations=["/media/Movies/Movie One (1999)"],
+    )
+    plex = MagicMock()
+    plex.library.section.return_value = MagicMock(type="movie", all=MagicMock(return_value=[item]))
+    return PlexPostersRepository(plex=plex, session=session)
+
+
+def test_interrupted_download_keeps_previous_poster_and_resumes(tmp_path: Path) -> None:
+    target = tmp_path / "Movie One (1999)" / "poster.jpg"
+    target.parent.mkdir()
+    target.write_bytes(b"old")
+    session = MagicMock()
+    session.get.return_value = _fake_response(200, b"pos", {"Content-Length": "6"})
+    repo = _single_movie_repository(session)
+    job = PosterJob(output_dir=str(tmp_path), library="Movies", base_url="http://x")
+
+    with raises(ChunkedEncodingError):
+        repo.download_posters(job=job)
+    assert target.read_bytes() == b"old"
+    (part,) = target.parent.glob("poster.jpg.*.part")
+
+    session.get.return_value = _fake_response(
+        206, b"ter", {"Content-Range": "bytes 3-5/6", "Content-Length": "3"}
+    )
+    report = repo.download_posters(job=job)
+
+    assert report.downloaded == 1
+    assert session.get.call_args.kwargs["headers"] == {"Range": "bytes=3-"}
+    assert target.read_bytes() == b"poster"
+    assert not part.exists()
+
+
+def test_resume_drops_conditional_headers_and_stale_parts(tmp_path: Path) -> None:
+    target = tmp_path / "Movie One (1999)" / "poster.jpg"
+    target.parent.mkdir()
+    stale = target.with_name("poster.jpg.0badc0de.part")
+    stale.write_bytes(b"older version")
+    session = MagicMock()
+    repo = _single_movie_repository(session)
+    url = "http://plex/1.jpg"
+    _part_path(target, url).write_bytes(b"pos")
+    session.get.return_value = _fake_response(
+        206, b"ter", {"Content-Range": "bytes 3-5/6", "Content-Length": "3"}
+    )
+
+    result = repo._download(url, target, headers={"If-None-Match": '"abc"'})
+
+    assert result.status is DownloadStatus.DOWNLOADED
+    assert session.get.call_args.kwargs["headers"] == {"Range": "bytes=3-"}
+    assert target.read_bytes() == b"poster"
+    assert list(target.parent.glob("*.part")) == []
+
+
+def test_resume_restarts_when_server_ignores_range(tmp_path: Path) -> None:
+    session = MagicMock()
+    session.get.return_value = _fake_response(200, b"pos", {"Content-Length": "6"})
+    repo = _single_movie_repository(session)
+    job = PosterJob(
+        output_dir=str(tmp_path), library="Movies", base_url="http://x", fsync=FsyncPolicy.DIRECTORY
+    )
+    with raises(ChunkedEncodingError):
+        repo.download_posters(job=job)
+
+    session.get.return_value = _fake_response(200, b"poster", {"Content-Length": "6"})
+    repo.download_posters(job=job)
+
+    target = tmp_path / "Movie One (1999)" / "poster.jpg"
+    assert target.read_bytes() == b"poster"
+    assert list(target.parent.glob("*.part")) == []
+
+
+def test_download_posters_records_metrics(tmp_path: Path) -> None:
+    session = MagicMock()
+    session.get.return_value = _fake_response(200, b"poster", {"Content-Length": "6"})
+    metrics = PosterMetrics()
+    repo = replace(_single_movie_repository(session), metrics=metrics)
+    job = PosterJob(output_dir=str(tmp_path), library="Movies", base_url="http://x")
+
+    repo.download_posters(job=job)
+
+    library = metrics.library("Movies")
+    assert library.requests[Endpoint.LISTING].count == 1
+    assert library.requests[Endpoint.ARTWORK].count == 1
+    assert library.bytes_downloaded == 6
+    assert library.assets == {"downloaded": 1}
+    assert set(library.phases) == {Phase.ENUMERATE, Phase.DOWNLOAD, Phase.WRITE}
+
+
+def test_asset_titles_are_derived_from_the_show_name() -> None:
+    # Built at runtime so the two folder names start out as distinct string objects.
+    folder = "".join
+    episode = PosterAsset(
+        name="Show Name",
+        url="u",
+        asset_name=folder(["Show", " (2001)"]),
+        kind="episode",
+        season=1,
+        episode=2,
+    )
+    season = PosterAsset(
+        name="Show Name", url="u", asset_name=folder(["Show", " (2001)"]), kind="season", season=3
+    )
+
+    assert episode.title == "Show Name S01E02"
+    assert season.title == "Show Name Season 3"
+    assert episode.asset_name is season.asset_name
+
+
+def test_concurrency_limit_caps_requests_across_workers(tmp_path: Path) -> None:
+    items = [
+        MagicMock(
+            title=f"Movie {number}",
+            posterUrl=f"http://plex/{number}.jpg",
+            ratingKey=number,
+            locations=[f"/media/Movies/Movie {number}"],
+        )
+        for number in range(12)
+    ]
+    plex = MagicMock()
+    plex.library.section.return_value = MagicMock(type="movie", all=MagicMock(return_value=items))
+    repo = PlexPostersRepository(plex=plex, session=MagicMock(), limit=ConcurrencyLimit(2))
+    lock = Lock()
+    in_flight = peak = 0
+
+    def fake_download(_self, _url, target, **_options: object) -> DownloadResult:
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return DownloadResult(DownloadStatus.DOWNLOADED)
+
+    with patch.object(PlexPostersRepository, "_download", fake_download):
+        report = repo.download_posters(
+            job=PosterJob(output_dir=str(tmp_path), library="Movies", base_url="x", workers=6)
+        )
+
+    assert report.downloaded == 12
+    assert peak == 2
+
+
+def test_normalize_asset_name_keeps_existing_folder_names() -> None:
+    normalize = PlexPostersRepository._normalize_asset_name
+
+    assert normalize("Movie One (1999) [1080p]") == "Movie One (1999)"
+    assert normalize("Show (2001) - Remastered") == "Show (2001) - Remastered"
+    assert normalize("Show {tvdb-123}") == "Show"
+
+
+def test_asset_name_resolver_fetches_each_show_once() -> None:
+    show = MagicMock(locations=["/media/TV/Show Name (2001)"])
+    episodes = [
+        MagicMock(
+            spec=["show", "grandparentRatingKey"],
+            grandparentRatingKey=7,
+            show=MagicMock(return_value=show),
+        )
+        for _ in range(3)
+    ]
+    names = AssetNameResolver()
+
+    resolved = [names.resolve(episode) for episode in episodes]
+
+    assert resolved == ["Show Name (2001)"] * 3
+    assert sum(episode.show.call_count for episode in episodes) == 1
+    assert (names.hits, names.misses) == (2, 2)
+
+
+def test_download_report_counts_asset_name_cache_hits(tmp_path: Path) -> None:
+    items = [
+        MagicMock(
+            title=f"Part {number}",
+            posterUrl=f"http://plex/{number}.jpg",
+            ratingKey=number,
+            locations=["/media/Movies/Collection (2001)"],
+        )
+        for number in range(3)
+    ]
+    plex = MagicMock()
+    plex.library.section.return_value = MagicMock(type="movie", all=MagicMock(return_value=items))
+    repo = PlexPostersRepository(plex=plex, session=MagicMock())
+
+    with patch.object(PlexPostersRepository, "_download", autospec=True) as mock_download:
+        mock_download.return_value = DownloadResult(DownloadStatus.DOWNLOADED)
+        report = repo.download_posters(
+            job=PosterJob(output_dir=str(tmp_path), library="Movies", base_url="x")
+        )
+
+    assert (report.asset_name_hits, report.asset_name_misses) == (2, 1)
+
+
+def test_image_processing_rewrites_downloads_and_removes_undecodable_ones(
+    tmp_path: Path, fake_plex: MagicMock, sample_items: tuple[MagicMock, MagicMock]
+) -> None:
+    image = importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    image.new("RGB", (400, 600)).save(buffer, format="JPEG")
+    for item in sample_items:
+        item.posterUrl = f"http://plex/library/metadata/{item.ratingKey}/thumb/1700000000"
+    first_url, second_url = (item.posterUrl for item in sample_items)
+    bodies = {first_url: buffer.getvalue(), second_url: b"<html>"}
+    session = MagicMock()
+    session.get.side_effect = lambda url, **_kwargs: _fake_response(200, bodies[url])
+    repo = PlexPostersRepository(plex=fake_plex, session=session)
+    job = PosterJob(
+        output_dir=str(tmp_path),
+        library="Movies",
+        base_url="http://x",
+        workers=2,
+        incremental=True,
+        processing=ImageProcessing(max_width=100, format=ImageFormat.WEBP),
+        image_workers=1,
+    )
+
+    report = repo.download_posters(job=job)
+
+    assert report.downloaded == 1
+    assert [asset.title for asset in report.invalid] == ["Movie Two"]
+    assert not (tmp_path / "Movie Two (2004)" / "poster.webp").exists()
+    with image.open(tmp_path / "Movie One (1999)" / "poster.webp") as poster:
+        assert (poster.format, poster.size) == ("WEBP", (100, 150))
+    # The manifest records the processed file, so the next run leaves it alone.
+    bodies[second_url] = buffer.getvalue()
+    second = repo.download_posters(job=job)
+    assert (second.downloaded, second.unchanged, len(second.invalid)) == (1, 1, 0)
+
+
+def test_probe_falls_back_to_a_ranged_get_when_head_is_not_answered(
+    fake_plex: MagicMock,
+) -> None:
+    session = MagicMock()
+    session.head.return_value = _fake_response(405)
+    session.get.return_value = _fake_response(206, headers={"Content-Range": "bytes 0-0/4096"})
+    repo = PlexPostersRepository(plex=fake_plex, session=session)
+
+    probe = repo._probe_artwork_size("http://example.com/1.jpg")
+
+    assert probe is not None and probe[0] == 4096
+    assert session.get.call_args.kwargs["headers"] == {"Range": "bytes=0-0"}
+
+
+def test_iter_posters_walks_pages_until_a_short_one_without_total_size() -> None:
+    items = [
+        MagicMock(
+            title=f"Movie {n}",
+            posterUrl=f"http://x/{n}.jpg",
+            ratingKey=str(n),
+            locations=[f"/media/Movies/Movie {n} ({2000 + n})"],
+        )
+        for n in range(5)
+    ]
+    plex = MagicMock()
+    section = MagicMock(type="movie")
+    section.all.side_effect = lambda container_start, container_size, maxresults: items[
+        container_start : container_start + container_size
+    ]
+    plex.library.section.return_value = section
+    repo = PlexPostersRepository(plex=plex, page_size=2, prefetch_pages=1)
+
+    posters = list(repo.iter_posters("Movies"))
+
+    assert [poster.name for poster in posters] == [f"Movie {n}" for n in range(5)]
+    starts = sorted(call.kwargs["container_start"] for call in section.all.call_args_list)
+    assert starts == [0, 2, 4]
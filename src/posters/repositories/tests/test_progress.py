@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+
+from plexapi.server import PlexServer
+
+from posters.domain import PosterAsset, PosterJob
+from posters.repositories.plex_posters import PlexPostersRepository
+from posters.repositories.progress import BarProgress, JsonlProgress
+from posters.repositories.retry import RetryPolicy
+from tests.fake_plex import FakePlexConfig, SyntheticLibrary, fake_plex_server
+
+ASSET = PosterAsset(name="Movie", url="u", asset_name="Movie (1999)", kind="movie", rating_key="7")
+
+
+def _events(stream: io.StringIO) -> list[dict]:
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_jsonl_progress_emits_one_event_per_queued_and_finished_asset(tmp_path: Path) -> None:
+    config = FakePlexConfig(libraries=(SyntheticLibrary("Movies", items=5),), payload_size=1024)
+    failing = FakePlexConfig(libraries=config.libraries, error_rate=1.0)
+    stream = io.StringIO()
+    progress = JsonlProgress(stream)
+    for server_config, output_dir in ((config, tmp_path / "ok"), (failing, tmp_path / "bad")):
+        with fake_plex_server(server_config) as base_url:
+            repository = PlexPostersRepository(
+                plex=PlexServer(base_url, "token"),
+                retry=RetryPolicy(attempts=0),
+                progress=progress,
+            )
+            job = PosterJob(output_dir=str(output_dir), library="Movies", base_url=base_url)
+            repository.download_posters(job)
+
+    events = _events(stream)
+    assert [event["event"] for event in events].count("queued") == 10
+    downloaded = [event for event in events if event["event"] == "downloaded"]
+    assert len(downloaded) == 5
+    assert all(event["bytes"] == 1024 and event["ms"] >= 0 for event in downloaded)
+    assert {event["library"] for event in events} == {"Movies"}
+    assert [event["event"] for event in events[10:]] == ["queued", "failed"] * 5
+
+
+def test_jsonl_progress_names_missing_posters_404_and_closes_files(tmp_path: Path) -> None:
+    path = tmp_path / "events.jsonl"
+    progress = JsonlProgress(path.open("w", encoding="utf-8"))
+
+    progress.finished("Movies", ASSET, "missing", 0, 0.0125)
+    progress.message("Concurrency 2 -> 3 (healthy and saturated)")
+    progress.close()
+
+    first, second = [json.loads(line) for line in path.read_text().splitlines()]
+    assert first | {"ts": 0} == {
+        "event": "404",
+        "library": "Movies",
+        "asset": "Movie (1999)",
+        "kind": "movie",
+        "rating_key": "7",
+        "bytes": 0,
+        "ms": 12.5,
+        "ts": 0,
+    }
+    assert second["message"].startswith("Concurrency 2 -> 3")
+
+
+def test_bar_progress_counts_queued_and_finished_posters_on_one_bar() -> None:
+    output = io.StringIO()
+    progress = BarProgress(file=output)
+
+    for _ in range(3):
+        progress.queued("Movies", ASSET)
+    progress.finished("Movies", ASSET, "downloaded", 2 * 1024 * 1024, 0.1)
+    progress.finished("Movies", ASSET, "failed", 0, 0.1)
+    progress.message("Concurrency 2 -> 1 (errors 50% > 5%)")
+    progress.close()
+
+    text = output.getvalue()
+    assert "2/3" in text
+    assert "2.0 MiB/s, 1 failed" in text
+    assert "Concurrency 2 -> 1" in text
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from pytest import raises
+
+from posters.domain import PosterAsset, Shard
+from posters.repositories.plex_posters import DownloadReport
+from posters.repositories.report_files import ReportFile, read_report, write_report
+
+
+def _asset(name: str) -> PosterAsset:
+    return PosterAsset(
+        name=name,
+        url="http://plex:32400/library/metadata/1/thumb?X-Plex-Token=secret",
+        asset_name=name,
+        kind="movie",
+    )
+
+
+def test_round_trips_counts_and_lists_without_tokens(tmp_path: Path) -> None:
+    path = tmp_path / "reports" / "shard-2.jsonl"
+    report = DownloadReport(
+        downloaded=4,
+        skipped_404=1,
+        missing=[_asset("Gone")],
+        unchanged=2,
+        deduplicated=1,
+        bytes_saved=512,
+        failed=[_asset("Flaky")],
+        invalid=[_asset("Broken")],
+    )
+
+    write_report(path, ReportFile(report, "/posters", ("Movies",), Shard(2, 3)))
+    loaded = read_report(path)
+
+    assert "secret" not in path.read_text(encoding="utf-8")
+    assert loaded.output_dir == "/posters"
+    assert loaded.libraries == ("Movies",)
+    assert loaded.shard == Shard(2, 3)
+    assert (loaded.report.downloaded, loaded.report.skipped_404) == (4, 1)
+    assert loaded.report.bytes_saved == 512
+    assert [asset.title for asset in loaded.report.failed] == ["Flaky"]
+    assert [asset.title for asset in loaded.report.invalid] == ["Broken"]
+    assert "X-Plex-Token" not in next(iter(loaded.report.missing)).url
+
+
+def test_rejects_files_that_are_not_reports(tmp_path: Path) -> None:
+    path = tmp_path / "metrics.json"
+    path.write_text('{"phases": {}}\n', encoding="utf-8")
+
+    with raises(ValueError, match="not a posters report"):
+        read_report(path)
+
+
+def test_shards_parse_and_partition_asset_names() -> None:
+    shards = [Shard.parse(f"{index}/4") for index in range(1, 5)]
+    names = [f"Movie {number} (2000)" for number in range(200)]
+
+    owners = [[shard for shard in shards if shard.includes(name)] for name in names]
+
+    assert all(len(owner) == 1 for owner in owners)
+    assert {owner[0] for owner in owners} == set(shards)
+    assert str(shards[1]) == "2/4"
+    with raises(ValueError):
+        Shard.parse("5/4")
+    with raises(ValueError):
+        Shard.parse("every other")
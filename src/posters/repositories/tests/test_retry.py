@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+from requests import HTTPError, Timeout
+
+from posters.repositories.retry import CircuitBreaker, RetryPolicy, is_retryable, retry_after
+
+
+def test_backoff_is_jittered_and_capped() -> None:
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+
+    delays = [policy.delay(attempt) for attempt in range(10)]
+
+    assert all(0 <= delay <= 4.0 for delay in delays)
+    assert policy.delay(0, retry_after=12.0) == 12.0
+
+
+def test_retry_after_parses_seconds_and_dates() -> None:
+    seconds = HTTPError(response=MagicMock(headers={"Retry-After": "5"}))
+    past_date = HTTPError(
+        response=MagicMock(headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+    )
+
+    assert retry_after(seconds) == 5.0
+    assert retry_after(past_date) == 0.0
+    assert retry_after(Timeout()) is None
+
+
+def test_only_transient_errors_are_retryable() -> None:
+    assert is_retryable(HTTPError(response=MagicMock(status_code=503)))
+    assert is_retryable(HTTPError(response=MagicMock(status_code=429)))
+    assert is_retryable(Timeout())
+    assert not is_retryable(HTTPError(response=MagicMock(status_code=403)))
+
+
+def test_breaker_opens_on_error_spike_and_pauses_callers() -> None:
+    now = [100.0]
+    slept: list[float] = []
+
+    def sleep(seconds: float) -> None:
+        slept.append(seconds)
+        now[0] += seconds
+
+    breaker = CircuitBreaker(
+        window=4, min_requests=4, threshold=0.5, cooldown=10.0, clock=lambda: now[0], sleep=sleep
+    )
+    for ok in (True, True, False, False):
+        breaker.record(ok)
+
+    assert breaker.is_open
+    breaker.wait()
+    assert slept == [10.0]
+    assert not breaker.is_open
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from plexapi.server import PlexServer
+
+from posters.domain import PosterAsset, PosterJob, Shard
+from posters.repositories.plex_posters import DownloadResult, DownloadStatus, PlexPostersRepository
+from posters.repositories.retry import RetryPolicy
+from posters.repositories.run_journal import RunJournal, journal_key, read_journal
+from tests.fake_plex import FakePlexConfig, SyntheticLibrary, fake_plex_server
+
+
+def _asset(rating_key: str) -> PosterAsset:
+    return PosterAsset(
+        name=f"Movie {rating_key}",
+        url=f"http://plex/library/metadata/{rating_key}/thumb?X-Plex-Token=secret",
+        asset_name=f"Movie {rating_key} (1999)",
+        kind="movie",
+        rating_key=rating_key,
+    )
+
+
+def test_journal_round_trips_outcomes_and_drops_a_truncated_last_line(tmp_path: Path) -> None:
+    journal = RunJournal.for_output_dir(tmp_path, Shard(2, 4))
+    journal.start(["Movies"])
+    journal.record(
+        "Movies", _asset("1"), DownloadResult(DownloadStatus.DOWNLOADED, size=10, path="a.jpg")
+    )
+    journal.record("Movies", _asset("2"), DownloadResult(DownloadStatus.FAILED))
+    journal.finish("Movies")
+    journal.close()
+    with journal.path.open("a", encoding="utf-8") as handle:
+        handle.write('{"library": "Movies", "key": "3/mo')
+
+    state = read_journal(journal.path)
+
+    assert journal.path == tmp_path / ".plex-metadata" / "journal.shard-2-of-4.jsonl"
+    assert "secret" not in journal.path.read_text()
+    assert state.libraries == ("Movies",)
+    assert state.finished == {"Movies"}
+    entries = state.entries["Movies"]
+    assert entries[journal_key(_asset("1"))].target == "a.jpg"
+    assert state.retry_keys("Movies") == {"2/movie": "2"}
+    report = state.report(["Movies"])
+    assert report.downloaded == 1
+    assert [asset.rating_key for asset in report.failed] == ["2"]
+
+
+def test_reopen_drops_a_partial_line_so_repeated_crashes_keep_the_journal_readable(
+    tmp_path: Path,
+) -> None:
+    journal = RunJournal(tmp_path / "journal.jsonl")
+    journal.start(["Movies"])
+    for round_ in range(3):
+        journal.record("Movies", _asset(str(round_)), DownloadResult(DownloadStatus.DOWNLOADED))
+        journal.close()
+        # Crash while writing the next entry.
+        with journal.path.open("a", encoding="utf-8") as handle:
+            handle.write('{"library": "Movies", "key": "9/mo')
+        journal = RunJournal(tmp_path / "journal.jsonl")
+        state = journal.reopen()
+        assert set(state.entries["Movies"]) == {f"{key}/movie" for key in range(round_ + 1)}
+    journal.close()
+
+    assert journal.path.read_text().endswith("\n")
+
+
+def test_read_journal_rejects_other_files(tmp_path: Path) -> None:
+    path = tmp_path / "journal.jsonl"
+    path.write_text('{"format": "something-else"}\n')
+
+    with pytest.raises(ValueError, match="not a posters journal"):
+        read_journal(path)
+    with pytest.raises(FileNotFoundError):
+        RunJournal(tmp_path / "absent.jsonl").reopen()
+
+
+def test_resume_skips_recorded_assets_and_retry_downloads_only_failures(tmp_path: Path) -> None:
+    config = FakePlexConfig(libraries=(SyntheticLibrary("Movies", items=6),), payload_size=512)
+    with fake_plex_server(config) as base_url:
+        job = PosterJob(output_dir=str(tmp_path), library="Movies", base_url=base_url)
+
+        def download(journal: RunJournal) -> int:
+            repository = PlexPostersRepository(
+                plex=PlexServer(base_url, "token"),
+                retry=RetryPolicy(attempts=0),
+                journal=journal,
+            )
+            report = repository.download_posters(job)
+            journal.close()
+            return report.downloaded
+
+        first = RunJournal.for_output_dir(tmp_path)
+        first.start(["Movies"])
+        # A run interrupted after two posters, one of which failed.
+        assets = list(
+            PlexPostersRepository(plex=PlexServer(base_url, "token")).iter_posters("Movies")
+        )
+        first.record("Movies", assets[0], DownloadResult(DownloadStatus.DOWNLOADED))
+        first.record("Movies", assets[1], DownloadResult(DownloadStatus.FAILED))
+        first.close()
+
+        resumed = RunJournal.for_output_dir(tmp_path)
+        resumed.reopen()
+        assert download(resumed) == 4
+        retried = RunJournal.for_output_dir(tmp_path)
+        retried.reopen(retry_failed=True)
+        assert download(retried) == 1
+
+    state = read_journal(first.path)
+    assert state.finished == {"Movies"}
+    assert not state.retry_keys("Movies")
+    assert {entry.status for entry in state.entries["Movies"].values()} == {
+        DownloadStatus.DOWNLOADED
+    }
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import threading
+import time
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from requests import RequestException
 from typer import Typer
 
 from plex_metadata.cli import app
+from posters.domain import ArtworkSize, ImageFormat, ImageProcessing, PosterAsset, Shard
+from posters.repositories.plex_posters import DownloadReport, PosterEstimate
 from tests.cli_mixin import CliCommandMixin
 
 
@@ -21,7 +26,7 @@ class TestPostersCli(CliCommandMixin):
 
     def test_download_success(self, tmp_path: Path) -> None:
         with self.setup_mocks() as repository:
-            repository.download_posters.return_value = MagicMock(
+            repository.download_posters.return_value = DownloadReport(
                 downloaded=3, skipped_404=0, missing=[]
             )
             result = self.invoke(self.default_args() + ["--output-dir", str(tmp_path)])
@@ -32,7 +37,7 @@ class TestPostersCli(CliCommandMixin):
 
     def test_download_reports_missing(self, tmp_path: Path) -> None:
         with self.setup_mocks() as repository:
-            repository.download_posters.return_value = MagicMock(
+            repository.download_posters.return_value = DownloadReport(
                 downloaded=1,
                 skipped_404=1,
                 missing=[MagicMock(title="Missing Movie", url="http://example.com/missing.jpg")],
@@ -91,7 +96,7 @@ class TestPostersCli(CliCommandMixin):
 
     def test_all_libraries_downloads_each_section(self, tmp_path: Path) -> None:
         with self.setup_mocks(sections=["Movies", "Shows"]) as repository:
-            repository.download_posters.return_value = MagicMock(
+            repository.download_posters.return_value = DownloadReport(
                 downloaded=1, skipped_404=0, missing=[]
             )
             args = [
@@ -110,6 +115,29 @@ class TestPostersCli(CliCommandMixin):
         assert result.exit_code == 0
         assert repository.download_posters.call_count == 2
 
+    def test_parallel_libraries_merge_reports_in_library_order(self, tmp_path: Path) -> None:
+        def download(job, limit):
+            if job.library == "Movies":
+                # Finish last, so completion order differs from library order.
+                time.sleep(0.05)
+            missing = [
+                PosterAsset(name=f"{job.library} item", url="u", asset_name="a", kind="movie")
+            ]
+            return DownloadReport(downloaded=1, skipped_404=1, missing=missing)
+
+        with self.setup_mocks(sections=["Movies", "Shows", "Photos"]) as repository:
+            repository.download_posters.side_effect = download
+            result = self.invoke(
+                ["posters", "download", "--base-url", "http://localhost:32400", "--token", "t"]
+                + ["--all-libraries", "--output-dir", str(tmp_path), "--parallel-libraries", "3"]
+            )
+
+        assert result.exit_code == 0
+        assert "Downloaded 3 posters" in result.output
+        assert "Finished Shows: 1 downloaded, 1 missing, 0 failed" in result.output
+        titles = [line.split(" | ")[0] for line in result.output.splitlines() if " | u" in line]
+        assert titles == ["Movies item", "Shows item", "Photos item"]
+
     def test_movie_library_dry_run_uses_library(self, tmp_path: Path) -> None:
         movie_target = tmp_path / "Movie Name (1999)" / "poster.jpg"
 
@@ -153,3 +181,426 @@ class TestPostersCli(CliCommandMixin):
         assert result.exit_code == 0
         assert f"  - {show_target}" in result.output
         repository.iter_targets.assert_called_once()
+
+    def test_download_passes_options_to_job(self, tmp_path: Path) -> None:
+        with self.setup_mocks() as repository:
+            repository.download_posters.return_value = DownloadReport(
+                downloaded=1, skipped_404=0, missing=[]
+            )
+            result = self.invoke(
+                self.default_args()
+                + ["--output-dir", str(tmp_path), "--workers", "8", "--bulk-enumeration"]
+                + ["--incremental", "--max-width", "1000", "--thumb-max-height", "240"]
+            )
+
+        assert result.exit_code == 0
+        job = repository.download_posters.call_args.kwargs["job"]
+        assert job.workers == 8
+        assert job.bulk_enumeration is True
+        assert job.incremental is True
+        assert job.poster_size == ArtworkSize(max_width=1000)
+        assert job.thumb_size == ArtworkSize(max_height=240)
+
+    def test_download_writes_metrics_file(self, tmp_path: Path) -> None:
+        metrics_out = tmp_path / "metrics" / "posters.prom"
+        with self.setup_mocks() as repository:
+            repository.download_posters.return_value = DownloadReport(
+                downloaded=1, skipped_404=0, missing=[]
+            )
+            result = self.invoke(
+                self.default_args()
+                + ["--output-dir", str(tmp_path), "--metrics-out", str(metrics_out)]
+            )
+
+        assert result.exit_code == 0
+        assert "# TYPE plex_posters_phase_seconds gauge" in metrics_out.read_text()
+
+    def test_download_reports_unchanged(self, tmp_path: Path) -> None:
+        with self.setup_mocks() as repository:
+            repository.download_posters.return_value = DownloadReport(
+                downloaded=1, skipped_404=0, missing=[], unchanged=4
+            )
+            result = self.invoke(self.default_args() + ["--output-dir", str(tmp_path)])
+
+        assert result.exit_code == 0
+        assert "Unchanged 4 posters (already up to date)" in result.output
+
+    def test_download_reports_dedup_savings(self, tmp_path: Path) -> None:
+        with self.setup_mocks() as repository:
+            repository.download_posters.return_value = DownloadReport(
+                downloaded=4, skipped_404=0, missing=[], deduplicated=1, bytes_saved=3 * 1024**2
+            )
+            result = self.invoke(self.default_args() + ["--output-dir", str(tmp_path), "--dedup"])
+
+        assert result.exit_code == 0
+        assert "Deduplicated 1 posters (25.0%), saved 3.0 MiB" in result.output
+
+    def test_download_reports_failed_after_retries(self, tmp_path: Path) -> None:
+        with self.setup_mocks() as repository:
+            repository.download_posters.return_value = DownloadReport(
+                downloaded=1,
+                skipped_404=0,
+                missing=[],
+                failed=[MagicMock(title="Flaky Movie", url="http://example.com/flaky.jpg")],
+            )
+            result = self.invoke(self.default_args() + ["--output-dir", str(tmp_path)])
+
+        assert result.exit_code == 1
+        assert "Failed 1 posters after retries" in result.output
+        assert "Flaky Movie | http://example.com/flaky.jpg" in result.output
+
+    def test_no_cache_disables_listing_cache(self, tmp_path: Path) -> None:
+        with (
+            self.patch_server(),
+            self.patch_repository("PlexPostersRepository") as repository_cls,
+        ):
+            repository_cls.return_value.download_posters.return_value = DownloadReport(
+                downloaded=0, skipped_404=0, missing=[]
+            )
+            result = self.invoke(
+                self.default_args() + ["--output-dir", str(tmp_path), "--no-cache"]
+            )
+
+        assert result.exit_code == 0
+        assert repository_cls.call_args.kwargs["cache"] is None
+
+    def test_image_options_enable_processing_and_report_invalid(self, tmp_path: Path) -> None:
+        with self.setup_mocks() as repository:
+            repository.download_posters.return_value = DownloadReport(
+                downloaded=1,
+                skipped_404=0,
+                missing=[],
+                invalid=[MagicMock(title="Broken Movie", url="http://example.com/broken.jpg")],
+            )
+            result = self.invoke(
+                self.default_args()
+                + ["--output-dir", str(tmp_path), "--image-max-width", "1000"]
+                + ["--image-format", "webp", "--strip-metadata", "--image-workers", "2"]
+            )
+
+        assert result.exit_code == 1
+        job = repository.download_posters.call_args.kwargs["job"]
+        assert job.processing == ImageProcessing(
+            max_width=1000, format=ImageFormat.WEBP, strip_metadata=True
+        )
+        assert job.image_workers == 2
+        assert "Removed 1 posters that failed to decode" in result.output
+        assert "Broken Movie | http://example.com/broken.jpg" in result.output
+
+    def test_parallel_libraries_share_the_default_image_workers(self, tmp_path: Path) -> None:
+        with (
+            self.setup_mocks(sections=["Movies", "Shows"]) as repository,
+            patch("os.cpu_count", return_value=8),
+        ):
+            repository.download_posters.return_value = DownloadReport(
+                downloaded=1, skipped_404=0, missing=[]
+            )
+            result = self.invoke(
+                ["posters", "download", "--base-url", "http://localhost:32400", "--token", "t"]
+                + ["--all-libraries", "--output-dir", str(tmp_path), "--verify-images"]
+                + ["--parallel-libraries", "2"]
+            )
+
+        assert result.exit_code == 0
+        assert repository.download_posters.call_args.kwargs["job"].image_workers == 4
+
+    def test_images_are_not_processed_by_default(self, tmp_path: Path) -> None:
+        with self.setup_mocks() as repository:
+            repository.download_posters.return_value = DownloadReport(
+                downloaded=1, skipped_404=0, missing=[]
+            )
+            result = self.invoke(self.default_args() + ["--output-dir", str(tmp_path)])
+
+        assert result.exit_code == 0
+        assert repository.download_posters.call_args.kwargs["job"].processing is None
+
+    def test_estimate_prints_section_totals_without_downloading(self, tmp_path: Path) -> None:
+        with self.setup_mocks() as repository:
+            repository.estimate_posters.return_value = PosterEstimate(
+                library="TV",
+                counts={"show": 2, "season": 5, "episode": 40},
+                sampled=4,
+                sampled_bytes=4 * 1024**2,
+                sampled_seconds=0.4,
+            )
+            result = self.invoke(
+                self.default_args()
+                + ["--output-dir", str(tmp_path / "out"), "--estimate-bytes", "--workers", "4"]
+            )
+
+        assert result.exit_code == 0
+        assert "show: 2, season: 5, episode: 40" in result.output
+        assert "Estimate: up to 47 posters" in result.output
+        assert "Projected transfer: 47.0 MiB from 4 sampled posters" in result.output
+        assert repository.estimate_posters.call_args.kwargs["samples"] == 50
+        repository.download_posters.assert_not_called()
+        repository.iter_targets.assert_not_called()
+        assert not (tmp_path / "out").exists()
+
+    def test_since_accepts_dates_and_ages(self, tmp_path: Path) -> None:
+        with self.setup_mocks() as repository:
+            repository.download_posters.return_value = DownloadReport(
+                downloaded=0, skipped_404=0, missing=[]
+            )
+            dated = self.invoke(
+                self.default_args() + ["--output-dir", str(tmp_path), "--since", "2026-10-01"]
+            )
+            dated_job = repository.download_posters.call_args.kwargs["job"]
+            aged = self.invoke(
+                self.default_args()
+                + ["--output-dir", str(tmp_path), "--since", "36h", "--changed-only"]
+            )
+            aged_job = repository.download_posters.call_args.kwargs["job"]
+            invalid = self.invoke(
+                self.default_args() + ["--output-dir", str(tmp_path), "--since", "yesterday"]
+            )
+
+        assert dated.exit_code == 0
+        assert dated_job.since == datetime(2026, 10, 1, tzinfo=UTC)
+        assert aged.exit_code == 0
+        assert aged_job.changed_only is True
+        assert datetime.now(UTC) - aged_job.since > timedelta(hours=35)
+        assert invalid.exit_code == 2
+        assert "Invalid --since" in invalid.output
+
+    def test_shard_writes_a_report_that_merge_reports_combines(self, tmp_path: Path) -> None:
+        first, second = tmp_path / "shard-1.jsonl", tmp_path / "shard-2.jsonl"
+        with self.setup_mocks() as repository:
+            for path, shard, downloaded in ((first, "1/3", 4), (second, "2/3", 6)):
+                repository.download_posters.return_value = DownloadReport(
+                    downloaded=downloaded,
+                    skipped_404=0,
+                    missing=[],
+                    failed=[
+                        PosterAsset(name=f"Flaky {shard}", url="u", asset_name="a", kind="movie")
+                    ],
+                )
+                result = self.invoke(
+                    self.default_args()
+                    + ["--output-dir", str(tmp_path), "--shard", shard, "--report-out", str(path)]
+                )
+                assert result.exit_code == 1
+            job = repository.download_posters.call_args.kwargs["job"]
+        merged = self.invoke(
+            ["posters", "merge-reports", str(first), str(second), "--out", str(tmp_path / "all")]
+        )
+
+        assert job.shard == Shard(2, 3)
+        assert merged.exit_code == 0
+        assert "Downloaded 10 posters to" in merged.output
+        assert "Failed 2 posters after retries" in merged.output
+        assert "Missing shard reports: 3/3" in merged.output
+        assert (tmp_path / "all").exists()
+
+    def test_invalid_shard_and_report_are_rejected(self, tmp_path: Path) -> None:
+        (tmp_path / "bogus.jsonl").write_text("not json\n", encoding="utf-8")
+        with self.setup_mocks():
+            shard = self.invoke(
+                self.default_args() + ["--output-dir", str(tmp_path), "--shard", "3/2"]
+            )
+        merged = self.invoke(["posters", "merge-reports", str(tmp_path / "bogus.jsonl")])
+
+        assert shard.exit_code == 2
+        assert "Invalid --shard" in shard.output
+        assert merged.exit_code == 1
+        assert "not a posters report" in merged.output
+
+    def test_storage_option_selects_the_backend(self, tmp_path: Path) -> None:
+        pack = tmp_path / "posters.zip"
+        targets = [tmp_path / "posters" / "Movie (1999)" / "poster.jpg"]
+        with self.setup_mocks(repository_targets=targets):
+            dry_run = self.invoke(
+                self.default_args()
+                + ["--output-dir", str(tmp_path / "posters"), "--dry-run"]
+                + ["--storage", f"zip:{pack}"]
+            )
+        with self.setup_mocks():
+            invalid = self.invoke(
+                self.default_args() + ["--output-dir", str(tmp_path), "--storage", "ftp://host"]
+            )
+            partial = self.invoke(
+                self.default_args()
+                + ["--output-dir", str(tmp_path), "--storage", f"zip:{pack}"]
+                + ["--limit", "5", "--changed-only"]
+            )
+
+        assert dry_run.exit_code == 0
+        assert f"{pack}!/Movie (1999)/poster.jpg" in dry_run.output
+        assert not pack.exists()
+        assert invalid.exit_code == 2
+        assert "Unknown storage" in invalid.output
+        assert partial.exit_code == 2
+        assert "--limit, --changed-only would replace" in partial.output
+
+    def test_adaptive_and_rate_options_are_validated(self, tmp_path: Path) -> None:
+        args = self.default_args() + ["--output-dir", str(tmp_path)]
+        with self.setup_mocks() as repository:
+            repository.download_posters.return_value = DownloadReport(
+                downloaded=1, skipped_404=0, missing=[]
+            )
+            capped = self.invoke(
+                args + ["--adaptive", "--max-in-flight", "4", "--max-bandwidth", "1.5MiB/s"]
+            )
+            bandwidth = self.invoke(args + ["--max-bandwidth", "fast"])
+            bounds = self.invoke(
+                args + ["--adaptive", "--max-in-flight", "2"] + ["--min-in-flight", "3"]
+            )
+
+        assert capped.exit_code == 0
+        assert bandwidth.exit_code == 2
+        assert "Invalid --max-bandwidth" in bandwidth.output
+        assert bounds.exit_code == 2
+        assert "--min-in-flight 3 is above --max-in-flight 2" in bounds.output
+
+    def test_progress_option_selects_the_sink(self, tmp_path: Path) -> None:
+        events = tmp_path / "events.jsonl"
+        with self.setup_mocks() as repository:
+            repository.download_posters.return_value = DownloadReport(
+                downloaded=1, skipped_404=0, missing=[]
+            )
+            quiet = self.invoke(
+                self.default_args() + ["--output-dir", str(tmp_path), "--progress", "none"]
+            )
+            jsonl = self.invoke(
+                self.default_args()
+                + ["--output-dir", str(tmp_path), "--progress", "jsonl"]
+                + ["--progress-out", str(events)]
+            )
+            invalid = self.invoke(self.default_args() + ["--progress", "dots"])
+            stdout = self.invoke(
+                self.default_args() + ["--output-dir", str(tmp_path), "--progress", "jsonl"]
+            )
+
+        assert quiet.exit_code == 0
+        assert "Posters:" not in quiet.output
+        assert jsonl.exit_code == 0
+        assert events.exists()
+        # With events on stdout, the library names and report go to stderr.
+        assert stdout.exit_code == 0
+        assert stdout.stdout == ""
+        assert "Library: Movies" in stdout.stderr
+        assert "Downloaded 1 posters" in stdout.stderr
+        assert invalid.exit_code == 2
+
+    def test_parallel_libraries_stop_when_one_fails(self, tmp_path: Path) -> None:
+        from posters.repositories.plex_posters import DownloadStopped
+
+        stop = threading.Event()
+
+        def download(job, limit):
+            if job.library == "Shows":
+                raise RequestException("boom")
+            # Movies runs until the failure of Shows stops it.
+            if not stop.wait(timeout=5):
+                raise AssertionError("not stopped")
+            raise DownloadStopped("stopped")
+
+        with self.setup_mocks(sections=["Movies", "Shows"]) as repository:
+            repository.stop = stop
+            repository.download_posters.side_effect = download
+            result = self.invoke(
+                ["posters", "download", "--base-url", "http://localhost:32400", "--token", "t"]
+                + ["--all-libraries", "--output-dir", str(tmp_path), "--parallel-libraries", "2"]
+            )
+
+        assert result.exit_code == 1
+        assert "Request failed: boom" in result.output
+
+    def test_resume_and_retry_failed_continue_the_journal(self, tmp_path: Path) -> None:
+        from posters.repositories.plex_posters import DownloadResult, DownloadStatus
+        from posters.repositories.run_journal import RunJournal
+
+        journal = RunJournal.for_output_dir(tmp_path)
+        journal.start(["Movies", "Shows"])
+        done = PosterAsset(name="Done", url="u", asset_name="Done", kind="movie", rating_key="1")
+        lost = PosterAsset(name="Lost", url="u", asset_name="Lost", kind="show", rating_key="2")
+        journal.record("Movies", done, DownloadResult(DownloadStatus.DOWNLOADED))
+        journal.finish("Movies")
+        journal.record("Shows", lost, DownloadResult(DownloadStatus.FAILED))
+        journal.close()
+        args = ["posters", "download", "--base-url", "http://localhost:32400", "--token", "t"]
+        args += ["--all-libraries", "--output-dir", str(tmp_path)]
+
+        with self.setup_mocks(sections=["Movies", "Shows"]) as repository:
+            repository.download_posters.return_value = DownloadReport(
+                downloaded=2, skipped_404=0, missing=[]
+            )
+            resumed = self.invoke(args + ["--resume"])
+            resumed_jobs = [
+                call.kwargs["job"] for call in repository.download_posters.call_args_list
+            ]
+            repository.download_posters.reset_mock()
+            retried = self.invoke(args + ["--retry-failed"])
+            retried_jobs = [
+                call.kwargs["job"] for call in repository.download_posters.call_args_list
+            ]
+            both = self.invoke(args + ["--resume", "--retry-failed"])
+            missing = self.invoke(
+                self.default_args() + ["--output-dir", str(tmp_path / "new"), "--resume"]
+            )
+
+        assert resumed.exit_code == 1
+        assert [job.library for job in resumed_jobs] == ["Shows"]
+        # One recorded before the interruption, two since.
+        assert "Downloaded 3 posters" in resumed.output
+        assert "Failed 1 posters after retries" in resumed.output
+        assert retried.exit_code == 0
+        assert [(job.library, job.rating_keys) for job in retried_jobs] == [("Shows", ("2",))]
+        assert both.exit_code == 2
+        assert missing.exit_code == 1
+        assert "No journal to continue with --resume" in missing.output
+        assert "Configuration error" not in missing.output
+
+    def test_watch_runs_the_watcher_until_interrupted(self, tmp_path: Path) -> None:
+        metrics = tmp_path / "metrics.json"
+        with (
+            self.patch_server() as plex_server,
+            self.patch_repository("PlexPostersRepository") as repository_cls,
+            patch("posters.repositories.poster_watch.PosterWatcher") as watcher_cls,
+        ):
+            plex_server.return_value.library.sections.return_value = [
+                MagicMock(title=title) for title in ("Movies", "TV")
+            ]
+            watcher_cls.return_value.run.side_effect = KeyboardInterrupt
+            result = self.invoke(
+                ["posters", "watch", "--base-url", "http://localhost:32400", "--token", "token"]
+                + ["--library", "TV", "--output-dir", str(tmp_path), "--no-alerts"]
+                + ["--webhook-port", "0", "--debounce", "2", "--reconcile-interval", "0"]
+                + ["--adaptive", "--max-rps", "5", "--progress", "none"]
+                + ["--metrics-out", str(metrics)]
+            )
+
+        assert result.exit_code == 0
+        assert "Accepting webhooks at http://127.0.0.1:" in result.output
+        assert "Watching TV; press Ctrl+C to stop." in result.output
+        kwargs = watcher_cls.call_args.kwargs
+        assert list(kwargs["libraries"].values()) == ["TV"]
+        assert kwargs["job"].incremental is True
+        assert kwargs["changes"].debounce == 2
+        assert kwargs["reconcile_interval"] is None
+        # The options shared with download build the repository the same way.
+        repository = repository_cls.call_args.kwargs
+        assert type(repository["limit"]).__name__ == "AdaptiveLimit"
+        assert repository["request_rate"] is not None
+        assert metrics.exists()
+
+    def test_watch_needs_a_change_source(self, tmp_path: Path) -> None:
+        result = self.invoke(
+            ["posters", "watch", "--base-url", "http://localhost:32400", "--token", "token"]
+            + ["--library", "TV", "--output-dir", str(tmp_path), "--no-alerts"]
+        )
+
+        assert result.exit_code == 2
+        assert "--webhook-port" in result.output
+
+    def test_watch_checks_the_options_it_shares_with_download(self, tmp_path: Path) -> None:
+        args = ["posters", "watch", "--base-url", "http://localhost:32400", "--token", "token"]
+        args += ["--output-dir", str(tmp_path), "--no-alerts", "--webhook-port", "0"]
+
+        both = self.invoke(args + ["--library", "TV", "--all-libraries"])
+        pack = self.invoke(args + ["--library", "TV", "--storage", f"tar:{tmp_path / 'p.tar'}"])
+
+        assert both.exit_code == 2
+        assert "Use --library or --all-libraries, not both." in both.output
+        assert pack.exit_code == 2
+        assert "watch would replace" in pack.output
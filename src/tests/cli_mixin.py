@@ -49,11 +49,16 @@ class CliCommandMixin(ABC):
             "posters",
         ]
 
+    @property
+    def repository_module(self) -> str:
+        return f"{self.command_name}.repositories.plex_{self.command_name}"
+
+    # Commands import their dependencies lazily, so patch where they are defined.
     def patch_repository(self, repository_attr: str):
-        return patch(f"{self.command_name}.cli.{repository_attr}")
+        return patch(f"{self.repository_module}.{repository_attr}")
 
     def patch_server(self):
-        return patch(f"{self.command_name}.cli.PlexServer")
+        return patch("plexapi.server.PlexServer")
 
     @contextmanager
     def setup_mocks(
@@ -0,0 +1,475 @@
+"""Local HTTP stand-in for a Plex server, serving synthetic libraries.
+
+Items are derived from their rating key on request rather than stored, so libraries of
+hundreds of thousands of items cost no memory. Only the endpoints ``plexapi`` and the
+poster repository use are implemented: server identity, section listings (paged with the
+``X-Plex-Container-*`` headers, filtered on ``addedAt>>``/``updatedAt>>``), items by rating
+key, show/season children and artwork.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import random
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import accumulate
+from typing import cast
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import quoteattr
+
+MACHINE_IDENTIFIER = "fake-plex"
+STATS_PATH = "/__fake__/stats"
+RESET_PATH = "/__fake__/reset"
+
+_BASE_TIMESTAMP = 1_700_000_000
+# When the ``changed`` items of a library were last updated.
+UPDATED_TIMESTAMP = _BASE_TIMESTAMP + 86_400
+_DEFAULT_PAGE_SIZE = 100
+# Plex search types for the libtypes the repository lists.
+_MOVIE, _SHOW, _SEASON, _EPISODE = 1, 2, 3, 4
+
+
+@dataclass(frozen=True)
+class SyntheticLibrary:
+    """A movie or show section with ``items`` top-level items.
+
+    Show sections give every show ``seasons`` seasons of ``episodes`` episodes each. The
+    last ``changed`` items were updated at ``UPDATED_TIMESTAMP``: movies themselves, shows
+    through their last episode.
+    """
+
+    title: str
+    type: str = "movie"
+    items: int = 1000
+    seasons: int = 0
+    episodes: int = 0
+    changed: int = 0
+
+    @property
+    def stride(self) -> int:
+        """Rating keys used per top-level item (the item plus its seasons and episodes)."""
+        if self.type != "show":
+            return 1
+        return 1 + self.seasons * (1 + self.episodes)
+
+    @property
+    def asset_count(self) -> int:
+        return self.items * self.stride
+
+    def updated_at(self, item: int, season: int | None = None, episode: int | None = None) -> int:
+        if item < self.items - self.changed:
+            return _BASE_TIMESTAMP
+        if self.type != "show":
+            return UPDATED_TIMESTAMP
+        last = (self.seasons - 1, self.episodes - 1)
+        return UPDATED_TIMESTAMP if (season, episode) == last else _BASE_TIMESTAMP
+
+
+@dataclass(frozen=True)
+class FakePlexConfig:
+    """Libraries to serve and how the server behaves.
+
+    ``latency`` is added to every response; ``error_rate`` is the share of artwork requests
+    answered with ``503``. Originals are ``payload_size`` bytes, transcoded copies a quarter.
+    """
+
+    libraries: tuple[SyntheticLibrary, ...] = field(default_factory=tuple)
+    latency: float = 0.0
+    error_rate: float = 0.0
+    payload_size: int = 64 * 1024
+    seed: int = 0
+
+
+class _Catalog:
+    """Maps rating keys to the synthetic items they stand for."""
+
+    def __init__(self, libraries: tuple[SyntheticLibrary, ...]) -> None:
+        self.libraries = libraries
+        # Rating key 1 is the first item of the first library; libraries follow each other.
+        self.offsets = list(accumulate((library.asset_count for library in libraries), initial=1))
+
+    def section(self, key: int) -> tuple[SyntheticLibrary, int] | None:
+        if 1 <= key <= len(self.libraries):
+            return self.libraries[key - 1], self.offsets[key - 1]
+        return None
+
+    def locate(self, rating_key: int) -> tuple[int, int, int | None, int | None] | None:
+        """Return ``(section key, item index, season index, episode index)``."""
+        section_index = bisect_right(self.offsets, rating_key) - 1
+        if not 0 <= section_index < len(self.libraries):
+            return None
+        library = self.libraries[section_index]
+        relative = rating_key - self.offsets[section_index]
+        if relative >= library.asset_count:
+            return None
+        item, remainder = divmod(relative, library.stride)
+        if remainder == 0:
+            return section_index + 1, item, None, None
+        season, episode = divmod(remainder - 1, 1 + library.episodes)
+        return section_index + 1, item, season, episode - 1 if episode else None
+
+
+class _FakePlexHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; Nagle would delay every keep-alive reply.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        cast(_FakePlexHTTPServer, self.server).handle_get(self)
+
+    # Same headers as GET; _send leaves the body out.
+    do_HEAD = do_GET
+
+
+class _FakePlexHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, config: FakePlexConfig) -> None:
+        super().__init__(("127.0.0.1", 0), _FakePlexHandler)
+        self.config = config
+        self.catalog = _Catalog(config.libraries)
+        self.requests = Counter[str]()
+        self._lock = threading.Lock()
+        self._random = random.Random(config.seed)
+        self._payload = random.Random(config.seed).randbytes(config.payload_size)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def handle_get(self, handler: BaseHTTPRequestHandler) -> None:
+        parts = urlsplit(handler.path)
+        path, query = parts.path.rstrip("/") or "/", parse_qs(parts.query)
+        if path == STATS_PATH:
+            with self._lock:
+                stats = dict(self.requests)
+            _send(handler, 200, json.dumps(stats).encode(), "application/json")
+            return
+        if path == RESET_PATH:
+            with self._lock:
+                self.requests.clear()
+            _send(handler, 204, b"")
+            return
+        if self.config.latency:
+            time.sleep(self.config.latency)
+        segments = path.strip("/").split("/")
+        if path == "/":
+            self._count("identity")
+            _send_xml(
+                handler,
+                f'<MediaContainer size="0" machineIdentifier="{MACHINE_IDENTIFIER}" '
+                'friendlyName="Fake Plex" version="1.40.0.0" platform="Linux"/>',
+            )
+        elif path == "/library":
+            self._count("identity")
+            _send_xml(handler, '<MediaContainer size="0" title1="Plex Library"/>')
+        elif path == "/library/sections":
+            self._count("sections")
+            _send_xml(handler, self._sections_xml())
+        elif segments[:2] == ["library", "sections"] and segments[3:] == ["all"]:
+            self._count("listing")
+            self._send_listing(handler, int(segments[2]), query)
+        elif segments[:2] == ["library", "metadata"] and len(segments) == 3:
+            self._count("metadata")
+            self._send_metadata(handler, segments[2].split(","))
+        elif segments[:2] == ["library", "metadata"] and segments[3:] == ["children"]:
+            self._count("children")
+            self._send_children(handler, int(segments[2]))
+        elif segments[:2] == ["library", "metadata"] and segments[3:4] in (["thumb"], ["art"]):
+            self._count("artwork")
+            self._send_artwork(handler, int(segments[2]), self.config.payload_size)
+        elif path == "/photo/:/transcode":
+            self._count("transcode")
+            source = urlsplit(query.get("url", [""])[0]).path.split("/")
+            rating_key = int(source[3]) if len(source) > 3 and source[3].isdigit() else 0
+            self._send_artwork(handler, rating_key, self.config.payload_size // 4)
+        else:
+            self._count("other")
+            _send(handler, 404, b"")
+
+    def _count(self, endpoint: str) -> None:
+        with self._lock:
+            self.requests[endpoint] += 1
+
+    def _sections_xml(self) -> str:
+        directories: list[str] = []
+        for key, library in enumerate(self.config.libraries, start=1):
+            directories.append(
+                f'<Directory key="{key}" type="{library.type}" title={quoteattr(library.title)} '
+                f'agent="tv.plex.agents.{library.type}" scanner="Plex {library.type.title()}" '
+                f'language="en-US" uuid="section-{key}" updatedAt="{_BASE_TIMESTAMP}" '
+                f'scannedAt="{_BASE_TIMESTAMP}" totalSize="{library.items}">'
+                f'<Location id="{key}" path="/media/{library.title}"/></Directory>'
+            )
+        return f'<MediaContainer size="{len(directories)}">{"".join(directories)}</MediaContainer>'
+
+    def _send_listing(self, handler: BaseHTTPRequestHandler, key: int, query) -> None:
+        found = self.catalog.section(key)
+        if found is None:
+            _send(handler, 404, b"")
+            return
+        library, offset = found
+        search_type = int(query.get("type", ["0"])[0] or 0)
+        if library.type == "show" and search_type == _SEASON:
+            total = library.items * library.seasons
+        elif library.type == "show" and search_type == _EPISODE:
+            total = library.items * library.seasons * library.episodes
+        else:
+            total = library.items
+        positions = _filtered(library, search_type, range(total), query)
+        total = len(positions)
+        start, size = _page(handler, total, query)
+        elements: list[str] = []
+        for index in positions[start : start + size]:
+            if library.type == "show" and search_type == _SEASON:
+                item, season = divmod(index, library.seasons)
+                elements.append(_season_xml(library, offset, item, season))
+            elif library.type == "show" and search_type == _EPISODE:
+                item, rest = divmod(index, library.seasons * library.episodes)
+                season, episode = divmod(rest, library.episodes)
+                elements.append(_episode_xml(library, offset, item, season, episode))
+            elif library.type == "show":
+                elements.append(_show_xml(library, offset, index))
+            else:
+                elements.append(_movie_xml(library, offset, index))
+        _send_xml(handler, _container(elements, total, start, key))
+
+    def _send_metadata(self, handler: BaseHTTPRequestHandler, rating_keys: list[str]) -> None:
+        elements: list[str] = []
+        for rating_key in rating_keys:
+            located = self.catalog.locate(int(rating_key)) if rating_key.isdigit() else None
+            if located is None:
+                continue
+            key, item, season, episode = located
+            library, offset = self.config.libraries[key - 1], self.catalog.offsets[key - 1]
+            if library.type != "show":
+                elements.append(_movie_xml(library, offset, item))
+            elif season is None:
+                elements.append(_show_xml(library, offset, item))
+            elif episode is None:
+                elements.append(_season_xml(library, offset, item, season))
+            else:
+                elements.append(_episode_xml(library, offset, item, season, episode))
+        _send_xml(handler, _container(elements, len(elements), 0, 0))
+
+    def _send_children(self, handler: BaseHTTPRequestHandler, rating_key: int) -> None:
+        located = self.catalog.locate(rating_key)
+        if located is None:
+            _send(handler, 404, b"")
+            return
+        key, item, season, episode = located
+        library, offset = self.config.libraries[key - 1], self.catalog.offsets[key - 1]
+        if library.type != "show" or episode is not None:
+            _send_xml(handler, _container([], 0, 0, key))
+            return
+        if season is None:
+            total = library.seasons
+            start, size = _page(handler, total)
+            elements = [_season_xml(library, offset, item, s) for s in range(start, start + size)]
+        else:
+            total = library.episodes
+            start, size = _page(handler, total)
+            elements = [
+                _episode_xml(library, offset, item, season, e) for e in range(start, start + size)
+            ]
+        _send_xml(handler, _container(elements, total, start, key))
+
+    def _send_artwork(self, handler: BaseHTTPRequestHandler, rating_key: int, size: int) -> None:
+        if self.catalog.locate(rating_key) is None:
+            _send(handler, 404, b"")
+            return
+        if self.config.error_rate:
+            with self._lock:
+                failed = self._random.random() < self.config.error_rate
+            if failed:
+                _send(handler, 503, b"")
+                return
+        etag = f'"{rating_key}-{size}"'
+        if handler.headers.get("If-None-Match") == etag:
+            _send(handler, 304, b"", headers={"ETag": etag})
+            return
+        # Distinct leading bytes keep every item's artwork unique.
+        body = rating_key.to_bytes(8, "big") + self._payload[8:size]
+        headers = {"ETag": etag}
+        status = 200
+        requested = handler.headers.get("Range", "")
+        if requested.startswith("bytes=") and requested.endswith("-"):
+            start = int(requested[len("bytes=") : -1])
+            if start >= len(body):
+                _send(handler, 416, b"", headers={"Content-Range": f"bytes */{len(body)}"})
+                return
+            headers["Content-Range"] = f"bytes {start}-{len(body) - 1}/{len(body)}"
+            body, status = body[start:], 206
+        _send(handler, status, body, "image/jpeg", headers)
+
+
+def _filtered(
+    library: SyntheticLibrary, search_type: int, positions: range, query
+) -> range | list[int]:
+    """Listing positions matching the ``addedAt>>``/``updatedAt>>`` filters in ``query``."""
+    filtered: range | list[int] = positions
+    for name, values in query.items():
+        if name not in ("addedAt>>", "updatedAt>>"):
+            continue
+        stamp = int(values[0])
+        if stamp < _BASE_TIMESTAMP:
+            continue
+        if name == "addedAt>>" or stamp >= UPDATED_TIMESTAMP:
+            return []
+        if library.type != "show":
+            filtered = [p for p in filtered if library.updated_at(p) > stamp]
+        elif search_type == _EPISODE:
+            per_show = library.seasons * library.episodes
+            filtered = [
+                p
+                for p in filtered
+                if library.updated_at(p // per_show, *divmod(p % per_show, library.episodes))
+                > stamp
+            ]
+        else:
+            # Shows and seasons themselves are never updated.
+            return []
+    return filtered
+
+
+def _page(handler: BaseHTTPRequestHandler, total: int, query=None) -> tuple[int, int]:
+    # plexapi pages with headers, but passes them as query parameters for totals.
+    query = query or {}
+    start = int(
+        query.get("X-Plex-Container-Start", [None])[0]
+        or handler.headers.get("X-Plex-Container-Start")
+        or 0
+    )
+    size = int(
+        query.get("X-Plex-Container-Size", [None])[0]
+        or handler.headers.get("X-Plex-Container-Size")
+        or _DEFAULT_PAGE_SIZE
+    )
+    start = min(start, total)
+    return start, min(size, total - start)
+
+
+def _container(elements: list[str], total: int, start: int, section_key: int) -> str:
+    return (
+        f'<MediaContainer size="{len(elements)}" totalSize="{total}" offset="{start}" '
+        f'librarySectionID="{section_key}">{"".join(elements)}</MediaContainer>'
+    )
+
+
+def _movie_xml(library: SyntheticLibrary, offset: int, item: int) -> str:
+    rating_key = offset + item
+    folder = f"/media/{library.title}/Movie {item} ({1950 + item % 70})"
+    return (
+        f'<Video ratingKey="{rating_key}" key="/library/metadata/{rating_key}" type="movie" '
+        f'title="Movie {item}" year="{1950 + item % 70}" addedAt="{_BASE_TIMESTAMP}" '
+        f'updatedAt="{library.updated_at(item)}" thumb="/library/metadata/{rating_key}/thumb/'
+        f'{library.updated_at(item)}"><Media id="{rating_key}"><Part id="{rating_key}" '
+        f"file={quoteattr(f'{folder}/Movie {item}.mkv')}/></Media></Video>"
+    )
+
+
+def _show_xml(library: SyntheticLibrary, offset: int, item: int) -> str:
+    rating_key = offset + item * library.stride
+    return (
+        f'<Directory ratingKey="{rating_key}" key="/library/metadata/{rating_key}/children" '
+        f'type="show" title="Show {item}" year="{1950 + item % 70}" '
+        f'childCount="{library.seasons}" leafCount="{library.seasons * library.episodes}" '
+        f'addedAt="{_BASE_TIMESTAMP}" updatedAt="{_BASE_TIMESTAMP}" '
+        f'thumb="/library/metadata/{rating_key}/thumb/{_BASE_TIMESTAMP}">'
+        f"<Location path={quoteattr(f'/media/{library.title}/Show {item} ({1950 + item % 70})')}/>"
+        "</Directory>"
+    )
+
+
+def _season_xml(library: SyntheticLibrary, offset: int, item: int, season: int) -> str:
+    show_key = offset + item * library.stride
+    rating_key = show_key + 1 + season * (1 + library.episodes)
+    return (
+        f'<Directory ratingKey="{rating_key}" key="/library/metadata/{rating_key}/children" '
+        f'parentRatingKey="{show_key}" type="season" title="Season {season + 1}" '
+        f'index="{season + 1}" parentTitle="Show {item}" leafCount="{library.episodes}" '
+        f'addedAt="{_BASE_TIMESTAMP}" updatedAt="{_BASE_TIMESTAMP}" '
+        f'thumb="/library/metadata/{rating_key}/thumb/{_BASE_TIMESTAMP}"/>'
+    )
+
+
+def _episode_xml(
+    library: SyntheticLibrary, offset: int, item: int, season: int, episode: int
+) -> str:
+    show_key = offset + item * library.stride
+    season_key = show_key + 1 + season * (1 + library.episodes)
+    rating_key = season_key + 1 + episode
+    updated_at = library.updated_at(item, season, episode)
+    return (
+        f'<Video ratingKey="{rating_key}" key="/library/metadata/{rating_key}" type="episode" '
+        f'title="Episode {episode + 1}" index="{episode + 1}" parentIndex="{season + 1}" '
+        f'parentRatingKey="{season_key}" grandparentRatingKey="{show_key}" '
+        f'grandparentTitle="Show {item}" addedAt="{_BASE_TIMESTAMP}" '
+        f'updatedAt="{updated_at}" thumb="/library/metadata/{rating_key}/thumb/{updated_at}"/>'
+    )
+
+
+def _send_xml(handler: BaseHTTPRequestHandler, body: str) -> None:
+    _send(handler, 200, body.encode(), "text/xml;charset=utf-8")
+
+
+def _send(
+    handler: BaseHTTPRequestHandler,
+    status: int,
+    body: bytes,
+    content_type: str | None = None,
+    headers: dict[str, str] | None = None,
+) -> None:
+    handler.send_response(status)
+    if content_type:
+        handler.send_header("Content-Type", content_type)
+    for name, value in (headers or {}).items():
+        handler.send_header(name, value)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    if body and handler.command != "HEAD":
+        handler.wfile.write(body)
+
+
+@contextmanager
+def fake_plex_server(config: FakePlexConfig) -> Iterator[str]:
+    """Serve ``config`` on a background thread of this process; yields the base URL."""
+    server = _FakePlexHTTPServer(config)
+    thread = threading.Thread(target=server.serve_forever, name="fake-plex", daemon=True)
+    thread.start()
+    try:
+        yield server.url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextmanager
+def fake_plex_process(config: FakePlexConfig) -> Iterator[str]:
+    """Serve ``config`` from a child process, so the server does not compete for the GIL."""
+    ready: multiprocessing.Queue[str] = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(config, ready), daemon=True)
+    process.start()
+    try:
+        yield ready.get(timeout=30)
+    finally:
+        process.terminate()
+        process.join()
+
+
+def _serve(config: FakePlexConfig, ready: multiprocessing.Queue[str]) -> None:
+    server = _FakePlexHTTPServer(config)
+    ready.put(server.url)
+    server.serve_forever()
@@ -0,0 +1,89 @@
+"""In-memory stand-in for the boto3 S3 client calls the S3 storage backend makes."""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import threading
+from typing import Any
+
+
+class FakeClientError(Exception):
+    """Shaped like botocore's ClientError: the error code is in ``response``."""
+
+    def __init__(self, code: str) -> None:
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}}
+
+
+class FakeS3Client:
+    """Objects by (bucket, key); ``part_sizes`` records the parts of every multipart upload."""
+
+    def __init__(self) -> None:
+        self.objects: dict[tuple[str, str], bytes] = {}
+        self.content_types: dict[tuple[str, str], str | None] = {}
+        self.part_sizes: dict[str, list[int]] = {}
+        self.aborted: list[str] = []
+        self.calls: list[str] = []
+        self._uploads: dict[str, dict[int, bytes]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def head_object(self, *, Bucket: str, Key: str) -> dict:
+        with self._lock:
+            self.calls.append("head_object")
+            if (Bucket, Key) not in self.objects:
+                raise FakeClientError("404")
+            return {"ContentLength": len(self.objects[Bucket, Key])}
+
+    def put_object(
+        self, *, Bucket: str, Key: str, Body: bytes, ContentType: str | None = None
+    ) -> dict:
+        with self._lock:
+            self.calls.append("put_object")
+            self.objects[Bucket, Key] = Body
+            self.content_types[Bucket, Key] = ContentType
+            return {"ETag": _etag(Body)}
+
+    def create_multipart_upload(
+        self, *, Bucket: str, Key: str, ContentType: str | None = None
+    ) -> dict:
+        with self._lock:
+            self.calls.append("create_multipart_upload")
+            upload_id = f"upload-{next(self._ids)}"
+            self._uploads[upload_id] = {}
+            self.content_types[Bucket, Key] = ContentType
+            return {"UploadId": upload_id}
+
+    def upload_part(
+        self, *, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: bytes
+    ) -> dict:
+        with self._lock:
+            self.calls.append("upload_part")
+            self._uploads[UploadId][PartNumber] = Body
+            return {"ETag": _etag(Body)}
+
+    def complete_multipart_upload(
+        self, *, Bucket: str, Key: str, UploadId: str, MultipartUpload: dict[str, Any]
+    ) -> dict:
+        with self._lock:
+            self.calls.append("complete_multipart_upload")
+            parts = self._uploads.pop(UploadId)
+            numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+            for part in MultipartUpload["Parts"]:
+                if part["ETag"] != _etag(parts[part["PartNumber"]]):
+                    raise FakeClientError("InvalidPart")
+            self.objects[Bucket, Key] = b"".join(parts[number] for number in numbers)
+            self.part_sizes[Key] = [len(parts[number]) for number in numbers]
+            return {}
+
+    def abort_multipart_upload(self, *, Bucket: str, Key: str, UploadId: str) -> dict:
+        with self._lock:
+            self.calls.append("abort_multipart_upload")
+            self._uploads.pop(UploadId, None)
+            self.aborted.append(Key)
+            return {}
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.md5(body).hexdigest()}"'